@@ -15,8 +15,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'components'))
 
 from src.travel_planner_agent import TravelPlannerAgent
+from src.service_client import get_service_client
 from src.utils.tts import create_audio_button
-from src.config_manager import ConfigManager
+from src.resource_registry import get_resource_registry
+from src.booking_state import CONFIRMED, COLLECTING
+from src.history_window import history_fetch_limit
 from components.config_sidebar import render_config_sidebar
 from components.conversation_manager import (
     render_conversation_title_display, 
@@ -31,11 +34,15 @@ from components.conversation_history_page import (
 from components.car_booking_page import render_car_booking_page
 from components.hotel_booking_page import render_hotel_booking_page
 from components.travel_plan_page import render_travel_plan_page
+from components.usage_stats_panel import render_usage_stats_page
 from components.suggestion_display import (
     render_suggestions, 
     render_inline_suggestions,
+    render_pending_suggestions,
+    attach_ready_suggestions,
     handle_suggestion_click,
     get_pending_suggestion,
+    get_pending_routing_hint,
     render_suggestion_stats
 )
 
@@ -307,9 +314,9 @@ if "messages" not in st.session_state:
 if "chat_history" not in st.session_state:
     st.session_state["chat_history"] = []
 
-# Initialize config manager first
+# Shared config manager (one per process, not per browser session)
 if "config_manager" not in st.session_state:
-    st.session_state["config_manager"] = ConfigManager()
+    st.session_state["config_manager"] = get_resource_registry().config_manager
 
 config_manager = st.session_state["config_manager"]
 
@@ -318,7 +325,8 @@ if "travel_agent" not in st.session_state:
     with st.spinner(f"🔄 Đang khởi tạo {agent_name}..."):
         # Enable debug mode if DEBUG_TRAVEL_AGENT env var is set
         debug_mode = os.getenv("DEBUG_TRAVEL_AGENT", "false").lower() == "true"
-        st.session_state["travel_agent"] = TravelPlannerAgent(debug_mode=debug_mode)
+        # With TRAVEL_SERVICE_URL set, turns run on the headless service (service.py) instead of in-process
+        st.session_state["travel_agent"] = get_service_client() or TravelPlannerAgent(debug_mode=debug_mode)
 
 # Sidebar menu with personalized title
 agent_name = config_manager.get_agent_name()
@@ -342,8 +350,8 @@ if "selected_page" not in st.session_state:
 # Menu selection
 selected_page = st.sidebar.selectbox(
     "Chọn chức năng:",
-    ["💬 Chat", "📜 Lịch sử hội thoại", "🚗 Quản lý đặt xe", "🏨 Quản lý đặt phòng", "🧳 Quản lý kế hoạch du lịch", "📚 Knowledge Base"],
-    index=["💬 Chat", "📜 Lịch sử hội thoại", "🚗 Quản lý đặt xe", "🏨 Quản lý đặt phòng", "🧳 Quản lý kế hoạch du lịch", "📚 Knowledge Base"].index(st.session_state.selected_page),
+    ["💬 Chat", "📜 Lịch sử hội thoại", "🚗 Quản lý đặt xe", "🏨 Quản lý đặt phòng", "🧳 Quản lý kế hoạch du lịch", "📚 Knowledge Base", "📊 Token & chi phí"],
+    index=["💬 Chat", "📜 Lịch sử hội thoại", "🚗 Quản lý đặt xe", "🏨 Quản lý đặt phòng", "🧳 Quản lý kế hoạch du lịch", "📚 Knowledge Base", "📊 Token & chi phí"].index(st.session_state.selected_page),
     key="page_selectbox"
 )
 
@@ -421,8 +429,11 @@ if selected_page == "💬 Chat":
 
     # Check for pending suggestion
     pending_suggestion = get_pending_suggestion()
+    routing_hint = None
     if pending_suggestion:
         user_input = pending_suggestion
+        # The clicked suggestion's tool and location let the agent skip intent detection
+        routing_hint = get_pending_routing_hint()
     else:
         # Chat input
         user_input = st.chat_input("Hỏi tôi về du lịch, thời tiết, đặt khách sạn hoặc đặt xe...")
@@ -450,7 +461,11 @@ if selected_page == "💬 Chat":
                 # First try to get from database if we have an active conversation
                 active_conversation_id = st.session_state.get('active_conversation_id')
                 if active_conversation_id:
-                    db_history = config_manager.get_conversation_history(active_conversation_id)
+                    # Only the tail the agent's history window can use, plus the current user input
+                    db_history = config_manager.get_recent_conversation_history(
+                        active_conversation_id,
+                        history_fetch_limit(config_manager.get_max_context_messages()) + 1
+                    )
                     # Use database history but exclude the last message (current user input)
                     chat_history = db_history[:-1] if db_history else []
                 else:
@@ -489,6 +504,9 @@ if selected_page == "💬 Chat":
                                     # Save booking to database
                                     booking_type = "hotel" if "HOTEL" in tool_used else "car"
                                     result = save_booking_to_database(config_manager, booking_type, pending_booking)
+                                    if result.get("success"):
+                                        # Close the collected slots so the next booking starts fresh
+                                        agent.update_booking_status(active_conversation_id, booking_type, CONFIRMED)
                                     
                             elif any(word in user_lower for word in rejection_words):
                                 if tool_used == "TRAVEL_PLAN_CONFIRMATION":
@@ -500,6 +518,9 @@ if selected_page == "💬 Chat":
                                         "tool_used": "TRAVEL_PLAN_EDIT"
                                     }
                                 else:
+                                    # Reopen the booking so corrections are merged into the collected slots
+                                    booking_type = "hotel" if "HOTEL" in tool_used else "car"
+                                    agent.update_booking_status(active_conversation_id, booking_type, COLLECTING)
                                     result = {
                                         "success": True,
                                         "response": "Được rồi! Vui lòng cho tôi biết thông tin nào cần điều chỉnh, hoặc bạn có thể bắt đầu đặt lại.",
@@ -511,7 +532,7 @@ if selected_page == "💬 Chat":
                 
                 # Execute with new smart flow (only if not handling booking confirmation)
                 if not is_booking_confirmation:
-                    result = agent.plan_travel(user_input, chat_history)
+                    result = agent.plan_travel(user_input, chat_history, active_conversation_id, routing_hint=routing_hint)
                 
                 # Add assistant response with enhanced metadata
                 if result["success"]:
@@ -548,7 +569,9 @@ if selected_page == "💬 Chat":
                             "weather_type": result.get("weather_type", ""),
                             "city": result.get("city", ""),
                             "booking_details": result.get("booking_details", {}),
-                            "suggestions": result.get("suggestions", [])
+                            "suggestions": result.get("suggestions", []),
+                            "suggestions_pending": result.get("suggestions_pending", False),
+                            "turn_id": result.get("turn_id")
                         }
                         
                         # Handle booking and travel plan confirmation flow
@@ -773,6 +796,11 @@ if selected_page == "💬 Chat":
                     not message.get("need_fallback") and
                     not message.get("awaiting_confirmation")):
                     
+                    # Suggestions are generated after the answer; poll until they are attached
+                    fetch_suggestions = st.session_state["travel_agent"].get_suggestions
+                    if attach_ready_suggestions(message, fetch_suggestions):
+                        render_pending_suggestions(message, fetch_suggestions)
+                    
                     suggestions = message.get("suggestions", [])
                     if suggestions:
                         st.markdown("""
@@ -787,7 +815,7 @@ if selected_page == "💬 Chat":
                         )
                         
                         # Handle suggestion click
-                        if selected_suggestion and handle_suggestion_click(selected_suggestion):
+                        if selected_suggestion and handle_suggestion_click(selected_suggestion, suggestions):
                             st.rerun()
                         
                         # Show debug stats if enabled
@@ -815,9 +843,13 @@ elif selected_page == "🧳 Quản lý kế hoạch du lịch":
     # Render travel plan management page
     render_travel_plan_page(config_manager)
 
+elif selected_page == "📊 Token & chi phí":
+    # Render LLM usage and latency statistics
+    render_usage_stats_page(config_manager)
+
 elif selected_page == "📚 Knowledge Base":
-    # Get RAG system from agent
-    rag_system = st.session_state["travel_agent"].rag_system
+    # Get the shared RAG system (also when turns run on the headless service)
+    rag_system = get_resource_registry().rag_system
     
     # Knowledge Base header
     st.title("📚 Knowledge Base")
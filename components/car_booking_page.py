@@ -258,8 +258,8 @@ def show_car_booking_details(booking: Dict):
 def update_car_booking_status(booking_id: str, new_status: str):
     """Update car booking status"""
     try:
-        from src.config_manager import ConfigManager
-        config_manager = ConfigManager()
+        from src.resource_registry import get_resource_registry
+        config_manager = get_resource_registry().config_manager
         
         if config_manager.db_manager.update_car_booking_status(booking_id, new_status):
             st.success(f"✅ Đã cập nhật trạng thái đặt xe #{booking_id} thành {new_status}")
@@ -272,8 +272,8 @@ def update_car_booking_status(booking_id: str, new_status: str):
 def delete_car_booking(booking_id: str):
     """Delete a car booking"""
     try:
-        from src.config_manager import ConfigManager
-        config_manager = ConfigManager()
+        from src.resource_registry import get_resource_registry
+        config_manager = get_resource_registry().config_manager
         
         if config_manager.db_manager.delete_car_booking(booking_id):
             st.success(f"✅ Đã xóa đặt xe #{booking_id}")
@@ -4,14 +4,15 @@ Allows users to customize agent settings and personal preferences
 """
 
 import streamlit as st
-from src.config_manager import ConfigManager
+from src.resource_registry import get_resource_registry
+from src.stage_models import STAGE_MODEL_DEFAULTS, STAGE_LABELS, stage_overrides
 
 def render_config_sidebar():
     """Render configuration sidebar for agent and user settings"""
     
     # Initialize config manager
     if "config_manager" not in st.session_state:
-        st.session_state["config_manager"] = ConfigManager()
+        st.session_state["config_manager"] = get_resource_registry().config_manager
     
     config_manager = st.session_state["config_manager"]
     
@@ -137,9 +138,45 @@ def render_config_sidebar():
             
             if config_manager.save_config('agent', new_config):
                 st.success("✅ Đã lưu cài đặt!")
-                # Refresh agent with new settings
-                if "travel_agent" in st.session_state:
-                    del st.session_state["travel_agent"]
+                # Agents pick up the new settings on their next turn (config_version here, the database
+                # stamp in service workers, see ConfigManager.reload_if_changed)
+                st.rerun()
+            else:
+                st.error("❌ Lỗi khi lưu cài đặt!")
+    
+    # Per-stage models: small deployments for classification, stronger ones for answers
+    with st.sidebar.expander("🧠 Mô hình theo giai đoạn", expanded=False):
+        stored_models = config_manager.agent_config.get('stage_models') or {}
+        stage_models = {}
+        for stage in STAGE_MODEL_DEFAULTS:
+            current = config_manager.get_stage_model(stage)
+            st.markdown(f"**{STAGE_LABELS.get(stage, stage)}**")
+            deployment = st.text_input("Deployment", value=current.deployment, key=f"stage_{stage}_deployment")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                temperature = st.number_input("Temp", min_value=0.0, max_value=1.0, step=0.1,
+                                              value=float(current.temperature), key=f"stage_{stage}_temperature")
+            with col2:
+                # 0 = stage default
+                max_tokens = st.number_input("Max tokens", min_value=0, max_value=4000, step=10,
+                                             value=int(current.max_tokens or 0), key=f"stage_{stage}_max_tokens")
+            with col3:
+                timeout = st.number_input("Timeout (s)", min_value=1.0, max_value=120.0, step=1.0,
+                                          value=float(current.timeout), key=f"stage_{stage}_timeout")
+            # Only values that differ from the stage defaults are stored (a stage that follows the
+            # creativity setting keeps following it until a temperature is stored for it)
+            overrides = stage_overrides(stage, {
+                "deployment": deployment,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "timeout": timeout
+            }, stored_models.get(stage), config_manager.get_temperature())
+            if overrides:
+                stage_models[stage] = overrides
+        
+        if st.button("💾 Lưu mô hình", use_container_width=True):
+            if config_manager.update_stage_models(stage_models):
+                st.success("✅ Đã lưu cấu hình mô hình!")
                 st.rerun()
             else:
                 st.error("❌ Lỗi khi lưu cài đặt!")
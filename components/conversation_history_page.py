@@ -424,24 +424,32 @@ Chỉ trả lời tiêu đề, không giải thích thêm.
 """
         
         # Use the agent's LLM to generate title
-        import openai
-        from openai import AzureOpenAI
-        import os
+        from src.providers import create_chat_client
+        from src.resilience import resilient_call
+        from src.llm_scheduler import get_llm_scheduler, estimate_tokens
         
-        client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version="2024-02-15-preview",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        client = create_chat_client(api_version="2024-02-15-preview")
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "user", "content": title_prompt}
-            ],
-            max_tokens=50,
-            temperature=0.7
-        )
+        from src.usage_tracker import get_usage_tracker
+        usage_tracker = get_usage_tracker()
+        stage_model = config_manager.get_stage_model("titling")
+        # Titling has the lowest priority: it waits behind answers and gives up first under load
+        with get_llm_scheduler().slot("conversation_title", estimate_tokens(title_prompt, stage_model.completion_budget)) as slot, \
+                usage_tracker.track("conversation_title", stage_model.deployment,
+                                    conversation_id=st.session_state.get('active_conversation_id')) as call:
+            call.response = slot.response = resilient_call(
+                "llm",
+                client.chat.completions.create,
+                timeout=stage_model.timeout,
+                model=stage_model.deployment,
+                messages=[
+                    {"role": "user", "content": title_prompt}
+                ],
+                max_tokens=stage_model.max_tokens or 50,
+                temperature=stage_model.temperature
+            )
+        usage_tracker.flush()
+        response = call.response
         
         title = response.choices[0].message.content.strip()
         
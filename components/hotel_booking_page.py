@@ -273,8 +273,8 @@ def show_hotel_booking_details(booking: Dict):
 def update_hotel_booking_status(booking_id: str, new_status: str):
     """Update hotel booking status"""
     try:
-        from src.config_manager import ConfigManager
-        config_manager = ConfigManager()
+        from src.resource_registry import get_resource_registry
+        config_manager = get_resource_registry().config_manager
         
         if config_manager.db_manager.update_hotel_booking_status(booking_id, new_status):
             st.success(f"✅ Đã cập nhật trạng thái đặt phòng #{booking_id} thành {new_status}")
@@ -287,8 +287,8 @@ def update_hotel_booking_status(booking_id: str, new_status: str):
 def delete_hotel_booking(booking_id: str):
     """Delete a hotel booking"""
     try:
-        from src.config_manager import ConfigManager
-        config_manager = ConfigManager()
+        from src.resource_registry import get_resource_registry
+        config_manager = get_resource_registry().config_manager
         
         if config_manager.db_manager.delete_hotel_booking(booking_id):
             st.success(f"✅ Đã xóa đặt phòng #{booking_id}")
@@ -3,7 +3,9 @@ Suggestion Display Component - UI components for displaying contextual suggestio
 """
 
 import streamlit as st
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional
+
+from src.suggestion_engine import routing_hint
 
 
 def render_suggestions(suggestions: List[Dict[str, Any]], 
@@ -119,6 +121,50 @@ def render_inline_suggestions(suggestions: List[Dict[str, Any]],
     return selected_suggestion
 
 
+def attach_ready_suggestions(message: Dict[str, Any],
+                             fetch: Callable[[str], Optional[List[Dict[str, Any]]]]) -> bool:
+    """
+    Move background suggestions onto a chat message once they are ready
+    
+    Args:
+        message: Assistant message with turn_id and suggestions_pending
+        fetch: agent.get_suggestions (returns None while still generating)
+    
+    Returns:
+        True while the suggestions are still being generated
+    """
+    if not message.get("suggestions_pending"):
+        return False
+    
+    suggestions = fetch(message.get("turn_id")) if message.get("turn_id") else []
+    if suggestions is None:
+        return True
+    
+    message["suggestions"] = suggestions
+    message["suggestions_pending"] = False
+    return False
+
+
+def render_pending_suggestions(message: Dict[str, Any],
+                               fetch: Callable[[str], Optional[List[Dict[str, Any]]]],
+                               poll_interval: float = 1.0):
+    """
+    Placeholder while suggestions are generated; polls in a fragment and reruns the page when they
+    arrive (without st.fragment they appear on the next rerun)
+    """
+    def poll():
+        if attach_ready_suggestions(message, fetch):
+            st.caption("💡 Đang tạo gợi ý...")
+        elif fragment is not None:
+            st.rerun()
+    
+    fragment = getattr(st, "fragment", None)
+    if fragment is None:
+        poll()
+    else:
+        fragment(run_every=poll_interval)(poll)()
+
+
 def render_suggestion_carousel(suggestions: List[Dict[str, Any]], 
                              key_prefix: str = "carousel") -> Optional[str]:
     """
@@ -273,12 +319,14 @@ def render_suggestion_stats(suggestions: List[Dict[str, Any]]):
                     st.write(f"- Avg: {sum(scores)/len(scores):.2f}")
 
 
-def handle_suggestion_click(suggestion_text: str) -> bool:
+def handle_suggestion_click(suggestion_text: str, suggestions: List[Dict[str, Any]] = None) -> bool:
     """
     Handle when a suggestion is clicked
     
     Args:
         suggestion_text: The text of the clicked suggestion
+        suggestions: The displayed suggestions; the clicked one's target tool and location
+            are kept as a routing hint for the next turn
         
     Returns:
         True if suggestion should be processed as new user input
@@ -287,6 +335,8 @@ def handle_suggestion_click(suggestion_text: str) -> bool:
         # Store the suggestion in session state for processing
         st.session_state.suggestion_clicked = suggestion_text
         st.session_state.process_suggestion = True
+        clicked = next((s for s in suggestions or [] if s.get('text') == suggestion_text), None)
+        st.session_state.suggestion_routing_hint = routing_hint(clicked) if clicked else None
         return True
     return False
 
@@ -307,11 +357,22 @@ def get_pending_suggestion() -> Optional[str]:
     return None
 
 
+def get_pending_routing_hint() -> Optional[Dict[str, Any]]:
+    """
+    Get (and clear) the routing hint of the last clicked suggestion
+    
+    Returns:
+        {"tool", "location"} for plan_travel, or None
+    """
+    return st.session_state.pop('suggestion_routing_hint', None)
+
+
 def clear_suggestions():
     """Clear any stored suggestion state"""
     keys_to_clear = [
         'suggestion_clicked', 
         'process_suggestion',
+        'suggestion_routing_hint',
         'suggestion_feedback'
     ]
     
@@ -0,0 +1,140 @@
+"""
+Usage Stats Panel Component
+Shows LLM / embedding token usage, estimated cost and stage latency
+"""
+
+import streamlit as st
+from typing import Dict, List, Any
+
+GROUP_LABELS = {
+    "stage": "Theo bước xử lý",
+    "tool": "Theo công cụ",
+    "model": "Theo model",
+    "conversation_id": "Theo hội thoại"
+}
+
+
+def render_usage_stats_page(config_manager):
+    """Render token, cost and latency statistics"""
+    from src.usage_tracker import get_usage_tracker
+    from src.tracing import get_tracer
+    from src.resilience import dependency_states
+    from src.llm_scheduler import get_llm_scheduler
+    
+    st.title("📊 Token & chi phí")
+    
+    tracker = get_usage_tracker()
+    
+    active_conversation_id = st.session_state.get('active_conversation_id')
+    scope = st.radio(
+        "Phạm vi",
+        ["Hội thoại hiện tại", "Tất cả"],
+        horizontal=True,
+        index=0 if active_conversation_id else 1
+    )
+    conversation_id = active_conversation_id if scope == "Hội thoại hiện tại" else None
+    
+    totals = tracker.totals(conversation_id)
+    if not totals:
+        st.info("📝 Chưa có dữ liệu sử dụng LLM cho phạm vi này.")
+        return
+    
+    # Summary metrics
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Lượt gọi", totals["calls"])
+    with col2:
+        st.metric("Prompt + completion tokens", f"{totals['prompt_tokens'] + totals['completion_tokens']:,}")
+    with col3:
+        st.metric("Prompt cache hit", f"{_cache_hit_rate(totals):.0f}%",
+                  help=f"{totals['cached_tokens']:,} prompt tokens từ prompt cache của nhà cung cấp")
+    with col4:
+        st.metric("Embedding tokens", f"{totals['embedding_tokens']:,}")
+    with col5:
+        st.metric("Chi phí ước tính", f"${totals['cost_usd']:.4f}")
+    
+    st.markdown("---")
+    
+    group_by = st.selectbox(
+        "Nhóm theo",
+        list(GROUP_LABELS.keys()),
+        format_func=lambda key: GROUP_LABELS[key]
+    )
+    rows = tracker.summary(group_by, conversation_id)
+    st.dataframe(_format_usage_rows(rows, group_by), use_container_width=True, hide_index=True)
+    
+    # Latency per stage from recent traced turns (this process only)
+    stage_latency = get_tracer().summary()
+    if stage_latency:
+        st.markdown("### ⏱️ Độ trễ theo bước (các lượt gần đây)")
+        st.dataframe([
+            {
+                "Bước": stage,
+                "Số lần": stats["count"],
+                "p50 (ms)": round(stats["p50"], 1),
+                "p95 (ms)": round(stats["p95"], 1),
+                "p99 (ms)": round(stats["p99"], 1),
+                "Lỗi": stats["errors"]
+            }
+            for stage, stats in stage_latency.items()
+        ], use_container_width=True, hide_index=True)
+    
+    # LLM admission queue per priority class (this process only)
+    scheduler_state = get_llm_scheduler().state()
+    st.markdown("### 🚦 Hàng đợi LLM")
+    st.caption(
+        f"Đang chạy: {scheduler_state['in_flight']} · Đang chờ: {scheduler_state['waiting']} · "
+        f"Requests/phút: {scheduler_state['requests_last_minute']} · Tokens/phút: {scheduler_state['tokens_last_minute']:,}"
+    )
+    st.dataframe([
+        {
+            "Nhóm ưu tiên": name,
+            "Được chạy": stats["admitted"],
+            "Bị từ chối": stats["rejected"],
+            "Chờ TB (ms)": round(stats["queued_ms"] / stats["admitted"], 1) if stats["admitted"] else 0.0
+        }
+        for name, stats in scheduler_state["classes"].items()
+    ], use_container_width=True, hide_index=True)
+    
+    # Circuit breakers of external dependencies (this process only)
+    states = dependency_states()
+    if states:
+        st.markdown("### 🔌 Trạng thái dịch vụ ngoài")
+        st.dataframe([
+            {
+                "Dịch vụ": name,
+                "Circuit": state["state"],
+                "Lượt gọi": state["calls"],
+                "Retry": state["retries"],
+                "Timeout": state["timeouts"],
+                "Bị chặn": state["rejected"],
+                "Hedged": state["hedged"]
+            }
+            for name, state in states.items()
+        ], use_container_width=True, hide_index=True)
+
+
+def _cache_hit_rate(row: Dict[str, Any]) -> float:
+    """Share of prompt tokens served from the provider's prompt cache (%)"""
+    return 100 * row["cached_tokens"] / row["prompt_tokens"] if row["prompt_tokens"] else 0.0
+
+
+def _format_usage_rows(rows: List[Dict[str, Any]], group_by: str) -> List[Dict[str, Any]]:
+    """Turn usage summary rows into display rows"""
+    total_cost = sum(row["cost_usd"] for row in rows) or 1.0
+    
+    return [
+        {
+            GROUP_LABELS[group_by]: row["key"] or ("(định tuyến)" if group_by == "tool" else "-"),
+            "Lượt gọi": row["calls"],
+            "Prompt tokens": row["prompt_tokens"],
+            "Completion tokens": row["completion_tokens"],
+            "Cached tokens": row["cached_tokens"],
+            "% cache hit": round(_cache_hit_rate(row), 1),
+            "Embedding tokens": row["embedding_tokens"],
+            "Chi phí ($)": round(row["cost_usd"], 5),
+            "% chi phí": round(100 * row["cost_usd"] / total_cost, 1),
+            "Độ trễ TB (ms)": round(row["avg_latency_ms"], 1)
+        }
+        for row in rows
+    ]
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark cho app.py
+Đo thời gian import các module chính và thời gian render lần đầu của app.py
+(mỗi lần đo chạy trong một process Python mới), so sánh với budget
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+# Modules imported by app.py at startup
+IMPORT_TARGETS = [
+    "src.travel_planner_agent",
+    "src.resource_registry",
+    "src.utils.tts",
+]
+
+# SDKs that should only be imported on first use
+HEAVY_MODULES = ["langchain", "langchain_openai", "pinecone", "openai", "gtts"]
+
+IMPORT_SNIPPET = """
+import sys, time, json, importlib
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+RENDER_SNIPPET = """
+import os, sys, time, json
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file("app.py", default_timeout={timeout!r})
+app.run()
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"ms": elapsed, "heavy": heavy, "exceptions": [str(e.value) for e in app.exception]}}))
+"""
+
+
+def run_snippet(code: str) -> dict:
+    """Run a snippet in a fresh interpreter and parse its JSON output"""
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=project_root,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(code: str, iterations: int) -> dict:
+    """Median over several cold runs"""
+    runs = [run_snippet(code) for _ in range(iterations)]
+    result = runs[-1]
+    result["ms"] = statistics.median(run["ms"] for run in runs)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time and first render of app.py")
+    parser.add_argument("--iterations", type=int, default=5, help="Cold runs per measurement")
+    parser.add_argument("--import-budget-ms", type=float, default=1500, help="Budget for importing src.travel_planner_agent")
+    parser.add_argument("--render-budget-ms", type=float, default=4000, help="Budget for the first render of app.py")
+    parser.add_argument("--skip-render", action="store_true", help="Only measure imports")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+    
+    results = {"imports": {}, "render": None, "budgets": {
+        "import_ms": args.import_budget_ms,
+        "render_ms": args.render_budget_ms
+    }}
+    over_budget = False
+    
+    print("⏱️  Startup benchmark (median of cold runs)")
+    for module in IMPORT_TARGETS:
+        try:
+            result = measure(IMPORT_SNIPPET.format(root=project_root, module=module, heavy=HEAVY_MODULES), args.iterations)
+        except RuntimeError as e:
+            print(f"  ❌ import {module}: {e}")
+            continue
+        results["imports"][module] = result
+        heavy = ", ".join(result["heavy"]) or "-"
+        print(f"  📦 import {module:<28} {result['ms']:>9.1f} ms   heavy SDKs loaded: {heavy}")
+    
+    agent_import = results["imports"].get("src.travel_planner_agent")
+    if agent_import and agent_import["ms"] > args.import_budget_ms:
+        over_budget = True
+        print(f"  ⚠️  Import budget exceeded: {agent_import['ms']:.1f} > {args.import_budget_ms:.0f} ms")
+    
+    if not args.skip_render:
+        try:
+            render = measure(RENDER_SNIPPET.format(root=project_root, timeout=60, heavy=HEAVY_MODULES), args.iterations)
+            results["render"] = render
+            heavy = ", ".join(render["heavy"]) or "-"
+            print(f"  🖥️  first render of app.py          {render['ms']:>9.1f} ms   heavy SDKs loaded: {heavy}")
+            for message in render["exceptions"]:
+                print(f"  ⚠️  App exception: {message}")
+            if render["ms"] > args.render_budget_ms:
+                over_budget = True
+                print(f"  ⚠️  Render budget exceeded: {render['ms']:.1f} > {args.render_budget_ms:.0f} ms")
+        except RuntimeError as e:
+            print(f"  ❌ first render: {e}")
+    
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json_path}")
+    
+    print("❌ Over budget" if over_budget else "✅ Within budget")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,11 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
 src_path = os.path.join(project_root, 'src')
 sys.path.insert(0, src_path)
+sys.path.insert(0, project_root)
 
 try:
-    from pinecone_rag_system import PineconeRAGSystem
+    # Imported as part of the src package (it uses package-relative imports)
+    from src.pinecone_rag_system import PineconeRAGSystem
 except ImportError as e:
     print(f"❌ Import error: {e}")
     print(f"🔧 Script directory: {script_dir}")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Batch replay cho TravelPlannerAgent.plan_travel
+Đọc từng dòng JSONL (câu hỏi, lịch sử hội thoại, tool mong đợi), chạy qua plan_travel
+bằng một worker pool giới hạn, ghi kết quả + timing từng bước ra JSONL
+và in throughput, latency percentiles và độ chính xác định tuyến
+
+Input (mỗi dòng một JSON object):
+    {"id": "q1", "query": "Thời tiết Đà Nẵng hôm nay?", "expected_tool": "WEATHER",
+     "history": [["user", "..."], ["assistant", "..."]], "conversation_id": "replay-1"}
+Chỉ "query" (hoặc "user_input") là bắt buộc.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterator, Optional
+
+# Add project root to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+
+from src.tracing import percentile, summarize_spans
+
+load_dotenv(os.path.join(project_root, ".env"))
+
+RESPONSE_PREVIEW_CHARS = 300
+
+
+def read_turns(path: str, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream turns from a JSONL file (blank lines and lines without a query are skipped)"""
+    count = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                turn = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Line {line_number}: invalid JSON ({e})")
+                continue
+            
+            query = turn.get("query") or turn.get("user_input")
+            if not query:
+                print(f"⚠️  Line {line_number}: no query, skipped")
+                continue
+            
+            yield {
+                "id": turn.get("id", line_number),
+                "query": query,
+                "history": [tuple(message) for message in turn.get("history", [])],
+                "expected_tool": (turn.get("expected_tool") or "").upper() or None,
+                "conversation_id": turn.get("conversation_id")
+            }
+            
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+
+class Replayer:
+    """Runs turns through plan_travel, one agent per worker thread (like one per Streamlit session)"""
+    
+    def __init__(self, debug_mode: bool = False):
+        self.debug_mode = debug_mode
+        self._local = threading.local()
+    
+    def _agent(self):
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            from src.travel_planner_agent import TravelPlannerAgent
+            agent = TravelPlannerAgent(debug_mode=self.debug_mode)
+            self._local.agent = agent
+        return agent
+    
+    def run_turn(self, turn: Dict[str, Any]) -> Dict[str, Any]:
+        """Replay one turn and collect its result and spans"""
+        agent = self._agent()
+        start = time.perf_counter()
+        try:
+            result = agent.plan_travel(turn["query"], turn["history"], turn["conversation_id"])
+            error = None
+        except Exception as e:
+            result = {}
+            error = f"{type(e).__name__}: {e}"
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        tool_used = result.get("tool_used")
+        turn_id = result.get("turn_id")
+        # Booking and planning turns that still miss details report "<TOOL>_VALIDATION"
+        routed_tool = tool_used[:-len("_VALIDATION")] if tool_used and tool_used.endswith("_VALIDATION") else tool_used
+        return {
+            "id": turn["id"],
+            "query": turn["query"],
+            "conversation_id": turn["conversation_id"],
+            "expected_tool": turn["expected_tool"],
+            "tool_used": tool_used,
+            "routed_tool": routed_tool,
+            "correct": routed_tool == turn["expected_tool"] if turn["expected_tool"] else None,
+            "success": bool(result.get("success")) and error is None,
+            "error": error or result.get("error"),
+            "latency_ms": round(latency_ms, 3),
+            "turn_id": turn_id,
+            "response": (result.get("response") or "")[:RESPONSE_PREVIEW_CHARS],
+            "spans": [
+                {"stage": span["stage"], "duration_ms": span["duration_ms"], "status": span["status"]}
+                for span in agent.tracer.recent_spans(turn_id)
+            ] if turn_id else []
+        }
+
+
+def replay(input_path: str, output_path: str, workers: int, limit: Optional[int],
+           debug_mode: bool, progress_every: int) -> Dict[str, Any]:
+    """Stream turns through a bounded worker pool and write one result line per turn"""
+    replayer = Replayer(debug_mode)
+    records = []
+    max_in_flight = workers * 2
+    
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        
+        def drain():
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight.discard(future)
+                record = future.result()
+                records.append(record)
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                if progress_every and len(records) % progress_every == 0:
+                    print(f"  📤 {len(records)} turns replayed...")
+        
+        # Only a bounded number of turns are read ahead, so large files stream
+        for turn in read_turns(input_path, limit):
+            while len(in_flight) >= max_in_flight:
+                drain()
+            in_flight.add(executor.submit(replayer.run_turn, turn))
+        
+        while in_flight:
+            drain()
+    
+    wall_seconds = time.perf_counter() - start
+    return {"records": records, "wall_seconds": wall_seconds}
+
+
+def print_report(records, wall_seconds: float, workers: int):
+    """Throughput, latency percentiles, per-stage timings and routing accuracy"""
+    if not records:
+        print("📝 No turns replayed")
+        return
+    
+    latencies = [record["latency_ms"] for record in records]
+    errors = sum(1 for record in records if record["error"])
+    incomplete = sum(1 for record in records if not record["success"] and not record["error"])
+    
+    print(f"\n📊 Replay summary ({len(records)} turns, {workers} workers)")
+    print(f"  ⏱️  Wall time:   {wall_seconds:.2f} s")
+    print(f"  🚀 Throughput:  {len(records) / max(wall_seconds, 1e-9):.2f} turns/s")
+    print(f"  📈 Latency ms:  p50 {percentile(latencies, 50):.1f} | p95 {percentile(latencies, 95):.1f} "
+          f"| p99 {percentile(latencies, 99):.1f} | max {max(latencies):.1f}")
+    print(f"  ❌ Errors: {errors}   📝 Unsuccessful (e.g. missing booking details): {incomplete}")
+    
+    spans = [span for record in records for span in record["spans"]]
+    if spans:
+        print("\n⏱️  Per-stage timings (ms)")
+        print(f"  {'stage':<28} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+        for stage, stats in summarize_spans(spans).items():
+            print(f"  {stage:<28} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+                  f"{stats['p99']:>9.1f} {stats['errors']:>7}")
+    
+    labelled = [record for record in records if record["expected_tool"]]
+    if labelled:
+        correct = sum(1 for record in labelled if record["correct"])
+        print(f"\n🎯 Routing accuracy: {correct}/{len(labelled)} ({100 * correct / len(labelled):.1f}%)")
+        
+        confusion: Dict[str, Dict[str, int]] = {}
+        for record in labelled:
+            row = confusion.setdefault(record["expected_tool"], {})
+            row[record["routed_tool"] or "-"] = row.get(record["routed_tool"] or "-", 0) + 1
+        for expected, row in sorted(confusion.items()):
+            routed = ", ".join(f"{tool}: {count}" for tool, count in sorted(row.items(), key=lambda item: -item[1]))
+            print(f"  {expected:<18} → {routed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a JSONL file of user turns through plan_travel")
+    parser.add_argument("input", help="JSONL file of turns (query, optional history / expected_tool / conversation_id)")
+    parser.add_argument("--output", default=os.path.join(project_root, "data", "replay_results.jsonl"),
+                        help="JSONL file for per-turn results and stage timings")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent plan_travel calls")
+    parser.add_argument("--limit", type=int, help="Only replay the first N turns")
+    parser.add_argument("--progress-every", type=int, default=50, help="Print progress every N turns (0 = off)")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use the offline fake LLM / embedding / vector / weather providers (TRAVEL_PROVIDER=fake)")
+    parser.add_argument("--cassette", choices=["record", "replay"],
+                        help="Record external responses to, or replay them from, cassette files (TRAVEL_CASSETTE_MODE)")
+    parser.add_argument("--cassette-dir", help="Cassette directory (TRAVEL_CASSETTE_DIR, default data/cassettes)")
+    parser.add_argument("--replay-latency", action="store_true",
+                        help="When replaying a cassette, sleep for each call's recorded latency")
+    parser.add_argument("--debug", action="store_true", help="Enable agent debug output")
+    args = parser.parse_args()
+    
+    if args.fake:
+        os.environ["TRAVEL_PROVIDER"] = "fake"
+    if args.cassette:
+        os.environ["TRAVEL_CASSETTE_MODE"] = args.cassette
+    if args.cassette_dir:
+        os.environ["TRAVEL_CASSETTE_DIR"] = args.cassette_dir
+    if args.replay_latency:
+        os.environ["TRAVEL_CASSETTE_LATENCY"] = "true"
+    
+    if not os.path.exists(args.input):
+        print(f"❌ Input file not found: {args.input}")
+        sys.exit(1)
+    
+    print(f"🚀 Replaying {args.input} with {args.workers} workers...")
+    run = replay(args.input, args.output, max(1, args.workers), args.limit, args.debug, args.progress_every)
+    print_report(run["records"], run["wall_seconds"], max(1, args.workers))
+    print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
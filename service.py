@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Travel Assistant Service - Headless HTTP API for TravelPlannerAgent
+Runs the agent without Streamlit so it can be scaled separately behind a load balancer;
+the Streamlit app becomes one client among others (set TRAVEL_SERVICE_URL, see src/service_client.py)
+
+Usage:
+    python service.py --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoints (JSON unless noted):
+    GET    /health                                    Liveness, dependency breakers, LLM queue, degradation mode
+    POST   /v1/plan                                   One turn of plan_travel
+    POST   /v1/plan/stream                            Same turn as server-sent events (context, tool, response, result, suggestions)
+    GET    /v1/suggestions/{turn_id}                  Follow-up suggestions of a turn (generated after the answer)
+    POST   /v1/general-knowledge                      Answer without the knowledge base (RAG fallback)
+    POST   /v1/rag/query                              Knowledge base question
+    GET    /v1/bookings                               Saved hotel / car bookings
+    POST   /v1/bookings/{booking_type}                Save a confirmed booking
+    PUT    /v1/conversations/{id}/bookings/{type}     Move the collected booking to a new status
+    GET    /v1/conversations                          Conversations
+    POST   /v1/conversations                          Create a conversation
+    DELETE /v1/conversations/{id}                     Delete a conversation
+    GET    /v1/conversations/{id}/messages            Conversation history
+    POST   /v1/conversations/{id}/messages            Append a message
+"""
+
+import os
+import sys
+import json
+import uuid
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.travel_planner_agent import TravelPlannerAgent
+from src.resource_registry import get_resource_registry
+from src.resilience import dependency_states
+from src.llm_scheduler import get_llm_scheduler
+from src.suggestion_worker import get_suggestion_worker
+from src.suggestion_prefetcher import get_suggestion_prefetcher
+from src.degradation import get_degradation_controller
+from src.async_runtime import to_thread
+from src.booking_state import CONFIRMED
+
+load_dotenv(os.path.join(project_root, ".env"))
+
+BOOKING_TYPES = ("hotel", "car")
+
+# How long the event stream stays open after the result for the background suggestions
+STREAM_SUGGESTIONS_WAIT = float(os.getenv("STREAM_SUGGESTIONS_WAIT", "10"))
+
+
+class PlanRequest(BaseModel):
+    query: str
+    history: List[List[str]] = Field(default_factory=list)  # [[role, content], ...]
+    conversation_id: Optional[str] = None
+    routing_hint: Optional[Dict[str, Any]] = None  # {"tool", "location"} of a clicked suggestion
+
+
+class QuestionRequest(BaseModel):
+    query: str
+    top_k: int = 5
+
+
+class BookingRequest(BaseModel):
+    details: Dict[str, Any]
+    conversation_id: Optional[str] = None
+
+
+class BookingStatusRequest(BaseModel):
+    status: str
+
+
+class ConversationRequest(BaseModel):
+    title: str = "Cuộc trò chuyện mới"
+
+
+class MessageRequest(BaseModel):
+    role: str  # "user" or "assistant"
+    content: str
+    metadata: Optional[Dict[str, Any]] = None
+
+
+app = FastAPI(title="AI Travel Assistant", version="1.0")
+
+# One agent per worker process; it only holds references to the process-wide shared resources
+_agent: Optional[TravelPlannerAgent] = None
+
+
+def get_agent() -> TravelPlannerAgent:
+    global _agent
+    if _agent is None:
+        _agent = TravelPlannerAgent()
+    return _agent
+
+
+def _db():
+    return get_resource_registry().config_manager.db_manager
+
+
+def _history(history: List[List[str]]) -> List[tuple]:
+    return [tuple(message[:2]) for message in history if len(message) >= 2]
+
+
+def _sse(event: str, data: Any) -> str:
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@app.on_event("startup")
+async def startup():
+    # Build the agent (config database, templates) before the first request
+    await to_thread(get_agent)
+    print(f"🚀 Travel assistant service ready (pid {os.getpid()})")
+
+
+@app.get("/health")
+async def health() -> Dict[str, Any]:
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "dependencies": dependency_states(),
+        "llm_queue": get_llm_scheduler().state(),
+        "suggestions": get_suggestion_worker().state(),
+        "prefetch": get_suggestion_prefetcher().state(),
+        "degradation": get_degradation_controller().state()
+    }
+
+
+@app.post("/v1/plan")
+async def plan(request: PlanRequest) -> Dict[str, Any]:
+    return await get_agent().aplan_travel(request.query, _history(request.history), request.conversation_id,
+                                          routing_hint=request.routing_hint)
+
+
+@app.post("/v1/plan/stream")
+async def plan_stream(request: PlanRequest):
+    """Progress events while the turn runs, then the full result"""
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def run_turn():
+        try:
+            result = await get_agent().aplan_travel(
+                request.query, _history(request.history), request.conversation_id,
+                on_event=lambda event, data: queue.put_nowait((event, data)),
+                routing_hint=request.routing_hint
+            )
+            queue.put_nowait(("result", result))
+            if result.get("suggestions_pending"):
+                # The answer is already out; follow with the suggestions of this worker process
+                suggestions = await to_thread(get_agent().get_suggestions, result["turn_id"], STREAM_SUGGESTIONS_WAIT)
+                queue.put_nowait(("suggestions", {"turn_id": result["turn_id"], "suggestions": suggestions or []}))
+        except Exception as e:
+            queue.put_nowait(("error", {"success": False, "error": str(e)}))
+        finally:
+            queue.put_nowait(None)
+    
+    async def events():
+        # The turn keeps running if the client disconnects, so booking state stays consistent
+        task = asyncio.ensure_future(run_turn())
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield _sse(*item)
+        await task
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/v1/suggestions/{turn_id}")
+async def suggestions(turn_id: str, wait: float = 0) -> Dict[str, Any]:
+    """
+    Suggestions of a turn; pending while they are still being generated
+    Jobs live in the worker process that ran the turn, so several workers need sticky sessions
+    (or use /v1/plan/stream, which sends them on the same connection)
+    """
+    found = await to_thread(get_agent().get_suggestions, turn_id, min(max(wait, 0), 30))
+    return {"turn_id": turn_id, "pending": found is None, "suggestions": found or []}
+
+
+@app.post("/v1/general-knowledge")
+async def general_knowledge(request: QuestionRequest) -> Dict[str, Any]:
+    return await to_thread(get_agent().get_general_knowledge_response, request.query)
+
+
+@app.post("/v1/rag/query")
+async def rag_query(request: QuestionRequest) -> Dict[str, Any]:
+    rag_system = await to_thread(getattr, get_agent(), "rag_system")
+    return await rag_system.aquery(request.query, request.top_k)
+
+
+@app.get("/v1/bookings")
+async def list_bookings(booking_type: str = "all") -> Dict[str, Any]:
+    db = _db()
+    bookings = {}
+    if booking_type in ("all", "hotel"):
+        bookings["hotel"] = await to_thread(db.get_all_hotel_bookings)
+    if booking_type in ("all", "car"):
+        bookings["car"] = await to_thread(db.get_all_car_bookings)
+    return bookings
+
+
+@app.post("/v1/bookings/{booking_type}")
+async def save_booking(booking_type: str, request: BookingRequest) -> Dict[str, Any]:
+    if booking_type not in BOOKING_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown booking type: {booking_type}")
+    
+    booking_id = str(uuid.uuid4())
+    now = datetime.now().isoformat()
+    details = dict(request.details, id=booking_id, status="confirmed", created_at=now, updated_at=now)
+    
+    db = _db()
+    save = db.save_hotel_booking_enhanced if booking_type == "hotel" else db.save_car_booking_enhanced
+    success = await to_thread(save, details)
+    if success and request.conversation_id:
+        # Close the collected slots so the next booking starts fresh
+        await to_thread(get_agent().update_booking_status, request.conversation_id, booking_type, CONFIRMED)
+    return {"success": bool(success), "booking_id": booking_id if success else None, "booking_details": details}
+
+
+@app.put("/v1/conversations/{conversation_id}/bookings/{booking_type}")
+async def update_booking_status(conversation_id: str, booking_type: str, request: BookingStatusRequest) -> Dict[str, Any]:
+    if booking_type not in BOOKING_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown booking type: {booking_type}")
+    success = await to_thread(get_agent().update_booking_status, conversation_id, booking_type, request.status)
+    return {"success": bool(success)}
+
+
+@app.get("/v1/conversations")
+async def list_conversations() -> List[Dict[str, Any]]:
+    return await to_thread(_db().get_conversations)
+
+
+@app.post("/v1/conversations")
+async def create_conversation(request: ConversationRequest) -> Dict[str, Any]:
+    conversation_id = await to_thread(_db().create_conversation, request.title)
+    return {"conversation_id": conversation_id, "title": request.title}
+
+
+@app.delete("/v1/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str) -> Dict[str, Any]:
+    return {"success": bool(await to_thread(_db().delete_conversation, conversation_id))}
+
+
+@app.get("/v1/conversations/{conversation_id}/messages")
+async def get_messages(conversation_id: str, limit: Optional[int] = None) -> List[List[str]]:
+    history = await to_thread(_db().get_conversation_history, conversation_id, limit)
+    return [list(message) for message in history]
+
+
+@app.post("/v1/conversations/{conversation_id}/messages")
+async def add_message(conversation_id: str, request: MessageRequest) -> Dict[str, Any]:
+    success = await to_thread(_db().save_message, conversation_id, request.role, request.content, request.metadata)
+    return {"success": bool(success)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the travel assistant HTTP service")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVICE_WORKERS", "1")),
+                        help="Worker processes (each has its own event loop, clients and caches)")
+    args = parser.parse_args()
+    
+    import uvicorn
+    uvicorn.run("service:app", host=args.host, port=args.port, workers=max(1, args.workers), app_dir=project_root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Async Runtime - Process-wide event loop for the async agent pipeline
+Sync callers (Streamlit, scripts) run coroutines on one background loop with run_sync(), so every
+conversation in the process waits on I/O in the same loop instead of holding a thread per call
+"""
+
+import os
+import asyncio
+import threading
+import functools
+import contextvars
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_lock = threading.Lock()
+
+# Event loop -> objects bound to it (async HTTP clients keep connections tied to one loop)
+_loop_locals: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Any, Any]]" = weakref.WeakKeyDictionary()
+_loop_locals_lock = threading.Lock()
+
+
+def get_agent_loop() -> asyncio.AbstractEventLoop:
+    """Get the process-wide background event loop (started on first use)"""
+    global _loop, _loop_thread
+    
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                
+                _loop_thread = threading.Thread(target=run, name="agent-loop", daemon=True)
+                _loop_thread.start()
+                ready.wait()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro: Awaitable[Any], timeout: float = None) -> Any:
+    """
+    Run a coroutine on the agent loop and block until it finishes
+    
+    Raises:
+        RuntimeError: when called from the agent loop itself (await the coroutine instead)
+    """
+    loop = get_agent_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync() called from the agent loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    """Bounded pool for blocking calls that have no async client (SQLite, Pinecone)"""
+    global _io_executor
+    
+    if _io_executor is None:
+        with _io_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("ASYNC_IO_THREADS", "64")),
+                    thread_name_prefix="agent-io"
+                )
+    return _io_executor
+
+
+async def to_thread(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call off the event loop, keeping the tracing context"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_get_io_executor(), call)
+
+
+def loop_local(key: Any, factory: Callable[[], Any]) -> Any:
+    """Object created once per running event loop (e.g. an async SDK client)"""
+    loop = asyncio.get_running_loop()
+    with _loop_locals_lock:
+        objects = _loop_locals.setdefault(loop, {})
+        if key not in objects:
+            objects[key] = factory()
+        return objects[key]
@@ -0,0 +1,222 @@
+"""
+Booking State - Per-conversation slot-filling state for hotel and car bookings
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Booking lifecycle: collecting -> awaiting_confirmation -> confirmed / cancelled
+# (a collecting booking the user walked away from becomes expired)
+COLLECTING = "collecting"
+AWAITING_CONFIRMATION = "awaiting_confirmation"
+CONFIRMED = "confirmed"
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+OPEN_STATUSES = (COLLECTING, AWAITING_CONFIRMATION)
+
+BOOKING_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "hotel": (
+        "customer_name", "customer_phone", "customer_email", "hotel_name", "location",
+        "check_in_date", "nights", "guests", "rooms", "room_type", "special_requests"
+    ),
+    "car": (
+        "customer_name", "customer_phone", "pickup_location", "destination", "pickup_time",
+        "car_type", "seats", "notes"
+    )
+}
+
+REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "hotel": ("customer_name", "customer_phone", "hotel_name", "location", "check_in_date", "nights"),
+    "car": ("customer_name", "customer_phone", "pickup_location", "destination", "pickup_time", "car_type")
+}
+
+# A slot the user already gave is only replaced by a mention in the new message this confident
+OVERRIDE_CONFIDENCE = 0.7
+
+# A message is a bare answer to the booking questions when every slot it mentions was asked for,
+# at this confidence, and at most MAX_LEFTOVER_WORDS other words remain (besides filler words)
+ANSWER_CONFIDENCE = 0.6
+MAX_LEFTOVER_WORDS = 1
+FILLER_WORDS = frozenset((
+    "và", "là", "của", "tôi", "mình", "em", "anh", "chị", "nhé", "nha", "ạ", "ok", "oke",
+    "vâng", "dạ", "được", "rồi", "cho", "với"
+))
+
+# A collecting booking expires after this many turns routed elsewhere, or this long without an answer
+DEFAULT_MAX_IDLE_TURNS = 3
+DEFAULT_SESSION_TTL_MINUTES = 30.0
+
+# (field, query, context) -> (value, confidence, found)
+SlotReader = Callable[[str, str, str], Tuple[Any, float, bool]]
+
+# (field, query) -> (value, confidence, span of the value in query, or None when not mentioned)
+SlotLocator = Callable[[str, str], Tuple[Any, float, Optional[Tuple[int, int]]]]
+
+
+class BookingState:
+    """
+    Slots collected so far for one booking in one conversation
+    
+    Each slot is stored as {"value": ..., "filled": bool}; "filled" means the value
+    came from the user rather than from a default.
+    """
+    
+    def __init__(self, booking_type: str, conversation_id: str = None, status: str = COLLECTING,
+                 slots: Dict[str, Dict[str, Any]] = None, asked: List[str] = None, idle_turns: int = 0,
+                 updated_at: str = None):
+        if booking_type not in BOOKING_FIELDS:
+            raise ValueError(f"Unknown booking type: {booking_type}")
+        
+        self.booking_type = booking_type
+        self.conversation_id = conversation_id
+        self.status = status
+        self.slots: Dict[str, Dict[str, Any]] = dict(slots or {})
+        self.asked: List[str] = list(asked or [])  # fields the last booking reply asked for
+        self.idle_turns = idle_turns  # turns routed to other tools since that reply
+        self.updated_at = updated_at  # SQLite CURRENT_TIMESTAMP (UTC) of the last save
+    
+    @classmethod
+    def _from_session(cls, session: Dict[str, Any]) -> "BookingState":
+        return cls(session["booking_type"], session["conversation_id"], session["status"], session["slots"],
+                   session.get("asked"), session.get("idle_turns", 0), session.get("updated_at"))
+    
+    @classmethod
+    def _load_session(cls, db_manager, conversation_id: str, booking_type: str = None) -> Optional["BookingState"]:
+        """Open booking of a conversation; an expired one is closed and not returned"""
+        session = db_manager.get_booking_session(conversation_id, booking_type)
+        if not session or session["booking_type"] not in BOOKING_FIELDS:
+            return None
+        
+        state = cls._from_session(session)
+        if state.is_expired():
+            db_manager.update_booking_session_status(conversation_id, state.booking_type, EXPIRED)
+            return None
+        return state
+    
+    @classmethod
+    def load(cls, db_manager, conversation_id: str, booking_type: str) -> "BookingState":
+        """Load the open booking of a conversation, or start a new one"""
+        if db_manager is not None and conversation_id:
+            state = cls._load_session(db_manager, conversation_id, booking_type)
+            if state:
+                return state
+        return cls(booking_type, conversation_id)
+    
+    @classmethod
+    def load_open(cls, db_manager, conversation_id: str) -> Optional["BookingState"]:
+        """Load the most recent open booking of a conversation, whatever its type"""
+        if db_manager is None or not conversation_id:
+            return None
+        return cls._load_session(db_manager, conversation_id)
+    
+    def save(self, db_manager) -> bool:
+        """Persist the state (no-op without a conversation)"""
+        if db_manager is None or not self.conversation_id:
+            return False
+        return db_manager.save_booking_session(self.conversation_id, self.booking_type, self.status, self.slots,
+                                               self.asked, self.idle_turns)
+    
+    def is_expired(self, now: datetime = None) -> bool:
+        """
+        A collecting booking expires after BOOKING_MAX_IDLE_TURNS turns about something else,
+        or BOOKING_SESSION_TTL_MINUTES without progress (bookings awaiting confirmation do not expire)
+        """
+        if self.status != COLLECTING:
+            return False
+        if self.idle_turns >= int(os.getenv("BOOKING_MAX_IDLE_TURNS", str(DEFAULT_MAX_IDLE_TURNS))):
+            return True
+        if not self.updated_at:
+            return False
+        try:
+            updated_at = datetime.strptime(self.updated_at[:19], "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return False
+        ttl_minutes = float(os.getenv("BOOKING_SESSION_TTL_MINUTES", str(DEFAULT_SESSION_TTL_MINUTES)))
+        return ((now or datetime.utcnow()) - updated_at).total_seconds() > ttl_minutes * 60
+    
+    def record_idle_turn(self, db_manager) -> bool:
+        """Count a turn routed to another tool (does not refresh the session's age)"""
+        self.idle_turns += 1
+        if db_manager is None or not self.conversation_id:
+            return False
+        return db_manager.record_booking_session_idle_turn(self.conversation_id, self.booking_type)
+    
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Current slot values keyed by booking field"""
+        return {field: self.slots.get(field, {}).get("value") for field in BOOKING_FIELDS[self.booking_type]}
+    
+    @property
+    def filled_fields(self) -> List[str]:
+        """Fields the user has already given"""
+        return [field for field in BOOKING_FIELDS[self.booking_type] if self.slots.get(field, {}).get("filled")]
+    
+    @property
+    def missing_fields(self) -> List[str]:
+        """Required fields that still have no value"""
+        return [field for field in REQUIRED_FIELDS[self.booking_type] if not self.slots.get(field, {}).get("value")]
+    
+    def merge(self, read_slot: SlotReader, query: str, context: str) -> List[str]:
+        """
+        Merge a new message into the state
+        
+        Slots the user has not given yet are parsed from the message and context.
+        Slots already given are only replaced by a confident mention in the message itself,
+        so a one-line context rewrite cannot silently overwrite them.
+        
+        Returns:
+            Fields whose value changed
+        """
+        changed = []
+        
+        for field in BOOKING_FIELDS[self.booking_type]:
+            current = self.slots.get(field)
+            
+            if current and current.get("filled"):
+                value, confidence, found = read_slot(field, query, "")
+                if not found or confidence < OVERRIDE_CONFIDENCE:
+                    continue
+            else:
+                value, confidence, found = read_slot(field, query, context)
+            
+            if current is None or current.get("value") != value or current.get("filled") != found:
+                self.slots[field] = {"value": value, "filled": bool(found)}
+                changed.append(field)
+        
+        self.status = COLLECTING if self.missing_fields else AWAITING_CONFIRMATION
+        return changed
+    
+    def answers_asked(self, locate_slot: SlotLocator, query: str) -> bool:
+        """
+        True when the message is a bare answer to the slots the last booking reply asked for
+        ("0901234567", "ngày 25/12, 3 đêm"): at least one asked slot, other booking slots only as
+        corrections next to it, and nothing else; "thời tiết Đà Lạt ngày 25/12 thế nào?" or
+        "tôi là sinh viên, nên đi đâu chơi" go through intent detection instead
+        """
+        if not self.asked:
+            return False
+        
+        spans = []
+        answered = False
+        for field in BOOKING_FIELDS[self.booking_type]:
+            value, confidence, span = locate_slot(field, query)
+            if span is None or not value:
+                continue
+            if confidence < ANSWER_CONFIDENCE:
+                return False
+            answered = answered or field in self.asked
+            spans.append(span)
+        if not answered:
+            return False
+        
+        # Words outside the answered values
+        leftover = []
+        last_end = 0
+        for start, end in sorted(spans):
+            leftover.append(query[last_end:start])
+            last_end = max(last_end, end)
+        leftover.append(query[last_end:])
+        words = [word for word in re.findall(r"\w+", " ".join(leftover).lower()) if word not in FILLER_WORDS]
+        return len(words) <= MAX_LEFTOVER_WORDS
@@ -0,0 +1,434 @@
+"""
+Cassette - Record / replay layer for external calls (LLM, chat, embeddings, vector index, weather)
+TRAVEL_CASSETTE_MODE=record stores every response under a fingerprint of its request;
+TRAVEL_CASSETTE_MODE=replay answers from the cassette files without touching the network
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMissError(KeyError):
+    """Replay found no recorded response for a request"""
+
+
+class _Recorded:
+    """Attribute bag rebuilt from a recorded response"""
+    
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def fingerprint(kind: str, request: Dict[str, Any]) -> str:
+    """Stable hash of a request (kind + canonical JSON of its arguments)"""
+    canonical = json.dumps({"kind": kind, "request": request}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    One JSONL file per dependency kind in a directory, each line:
+        {"key": ..., "request": {...}, "response": {...}, "latency_ms": ...}
+    - record: calls go through and new fingerprints are appended (the first recording wins)
+    - replay: responses come from the files; a missing fingerprint raises CassetteMissError
+    """
+    
+    def __init__(self, directory: str, mode: str = "replay", replay_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        os.makedirs(directory, exist_ok=True)
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+    
+    def _path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{kind}.jsonl")
+    
+    def _load(self, kind: str) -> Dict[str, Dict[str, Any]]:
+        """Entries of one kind, read from disk on first use"""
+        entries = self._entries.get(kind)
+        if entries is not None:
+            return entries
+        
+        entries = {}
+        path = self._path(kind)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        entries.setdefault(entry["key"], entry)
+        self._entries[kind] = entries
+        return entries
+    
+    def call(self, kind: str, request: Dict[str, Any], fn: Optional[Callable[[], Any]],
+             serialize: Callable[[Any], Dict[str, Any]], deserialize: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Replay or record one call
+        
+        Args:
+            kind: Dependency kind (file name)
+            request: JSON-serializable request arguments (fingerprinted)
+            fn: Performs the real call (unused when replaying)
+            serialize / deserialize: Convert the response to and from JSON
+        """
+        key = fingerprint(kind, request)
+        
+        if self.replaying:
+            entry = self._lookup(kind, key)
+            if self.replay_latency and entry.get("latency_ms"):
+                time.sleep(entry["latency_ms"] / 1000)
+            return deserialize(entry["response"])
+        
+        start = time.perf_counter()
+        response = fn()
+        return self._store(kind, key, request, response, (time.perf_counter() - start) * 1000, serialize)
+    
+    async def acall(self, kind: str, request: Dict[str, Any], fn: Optional[Callable[[], Awaitable[Any]]],
+                    serialize: Callable[[Any], Dict[str, Any]], deserialize: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Async counterpart of call(); fn returns an awaitable (shares entries with sync calls)"""
+        key = fingerprint(kind, request)
+        
+        if self.replaying:
+            entry = self._lookup(kind, key)
+            if self.replay_latency and entry.get("latency_ms"):
+                await asyncio.sleep(entry["latency_ms"] / 1000)
+            return deserialize(entry["response"])
+        
+        start = time.perf_counter()
+        response = await fn()
+        return self._store(kind, key, request, response, (time.perf_counter() - start) * 1000, serialize)
+    
+    def _lookup(self, kind: str, key: str) -> Dict[str, Any]:
+        """Recorded entry for a fingerprint (raises CassetteMissError)"""
+        with self._lock:
+            entry = self._load(kind).get(key)
+            self.stats["hits" if entry else "misses"] += 1
+        if entry is None:
+            raise CassetteMissError(f"No recorded {kind} response for request {key}")
+        return entry
+    
+    def _store(self, kind: str, key: str, request: Dict[str, Any], response: Any, latency_ms: float,
+               serialize: Callable[[Any], Dict[str, Any]]) -> Any:
+        """Append a new recording (the first recording of a fingerprint wins)"""
+        with self._lock:
+            entries = self._load(kind)
+            if key in entries:
+                return response
+            entry = {
+                "key": key,
+                "request": request,
+                "response": serialize(response),
+                "latency_ms": round(latency_ms, 3)
+            }
+            entries[key] = entry
+            self.stats["recorded"] += 1
+            try:
+                with open(self._path(kind), "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            except Exception as e:
+                logger.warning(f"Could not write cassette entry: {e}")
+        return response
+
+
+# --- Serializers for the SDK response shapes the app reads ---
+
+def _usage_dict(usage: Any) -> Dict[str, int]:
+    if usage is None:
+        return {}
+    if isinstance(usage, dict):
+        return dict(usage)
+    data = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0
+    }
+    cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0)
+    if cached_tokens:
+        data["prompt_tokens_details"] = {"cached_tokens": cached_tokens}
+    return data
+
+
+def _serialize_message(message: Any) -> Dict[str, Any]:
+    return {
+        "content": message.content,
+        "usage_metadata": dict(getattr(message, "usage_metadata", None) or {}),
+        "response_metadata": dict(getattr(message, "response_metadata", None) or {})
+    }
+
+
+def _deserialize_message(data: Dict[str, Any]) -> Any:
+    return _Recorded(**data)
+
+
+def _serialize_completion(response: Any) -> Dict[str, Any]:
+    return {
+        "model": getattr(response, "model", None),
+        "contents": [choice.message.content for choice in response.choices],
+        "usage": _usage_dict(getattr(response, "usage", None))
+    }
+
+
+def _deserialize_completion(data: Dict[str, Any]) -> Any:
+    return _Recorded(
+        model=data.get("model"),
+        choices=[
+            _Recorded(index=i, message=_Recorded(role="assistant", content=content), finish_reason="stop")
+            for i, content in enumerate(data["contents"])
+        ],
+        usage=_Recorded(**data.get("usage", {}))
+    )
+
+
+def _serialize_embeddings(response: Any) -> Dict[str, Any]:
+    return {
+        "model": getattr(response, "model", None),
+        "embeddings": [item.embedding for item in response.data],
+        "usage": _usage_dict(getattr(response, "usage", None))
+    }
+
+
+def _deserialize_embeddings(data: Dict[str, Any]) -> Any:
+    return _Recorded(
+        model=data.get("model"),
+        data=[_Recorded(index=i, embedding=embedding) for i, embedding in enumerate(data["embeddings"])],
+        usage=_Recorded(**data.get("usage", {}))
+    )
+
+
+def _serialize_query(results: Any) -> Dict[str, Any]:
+    return {"matches": [
+        {"id": match.get("id"), "score": match.get("score", 0), "metadata": dict(match.get("metadata") or {})}
+        for match in results.get("matches", [])
+    ]}
+
+
+def _serialize_stats(stats: Any) -> Dict[str, Any]:
+    return {
+        "total_vector_count": stats.get("total_vector_count", 0),
+        "dimension": stats.get("dimension", 0),
+        "index_fullness": stats.get("index_fullness", 0)
+    }
+
+
+def _serialize_http(response: Any) -> Dict[str, Any]:
+    return {
+        "status_code": response.status_code,
+        "json": response.json() if response.status_code == 200 else None
+    }
+
+
+def _deserialize_http(data: Dict[str, Any]) -> Any:
+    payload = data.get("json")
+    return _Recorded(status_code=data["status_code"], json=lambda: payload)
+
+
+# --- Wrappers with the same interface as the clients they stand in for ---
+
+class CassetteChatModel:
+    """LangChain-style chat model (invoke / predict)"""
+    
+    def __init__(self, cassette: Cassette, inner: Any, model: str, temperature: float, max_tokens: int = None):
+        self.cassette = cassette
+        self.inner = inner
+        self.model_name = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+    
+    def _request(self, prompt: Any) -> Dict[str, Any]:
+        request = {"model": self.model_name, "temperature": self.temperature, "prompt": str(prompt)}
+        if self.max_tokens:
+            # Only when set, so recordings made without a limit keep their fingerprints
+            request["max_tokens"] = self.max_tokens
+        return request
+    
+    def invoke(self, prompt: Any) -> Any:
+        request = self._request(prompt)
+        return self.cassette.call(
+            "llm", request, lambda: self.inner.invoke(prompt), _serialize_message, _deserialize_message
+        )
+    
+    async def ainvoke(self, prompt: Any) -> Any:
+        request = self._request(prompt)
+        return await self.cassette.acall(
+            "llm", request, lambda: self.inner.ainvoke(prompt), _serialize_message, _deserialize_message
+        )
+    
+    def predict(self, prompt: str) -> str:
+        return self.invoke(prompt).content
+
+
+class CassetteChatClient:
+    """OpenAI-style chat client (chat.completions.create)"""
+    
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.cassette = cassette
+        self.inner = inner
+        self.chat = _Recorded(completions=_Recorded(create=self._create))
+    
+    def _create(self, **kwargs) -> Any:
+        return self.cassette.call(
+            "chat", kwargs, lambda: self.inner.chat.completions.create(**kwargs),
+            _serialize_completion, _deserialize_completion
+        )
+
+
+class CassetteAsyncChatClient:
+    """Async OpenAI-style chat client (await chat.completions.create)"""
+    
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.cassette = cassette
+        self.inner = inner
+        self.chat = _Recorded(completions=_Recorded(create=self._create))
+    
+    async def _create(self, **kwargs) -> Any:
+        return await self.cassette.acall(
+            "chat", kwargs, lambda: self.inner.chat.completions.create(**kwargs),
+            _serialize_completion, _deserialize_completion
+        )
+
+
+class CassetteEmbeddingClient:
+    """OpenAI-style embedding client (embeddings.create)"""
+    
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.cassette = cassette
+        self.inner = inner
+        self.embeddings = _Recorded(create=self._create)
+    
+    def _create(self, **kwargs) -> Any:
+        return self.cassette.call(
+            "embedding", kwargs, lambda: self.inner.embeddings.create(**kwargs),
+            _serialize_embeddings, _deserialize_embeddings
+        )
+
+
+class CassetteAsyncEmbeddingClient:
+    """Async OpenAI-style embedding client (await embeddings.create)"""
+    
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.cassette = cassette
+        self.inner = inner
+        self.embeddings = _Recorded(create=self._create)
+    
+    async def _create(self, **kwargs) -> Any:
+        return await self.cassette.acall(
+            "embedding", kwargs, lambda: self.inner.embeddings.create(**kwargs),
+            _serialize_embeddings, _deserialize_embeddings
+        )
+
+
+class CassetteVectorIndex:
+    """
+    Pinecone-style index: query and describe_index_stats are recorded;
+    upsert and delete pass through when recording and are no-ops when replaying
+    """
+    
+    def __init__(self, cassette: Cassette, inner: Any, index_name: str):
+        self.cassette = cassette
+        self.inner = inner
+        self.index_name = index_name
+    
+    def query(self, vector: List[float], top_k: int = 5, include_metadata: bool = False, **kwargs) -> Any:
+        request = {
+            "index": self.index_name,
+            "vector": [round(value, 6) for value in vector],
+            "top_k": top_k,
+            "include_metadata": include_metadata,
+            **kwargs
+        }
+        return self.cassette.call(
+            "vector", request,
+            lambda: self.inner.query(vector=vector, top_k=top_k, include_metadata=include_metadata, **kwargs),
+            _serialize_query, dict
+        )
+    
+    def describe_index_stats(self, **kwargs) -> Any:
+        return self.cassette.call(
+            "vector", {"index": self.index_name, "describe_index_stats": kwargs},
+            lambda: self.inner.describe_index_stats(**kwargs), _serialize_stats, dict
+        )
+    
+    def upsert(self, vectors: List[Any], **kwargs) -> Any:
+        if self.cassette.replaying:
+            return {"upserted_count": len(vectors)}
+        return self.inner.upsert(vectors, **kwargs)
+    
+    def delete(self, **kwargs) -> Any:
+        if self.cassette.replaying:
+            return {}
+        return self.inner.delete(**kwargs)
+
+
+class CassetteWeatherSession:
+    """requests.Session-style weather session (get); the API key is left out of fingerprints"""
+    
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.cassette = cassette
+        self.inner = inner
+    
+    def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None, **kwargs) -> Any:
+        request = {"url": url, "params": {k: v for k, v in (params or {}).items() if k != "appid"}}
+        return self.cassette.call(
+            "weather", request, lambda: self.inner.get(url, params=params, timeout=timeout, **kwargs),
+            _serialize_http, _deserialize_http
+        )
+
+
+class CassetteAsyncWeatherSession:
+    """httpx.AsyncClient-style weather session (await get); same fingerprints as the sync session"""
+    
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.cassette = cassette
+        self.inner = inner
+    
+    async def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None, **kwargs) -> Any:
+        request = {"url": url, "params": {k: v for k, v in (params or {}).items() if k != "appid"}}
+        return await self.cassette.acall(
+            "weather", request, lambda: self.inner.get(url, params=params, timeout=timeout, **kwargs),
+            _serialize_http, _deserialize_http
+        )
+
+
+_shared_cassette: Optional[Cassette] = None
+_shared_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Process-wide cassette from TRAVEL_CASSETTE_MODE / TRAVEL_CASSETTE_DIR (None when off)"""
+    global _shared_cassette
+    
+    mode = os.getenv("TRAVEL_CASSETTE_MODE", "off").strip().lower() or "off"
+    if mode not in MODES:
+        raise ValueError(f"TRAVEL_CASSETTE_MODE must be one of {MODES}, got {mode!r}")
+    if mode == "off":
+        return None
+    
+    if _shared_cassette is None or _shared_cassette.mode != mode:
+        with _shared_lock:
+            if _shared_cassette is None or _shared_cassette.mode != mode:
+                default_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cassettes")
+                _shared_cassette = Cassette(
+                    os.getenv("TRAVEL_CASSETTE_DIR", default_dir),
+                    mode,
+                    replay_latency=os.getenv("TRAVEL_CASSETTE_LATENCY", "false").lower() == "true"
+                )
+    return _shared_cassette
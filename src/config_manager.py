@@ -5,14 +5,19 @@ Now using SQLite database instead of JSON files
 """
 
 import os
+import time
 from typing import Dict, Any, List
 from datetime import datetime
 import streamlit as st
 from .database_manager import DatabaseManager
+from .stage_models import StageModel, resolve_stage_model
 
 class ConfigManager:
     """Manages all configuration settings for the travel assistant using SQLite database"""
     
+    # How often reload_if_changed() looks for settings saved by another process (seconds)
+    RELOAD_CHECK_INTERVAL = 2.0
+    
     def __init__(self, db_path: str = None):
         # Initialize database manager
         if db_path is None:
@@ -27,6 +32,14 @@ class ConfigManager:
         self._agent_config = None
         self._personality_templates = None
         self._user_preferences = None
+        
+        # Bumped on every change so agents can pick up new settings without being rebuilt
+        self.config_version = 0
+        
+        # Settings saved by another process (the Streamlit app in front of the service, other
+        # service workers) are noticed through the database stamp
+        self._config_stamp = self._read_config_stamp()
+        self._stamp_checked_at = time.monotonic()
     
     @property
     def agent_config(self) -> Dict[str, Any]:
@@ -49,11 +62,36 @@ class ConfigManager:
             self._user_preferences = self.db_manager.get_user_preferences()
         return self._user_preferences
     
+    def _read_config_stamp(self):
+        try:
+            return self.db_manager.get_config_stamp()
+        except Exception as e:
+            print(f"Error reading config stamp: {e}")
+            return None
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Drop the cached settings if another process saved new ones (checked at most every
+        RELOAD_CHECK_INTERVAL seconds); bumps config_version so agents re-apply them
+        """
+        now = time.monotonic()
+        if now - self._stamp_checked_at < self.RELOAD_CHECK_INTERVAL:
+            return False
+        self._stamp_checked_at = now
+        
+        stamp = self._read_config_stamp()
+        if stamp is None or stamp == self._config_stamp:
+            return False
+        self._config_stamp = stamp
+        self.refresh_cache()
+        return True
+    
     def refresh_cache(self):
         """Refresh cached configurations"""
         self._agent_config = None
         self._personality_templates = None
         self._user_preferences = None
+        self.config_version += 1
     
     def save_config(self, config_type: str, config_data: Dict[str, Any]) -> bool:
         """Save configuration to database"""
@@ -62,11 +100,15 @@ class ConfigManager:
                 success = self.db_manager.save_agent_config(config_data)
                 if success:
                     self._agent_config = None  # Clear cache
+                    self._config_stamp = self._read_config_stamp()
+                    self.config_version += 1
                 return success
             elif config_type == 'user':
                 success = self.db_manager.save_user_preferences(config_data)
                 if success:
                     self._user_preferences = None  # Clear cache
+                    self._config_stamp = self._read_config_stamp()
+                    self.config_version += 1
                 return success
             else:
                 return False
@@ -155,10 +197,27 @@ class ConfigManager:
         """Get maximum context messages for rewriting"""
         return self.agent_config.get('context_messages', 5)
     
+    def get_history_token_budget(self) -> int:
+        """Token budget of the conversation history in a prompt"""
+        return self.agent_config.get('history_token_budget', int(os.getenv("HISTORY_TOKEN_BUDGET", "800")))
+    
     def get_temperature(self) -> float:
         """Get LLM temperature setting"""
         return self.agent_config.get('creativity', 0.7)
     
+    def get_stage_model(self, stage: str) -> StageModel:
+        """Deployment, temperature, max_tokens and timeout of a pipeline stage"""
+        return resolve_stage_model(stage, self.agent_config.get('stage_models'), self.get_temperature())
+    
+    def update_stage_models(self, stage_models: Dict[str, Dict[str, Any]]) -> bool:
+        """Store per-stage model overrides ({stage: {deployment, temperature, max_tokens, timeout}})"""
+        current_config = self.agent_config.copy()
+        current_config['stage_models'] = stage_models
+        success = self.save_config('agent', current_config)
+        if success:
+            self.refresh_cache()
+        return success
+    
     def should_show_tool_indicators(self) -> bool:
         """Check if should show tool indicators"""
         return self.agent_config.get('show_tool_info', True)
@@ -312,6 +371,10 @@ class ConfigManager:
         """Get conversation history"""
         return self.db_manager.get_conversation_history(conversation_id, limit)
     
+    def get_recent_conversation_history(self, conversation_id: str, limit: int) -> List[tuple]:
+        """Get the last messages of a conversation (oldest first)"""
+        return self.db_manager.get_recent_conversation_history(conversation_id, limit)
+    
     def save_message(self, conversation_id: str, message_type: str, content: str, metadata: Dict = None) -> bool:
         """Save message to conversation history"""
         return self.db_manager.save_message(conversation_id, message_type, content, metadata)
@@ -62,11 +62,13 @@ class DatabaseManager:
                     show_tool_info BOOLEAN NOT NULL DEFAULT 1,
                     show_context_preview BOOLEAN NOT NULL DEFAULT 1,
                     enable_tts BOOLEAN NOT NULL DEFAULT 0,
+                    stage_models TEXT, -- JSON {stage: {deployment, temperature, max_tokens, timeout}}
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
             
+            
             # Personality Templates Table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS personality_templates (
@@ -195,6 +197,45 @@ class DatabaseManager:
             );
             """)
             
+            # Booking Sessions Table (slot-filling state of an unfinished booking)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS booking_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL,
+                    booking_type TEXT NOT NULL, -- hotel, car
+                    status TEXT NOT NULL DEFAULT 'collecting', -- collecting, awaiting_confirmation, confirmed, cancelled, expired
+                    slots_data TEXT NOT NULL, -- JSON {field: {"value": ..., "filled": bool}}
+                    asked_fields TEXT, -- JSON list of the fields the last booking reply asked for
+                    idle_turns INTEGER DEFAULT 0, -- turns routed to other tools since that reply
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (conversation_id, booking_type)
+                )
+            """)
+            
+            # LLM Usage Table (tokens and estimated cost per model call)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS llm_usage (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT,
+                    turn_id TEXT,
+                    stage TEXT NOT NULL, -- rewrite_context, intent_detection, rag.generation, rag.embedding, ...
+                    tool TEXT, -- RAG, WEATHER, HOTEL, CAR, TRAVEL_PLAN, GENERAL
+                    model TEXT,
+                    prompt_tokens INTEGER DEFAULT 0,
+                    completion_tokens INTEGER DEFAULT 0,
+                    embedding_tokens INTEGER DEFAULT 0,
+                    cached_tokens INTEGER DEFAULT 0, -- prompt tokens served from the provider prompt cache
+                    cost_usd REAL DEFAULT 0,
+                    latency_ms REAL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Columns added after the first release
+            self._add_missing_column(cursor, "agent_config", "stage_models", "TEXT")
+            self._add_missing_column(cursor, "llm_usage", "cached_tokens", "INTEGER DEFAULT 0")
+            
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversation_history_conv_id ON conversation_history (conversation_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversation_history_timestamp ON conversation_history (timestamp)")
@@ -202,9 +243,19 @@ class DatabaseManager:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_hotel_user_date ON book_hotel (user_id, checkin_date)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_travel_plans_user_id ON travel_plans (user_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_travel_plans_created_at ON travel_plans (created_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_booking_sessions_conv_status ON booking_sessions (conversation_id, status)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_conv_id ON llm_usage (conversation_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_created_at ON llm_usage (created_at)")
             
             conn.commit()
     
+    @staticmethod
+    def _add_missing_column(cursor, table: str, column: str, definition: str):
+        """Add a column to a table created by an older version"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in {row["name"] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
     # ===== AGENT CONFIG METHODS =====
     
     def get_agent_config(self) -> Dict[str, Any]:
@@ -215,11 +266,23 @@ class DatabaseManager:
             row = cursor.fetchone()
             
             if row:
-                return dict(row)
+                config = dict(row)
+                config['stage_models'] = json.loads(config.get('stage_models') or '{}')
+                return config
             else:
                 # Return default config if none exists
                 return self._get_default_agent_config()
     
+    def get_config_stamp(self) -> Tuple:
+        """Changes whenever agent config or user preferences are saved (every save inserts a row)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT (SELECT MAX(id) FROM agent_config), (SELECT MAX(updated_at) FROM agent_config),
+                       (SELECT MAX(id) FROM user_preferences), (SELECT MAX(updated_at) FROM user_preferences)
+            """)
+            return tuple(cursor.fetchone())
+    
     def save_agent_config(self, config: Dict[str, Any]) -> bool:
         """Save agent configuration"""
         try:
@@ -229,8 +292,8 @@ class DatabaseManager:
                     INSERT INTO agent_config (
                         agent_name, personality, avatar, tone, emoji_usage,
                         creativity, context_messages, show_tool_info, 
-                        show_context_preview, enable_tts, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        show_context_preview, enable_tts, stage_models, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 """, (
                     config.get('agent_name', 'AI Travel Assistant'),
                     config.get('personality', 'friendly'),
@@ -241,7 +304,8 @@ class DatabaseManager:
                     config.get('context_messages', 5),
                     config.get('show_tool_info', True),
                     config.get('show_context_preview', True),
-                    config.get('enable_tts', False)
+                    config.get('enable_tts', False),
+                    json.dumps(config.get('stage_models') or {})
                 ))
                 conn.commit()
                 return True
@@ -528,6 +592,7 @@ class DatabaseManager:
                 
                 # Delete conversation history first (foreign key constraint)
                 cursor.execute("DELETE FROM conversation_history WHERE conversation_id = ?", (conversation_id,))
+                cursor.execute("DELETE FROM booking_sessions WHERE conversation_id = ?", (conversation_id,))
                 
                 # Delete conversation
                 cursor.execute("DELETE FROM conversations WHERE conversation_id = ? AND user_id = ?", (conversation_id, user_id))
@@ -582,6 +647,181 @@ class DatabaseManager:
             
             return history
     
+    def get_recent_conversation_history(self, conversation_id: str, limit: int) -> List[Tuple[str, str]]:
+        """Last `limit` messages as (message_type, content) tuples, oldest first (reads only the tail)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT message_type, message_content FROM (
+                    SELECT id, message_type, message_content
+                    FROM conversation_history
+                    WHERE conversation_id = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                ) ORDER BY id ASC
+            """, (conversation_id, int(limit)))
+            return [(row['message_type'], row['message_content']) for row in cursor.fetchall()]
+    
+    # ===== BOOKING SESSION METHODS =====
+    
+    def get_booking_session(self, conversation_id: str, booking_type: str = None,
+                            open_only: bool = True) -> Optional[Dict[str, Any]]:
+        """Get the most recently updated booking session of a conversation"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                query = "SELECT * FROM booking_sessions WHERE conversation_id = ?"
+                params = [conversation_id]
+                
+                if booking_type:
+                    query += " AND booking_type = ?"
+                    params.append(booking_type)
+                if open_only:
+                    query += " AND status IN ('collecting', 'awaiting_confirmation')"
+                
+                query += " ORDER BY updated_at DESC, id DESC LIMIT 1"
+                cursor.execute(query, params)
+                row = cursor.fetchone()
+                
+                if row:
+                    return {
+                        "conversation_id": row["conversation_id"],
+                        "booking_type": row["booking_type"],
+                        "status": row["status"],
+                        "slots": json.loads(row["slots_data"]),
+                        "asked": json.loads(row["asked_fields"] or "[]"),
+                        "idle_turns": row["idle_turns"] or 0,
+                        "updated_at": row["updated_at"]
+                    }
+                return None
+        except Exception as e:
+            print(f"Error getting booking session: {e}")
+            return None
+    
+    def save_booking_session(self, conversation_id: str, booking_type: str, status: str,
+                             slots: Dict[str, Any], asked: List[str] = None, idle_turns: int = 0) -> bool:
+        """Create or update the booking session of a conversation"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO booking_sessions (conversation_id, booking_type, status, slots_data, asked_fields, idle_turns)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (conversation_id, booking_type) DO UPDATE SET
+                        status = excluded.status,
+                        slots_data = excluded.slots_data,
+                        asked_fields = excluded.asked_fields,
+                        idle_turns = excluded.idle_turns,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (conversation_id, booking_type, status, json.dumps(slots, ensure_ascii=False),
+                      json.dumps(asked or []), idle_turns))
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Error saving booking session: {e}")
+            return False
+    
+    def record_booking_session_idle_turn(self, conversation_id: str, booking_type: str) -> bool:
+        """Count a turn routed away from an open booking (keeps updated_at, which the expiry is based on)"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE booking_sessions SET idle_turns = COALESCE(idle_turns, 0) + 1
+                    WHERE conversation_id = ? AND booking_type = ?
+                """, (conversation_id, booking_type))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error updating booking session: {e}")
+            return False
+    
+    def update_booking_session_status(self, conversation_id: str, booking_type: str, status: str) -> bool:
+        """Move a booking session to a new status"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE booking_sessions SET status = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE conversation_id = ? AND booking_type = ?
+                """, (status, conversation_id, booking_type))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error updating booking session: {e}")
+            return False
+    
+    # ===== LLM USAGE METHODS =====
+    
+    def save_llm_usage(self, records: List[Dict[str, Any]]) -> bool:
+        """Save a batch of LLM / embedding usage records"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT INTO llm_usage (
+                        conversation_id, turn_id, stage, tool, model, prompt_tokens,
+                        completion_tokens, embedding_tokens, cached_tokens, cost_usd, latency_ms
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(
+                    record.get('conversation_id'),
+                    record.get('turn_id'),
+                    record['stage'],
+                    record.get('tool'),
+                    record.get('model'),
+                    record.get('prompt_tokens', 0),
+                    record.get('completion_tokens', 0),
+                    record.get('embedding_tokens', 0),
+                    record.get('cached_tokens', 0),
+                    record.get('cost_usd', 0.0),
+                    record.get('latency_ms', 0.0)
+                ) for record in records])
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Error saving LLM usage: {e}")
+            return False
+    
+    def get_llm_usage_summary(self, group_by: Optional[str] = 'stage', conversation_id: str = None,
+                              since: str = None) -> List[Dict[str, Any]]:
+        """Aggregate LLM usage by stage, tool, model, conversation_id or turn_id (None for totals)"""
+        if group_by not in (None, 'stage', 'tool', 'model', 'conversation_id', 'turn_id'):
+            raise ValueError(f"Cannot group LLM usage by {group_by}")
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                select_key = f"{group_by} AS key, " if group_by else ""
+                query = f"""
+                    SELECT {select_key}
+                        COUNT(*) AS calls,
+                        COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+                        COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+                        COALESCE(SUM(embedding_tokens), 0) AS embedding_tokens,
+                        COALESCE(SUM(cached_tokens), 0) AS cached_tokens,
+                        COALESCE(SUM(cost_usd), 0) AS cost_usd,
+                        COALESCE(AVG(latency_ms), 0) AS avg_latency_ms,
+                        COALESCE(SUM(latency_ms), 0) AS total_latency_ms
+                    FROM llm_usage
+                    WHERE 1 = 1
+                """
+                params = []
+                
+                if conversation_id:
+                    query += " AND conversation_id = ?"
+                    params.append(conversation_id)
+                if since:
+                    query += " AND created_at >= ?"
+                    params.append(since)
+                if group_by:
+                    query += f" GROUP BY {group_by} ORDER BY cost_usd DESC, total_latency_ms DESC"
+                
+                cursor.execute(query, params)
+                return [dict(row) for row in cursor.fetchall() if row['calls']]
+        except Exception as e:
+            print(f"Error getting LLM usage summary: {e}")
+            return []
+    
     # ===== DEFAULT DATA METHODS =====
     
     def _get_default_agent_config(self) -> Dict[str, Any]:
@@ -596,7 +836,8 @@ class DatabaseManager:
             'context_messages': 5,
             'show_tool_info': True,
             'show_context_preview': True,
-            'enable_tts': False
+            'enable_tts': False,
+            'stage_models': {}
         }
     
     def _get_default_personality_templates(self) -> Dict[str, Any]:
@@ -0,0 +1,165 @@
+"""
+Degradation - Latency-SLO-driven degradation modes for the agent pipeline
+Rolling latency per stage is compared with its SLO; while one is breached the agent steps down a
+ladder of cheaper modes, and it steps back up once latency is back under the SLOs
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Deque, Optional, Tuple
+import logging
+
+from .tracing import percentile
+
+logger = logging.getLogger(__name__)
+
+# Modes, cheapest last; each one keeps the savings of the modes before it
+NORMAL = 0
+LEAN = 1             # no context rewriting (extractive history instead), no suggestions or prefetch
+KEYWORD_ROUTING = 2  # keyword routing instead of the LLM router
+RETRIEVAL_ONLY = 3   # knowledge base passages instead of generated RAG / general answers
+
+MODE_NAMES = {
+    NORMAL: "normal",
+    LEAN: "lean",
+    KEYWORD_ROUTING: "keyword_routing",
+    RETRIEVAL_ONLY: "retrieval_only"
+}
+
+# Stage -> p90 latency objective (ms); "rag" is the whole knowledge base tool, "turn" a whole turn
+DEFAULT_SLOS_MS = {
+    "rewrite_context": 3000.0,
+    "intent_detection": 3000.0,
+    "general_response": 10000.0,
+    "rag": 12000.0,
+    "turn": 20000.0
+}
+
+
+def _slos_from_env() -> Dict[str, float]:
+    """DEFAULT_SLOS_MS with LATENCY_SLO_MS="intent_detection=2000,turn=15000" applied"""
+    slos = dict(DEFAULT_SLOS_MS)
+    for item in os.getenv("LATENCY_SLO_MS", "").split(","):
+        stage, _, value = item.partition("=")
+        try:
+            slos[stage.strip()] = float(value)
+        except ValueError:
+            continue
+    return slos
+
+
+class DegradationController:
+    """
+    Rolling p90 per stage against its SLO
+    - A breach (min_samples in the window over the SLO) steps one mode down, at most every escalate_after seconds
+    - The windows are cleared on every change, so each decision is made on latency of the current mode
+    - With no breach and every measured stage under recovery_ratio * SLO for recover_after seconds,
+      the controller steps one mode back up (the next turns probe the more expensive mode)
+    """
+    
+    def __init__(self, slos_ms: Dict[str, float] = None, window_seconds: float = 120.0, min_samples: int = 5,
+                 escalate_after: float = 15.0, recover_after: float = 60.0, recovery_ratio: float = 0.7,
+                 enabled: bool = True):
+        self.slos_ms = dict(slos_ms or DEFAULT_SLOS_MS)
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.escalate_after = escalate_after
+        self.recover_after = recover_after
+        self.recovery_ratio = recovery_ratio
+        self.enabled = enabled
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {stage: deque() for stage in self.slos_ms}
+        self._mode = NORMAL
+        self._changed_at = time.monotonic()
+        self._reason = ""
+        self._lock = threading.Lock()
+    
+    def observe(self, stage: str, duration_ms: float):
+        """Record the latency of a stage (stages without an SLO are ignored)"""
+        if not self.enabled or stage not in self._samples:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._samples[stage].append((now, duration_ms))
+            self._evaluate(now)
+    
+    @property
+    def mode(self) -> int:
+        """Current mode (re-evaluated, so an idle process recovers too)"""
+        if not self.enabled:
+            return NORMAL
+        with self._lock:
+            self._evaluate(time.monotonic())
+            return self._mode
+    
+    @property
+    def mode_name(self) -> str:
+        return MODE_NAMES[self.mode]
+    
+    def _p90s(self, now: float) -> Dict[str, Tuple[float, int]]:
+        """Stage -> (p90 ms, samples) over the window"""
+        p90s = {}
+        for stage, samples in self._samples.items():
+            while samples and now - samples[0][0] > self.window_seconds:
+                samples.popleft()
+            if samples:
+                p90s[stage] = (percentile([duration for _, duration in samples], 90), len(samples))
+        return p90s
+    
+    def _evaluate(self, now: float):
+        p90s = self._p90s(now)
+        breached = {stage: p90 for stage, (p90, count) in p90s.items()
+                    if count >= self.min_samples and p90 > self.slos_ms[stage]}
+        held = now - self._changed_at
+        
+        if breached and self._mode < RETRIEVAL_ONLY and held >= self.escalate_after:
+            reason = ", ".join(f"{stage} p90 {p90:.0f}ms > SLO {self.slos_ms[stage]:.0f}ms"
+                               for stage, p90 in breached.items())
+            self._change(self._mode + 1, reason, now)
+        elif (not breached and self._mode > NORMAL and held >= self.recover_after
+              and all(p90 <= self.slos_ms[stage] * self.recovery_ratio for stage, (p90, _) in p90s.items())):
+            self._change(self._mode - 1, "latency back under SLO", now)
+    
+    def _change(self, mode: int, reason: str, now: float):
+        logger.warning(f"⚠️ Degradation mode {MODE_NAMES[self._mode]} -> {MODE_NAMES[mode]} ({reason})")
+        self._mode = mode
+        self._reason = reason
+        self._changed_at = now
+        for samples in self._samples.values():
+            samples.clear()
+    
+    def state(self) -> Dict[str, Any]:
+        """Mode, reason and rolling p90 per stage (health endpoints, usage panel)"""
+        mode = self.mode
+        with self._lock:
+            p90s = self._p90s(time.monotonic())
+            return {
+                "mode": MODE_NAMES[mode],
+                "reason": self._reason,
+                "since_seconds": round(time.monotonic() - self._changed_at, 1),
+                "p90_ms": {stage: round(p90, 1) for stage, (p90, _) in p90s.items()},
+                "slo_ms": dict(self.slos_ms)
+            }
+
+
+_shared_controller: Optional[DegradationController] = None
+_shared_lock = threading.Lock()
+
+
+def get_degradation_controller() -> DegradationController:
+    """Get the process-wide degradation controller (DEGRADATION_ENABLED=false keeps every turn normal)"""
+    global _shared_controller
+    
+    if _shared_controller is None:
+        with _shared_lock:
+            if _shared_controller is None:
+                _shared_controller = DegradationController(
+                    slos_ms=_slos_from_env(),
+                    window_seconds=float(os.getenv("DEGRADATION_WINDOW_SECONDS", "120")),
+                    min_samples=int(os.getenv("DEGRADATION_MIN_SAMPLES", "5")),
+                    escalate_after=float(os.getenv("DEGRADATION_ESCALATE_AFTER", "15")),
+                    recover_after=float(os.getenv("DEGRADATION_RECOVER_AFTER", "60")),
+                    enabled=os.getenv("DEGRADATION_ENABLED", "true").lower() == "true"
+                )
+    return _shared_controller
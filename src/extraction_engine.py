@@ -0,0 +1,695 @@
+"""
+Extraction Engine - Precompiled slot extraction for booking and travel plan fields
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, date
+from typing import Dict, Any, List, Optional, Tuple, Callable, Pattern, Iterable
+import threading
+
+
+@dataclass(frozen=True)
+class Slot:
+    """A single extracted field"""
+    name: str
+    value: Any
+    span: Optional[Tuple[int, int]] = None  # Position in "query + ' ' + context"
+    confidence: float = 0.0
+    source: str = "default"  # "query", "context" or "default"
+    
+    @property
+    def found(self) -> bool:
+        """True when the value came from the text rather than a default"""
+        return self.source != "default"
+
+
+@dataclass(frozen=True)
+class PatternRule:
+    """A compiled pattern and the text buffer it runs against"""
+    pattern: Pattern
+    buffer: str = "raw"  # "raw" or "lower"
+    confidence: float = 0.7
+    find_all: bool = False  # Try every match instead of only the first one
+    triggers: Tuple[str, ...] = ()  # Lowercase literals, one of which must occur for a match
+    locator: Optional[Pattern] = None  # Case-sensitive twin run on the lowercase buffer
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    How to extract one field:
+    - rules are tried in order, parse() turns a match into a value (None = keep looking)
+    - keywords are (value, words) pairs checked against the lowercase text afterwards
+    - scan is a custom function for composite fields (raw, lower) -> (value, span)
+    """
+    name: str
+    rules: Tuple[PatternRule, ...] = ()
+    parse: Callable[[Any], Any] = None
+    keywords: Tuple[Tuple[Any, Tuple[str, ...]], ...] = ()
+    keyword_confidence: float = 0.6
+    multi: bool = False
+    scan: Callable[[str, str], Optional[Tuple[Any, Tuple[int, int]]]] = None
+    default: Any = None
+
+
+def _rule(pattern: str, flags: int = 0, buffer: str = "raw", confidence: float = 0.7,
+          find_all: bool = False, triggers: Tuple[str, ...] = ()) -> PatternRule:
+    # Case-insensitive search is much slower than a plain search over the already
+    # lowercased text, so locate matches there and re-match on the raw text
+    locator = None
+    if flags & re.IGNORECASE and buffer == "raw" and not find_all:
+        locator = re.compile(pattern, flags & ~re.IGNORECASE)
+    return PatternRule(re.compile(pattern, flags), buffer, confidence, find_all, triggers, locator)
+
+
+# ==================== PARSERS ====================
+
+def _text_value(min_length: int, title: bool = False) -> Callable[[Any], Optional[str]]:
+    """Parser for free-text captures (first group, stripped)"""
+    def parse(match):
+        value = match.group(1).strip()
+        if title:
+            value = value.title()
+        return value if len(value) > min_length else None
+    return parse
+
+
+def _int_value(match) -> Optional[int]:
+    try:
+        return int(match.group(1))
+    except (TypeError, ValueError):
+        return None
+
+
+def _phone_value(match) -> Optional[str]:
+    phone = re.sub(r'[^\d+]', '', match.group(1))
+    return phone if len(phone) >= 9 else None
+
+
+def _email_value(match) -> str:
+    return match.group()
+
+
+def _date_value(match) -> Optional[str]:
+    try:
+        groups = match.groups()
+        if len(groups) == 3:
+            day, month, year = groups
+        else:
+            day, month = groups
+            year = datetime.now().year
+        return datetime(int(year), int(month), int(day)).strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def _travel_date_value(match) -> Optional[Dict[str, Any]]:
+    start_date = _date_value(match)
+    if start_date is None:
+        return None
+    return {'start_date': start_date, 'flexible': False}
+
+
+def _time_value(match) -> Optional[str]:
+    try:
+        hour = int(match.group(1))
+        minute = int(match.group(2)) if match.group(2) else 0
+    except (TypeError, ValueError):
+        return None
+    if 0 <= hour <= 23 and 0 <= minute <= 59:
+        return f"{hour:02d}:{minute:02d}"
+    return None
+
+
+def _duration_value(match) -> Optional[Dict[str, Any]]:
+    try:
+        number = int(match.group(1))
+    except (TypeError, ValueError):
+        return None
+    
+    matched = match.group().lower()
+    if 'ngày' in matched or 'day' in matched:
+        return {'total_days': number, 'unit': 'days'}
+    elif 'tuần' in matched or 'week' in matched:
+        return {'total_days': number * 7, 'unit': 'weeks'}
+    elif 'tháng' in matched or 'month' in matched:
+        return {'total_days': number * 30, 'unit': 'months'}
+    return None
+
+
+def _participants_value(match) -> Optional[Dict[str, Any]]:
+    try:
+        number = int(match.group(1))
+    except (TypeError, ValueError):
+        return None
+    
+    matched = match.group().lower()
+    if 'adult' in matched or 'người lớn' in matched:
+        kind = 'adults'
+    elif 'children' in matched or 'trẻ em' in matched:
+        kind = 'children'
+    elif 'gia đình' in matched or 'family' in matched:
+        kind = 'family'
+    else:
+        kind = 'total'
+    return {'kind': kind, 'count': number}
+
+
+def _budget_value(match) -> Optional[Dict[str, Any]]:
+    try:
+        amount = int(match.group(1).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+    
+    matched = match.group().lower()
+    if 'triệu' in matched or 'million' in matched:
+        return {'amount': amount * 1000000, 'currency': 'VND'}
+    elif 'nghìn' in matched or 'thousand' in matched:
+        return {'amount': amount * 1000, 'currency': 'VND'}
+    elif 'usd' in matched or '$' in matched:
+        return {'amount': amount, 'currency': 'USD'}
+    return {'amount': amount, 'currency': 'VND'}
+
+
+def _today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def _tomorrow() -> str:
+    return (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+# ==================== COMPOSITE SCANNERS ====================
+
+def _find_any(text: str, words: Iterable[str]) -> Optional[Tuple[int, int]]:
+    """Span of the first word (in list order) found in text"""
+    for word in words:
+        index = text.find(word)
+        if index != -1:
+            return (index, index + len(word))
+    return None
+
+
+def _scan_visa(raw: str, lower: str):
+    span = _find_any(lower, ['visa', 'thị thực', 'hộ chiếu', 'passport'])
+    if span is None:
+        return None
+    
+    if _find_any(lower, ['có sẵn', 'đã có', 'ready']):
+        status = 'ready'
+    elif _find_any(lower, ['cần xin', 'chưa có', 'need to apply']):
+        status = 'need_to_apply'
+    else:
+        status = 'unknown'
+    return {'needs_visa': True, 'status': status}, span
+
+
+def _scan_health(raw: str, lower: str):
+    health_info = {}
+    span = _find_any(lower, ['vaccine', 'vắc xin', 'tiêm chủng', 'y tế', 'health'])
+    if span is not None:
+        health_info['needs_vaccination'] = True
+        if _find_any(lower, ['đã tiêm', 'completed', 'done']):
+            health_info['vaccination_status'] = 'completed'
+        else:
+            health_info['vaccination_status'] = 'needed'
+    
+    # Check for special health needs
+    special_span = _find_any(lower, ['dị ứng', 'allergy', 'bệnh', 'illness'])
+    if special_span is not None:
+        health_info['special_needs'] = True
+        span = span or special_span
+    
+    return (health_info, span) if health_info else None
+
+
+def _scan_meals(raw: str, lower: str):
+    span = _find_any(lower, ['ăn chay', 'vegetarian'])
+    if span is not None:
+        return {'vegetarian': True}, span
+    span = _find_any(lower, ['halal'])
+    if span is not None:
+        return {'halal': True}, span
+    return None
+
+
+# ==================== FIELD SPECS ====================
+
+_I = re.IGNORECASE
+
+FIELD_SPECS: Tuple[FieldSpec, ...] = (
+    # ---------- Customer ----------
+    FieldSpec(
+        name="customer_name",
+        rules=(
+            _rule(r'(?:tên tôi là|tôi tên|tôi là|my name is)\s+([A-Za-zÀ-ỹ\s]+)', _I, "lower", 0.9, triggers=("tên tôi là", "tôi tên", "tôi là", "my name is")),
+            _rule(r'tên:\s*([A-Za-zÀ-ỹ\s]+)', _I, "lower", 0.9, triggers=("tên:",)),
+            _rule(r'họ tên:\s*([A-Za-zÀ-ỹ\s]+)', _I, "lower", 0.9, triggers=("họ tên:",)),
+        ),
+        parse=_text_value(1, title=True),
+        default=""
+    ),
+    FieldSpec(
+        name="customer_phone",
+        rules=(
+            _rule(r'(?:sđt|số điện thoại|phone|điện thoại)[:=\s]*([+84|84|0]?[3-9]\d{8,9})', confidence=0.95, find_all=True, triggers=("sđt", "số điện thoại", "phone", "điện thoại")),
+            _rule(r'([+84|84|0]?[3-9]\d{8,9})', confidence=0.7, find_all=True),
+        ),
+        parse=_phone_value,
+        default=""
+    ),
+    FieldSpec(
+        name="customer_email",
+        rules=(
+            _rule(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', confidence=0.95, triggers=("@",)),
+        ),
+        parse=_email_value,
+        default=""
+    ),
+    
+    # ---------- Hotel ----------
+    FieldSpec(
+        name="hotel_name",
+        rules=(
+            _rule(r'khách sạn\s+([A-Za-zÀ-ỹ\s]+)', _I, "lower", 0.8, triggers=("khách sạn",)),
+            _rule(r'hotel\s+([A-Za-z\s]+)', _I, "lower", 0.8, triggers=("hotel",)),
+            _rule(r'(?:tại|ở)\s+([A-Za-zÀ-ỹ\s]*(?:hotel|resort|inn)[A-Za-zÀ-ỹ\s]*)', _I, "lower", 0.6, triggers=("hotel", "resort", "inn")),
+        ),
+        parse=_text_value(2, title=True),
+        default=""
+    ),
+    FieldSpec(
+        name="check_in_date",
+        rules=(
+            _rule(r'ngày\s+(\d{1,2})/(\d{1,2})/(\d{4})', confidence=0.95, triggers=("ngày",)),
+            _rule(r'(\d{1,2})/(\d{1,2})/(\d{4})', confidence=0.85, triggers=("/",)),
+            _rule(r'ngày\s+(\d{1,2})\s+tháng\s+(\d{1,2})', confidence=0.8, triggers=("tháng",)),
+        ),
+        parse=_date_value,
+        keywords=(
+            (_today, ("hôm nay", "today")),
+            (_tomorrow, ("ngày mai", "tomorrow")),
+        ),
+        keyword_confidence=0.7,
+        default=""
+    ),
+    FieldSpec(
+        name="nights",
+        rules=(
+            _rule(r'(\d+)\s*đêm', _I, confidence=0.9, triggers=("đêm",)),
+            _rule(r'(\d+)\s*nights?', _I, confidence=0.9, triggers=("night",)),
+            _rule(r'(\d+)\s*ngày.*?(\d+)\s*đêm', _I, confidence=0.6, triggers=("đêm",)),
+        ),
+        parse=_int_value,
+        default=1
+    ),
+    FieldSpec(
+        name="guests",
+        rules=(
+            _rule(r'(\d+)\s*(?:người|khách|guests?)', _I, confidence=0.85, triggers=("người", "khách", "guest")),
+            _rule(r'(?:cho|for)\s*(\d+)', _I, confidence=0.5, triggers=("cho", "for")),
+        ),
+        parse=_int_value,
+        default=2
+    ),
+    FieldSpec(
+        name="rooms",
+        rules=(
+            _rule(r'(\d+)\s*phòng', _I, confidence=0.9, triggers=("phòng",)),
+            _rule(r'(\d+)\s*rooms?', _I, confidence=0.9, triggers=("room",)),
+        ),
+        parse=_int_value,
+        default=1
+    ),
+    FieldSpec(
+        name="room_type",
+        keywords=(
+            ("standard", ("standard", "tiêu chuẩn")),
+            ("deluxe", ("deluxe", "cao cấp")),
+            ("suite", ("suite", "hạng sang")),
+            ("family", ("family", "gia đình")),
+            ("single", ("single", "đơn")),
+            ("double", ("double", "đôi")),
+            ("twin", ("twin", "sinh đôi")),
+        ),
+        default="standard"
+    ),
+    FieldSpec(
+        name="special_requests",
+        rules=(
+            _rule(r'(?:yêu cầu|requests?|notes?|ghi chú)[:=\s]*(.+)', _I, confidence=0.7, triggers=("yêu cầu", "request", "note", "ghi chú")),
+            _rule(r'(?:đặc biệt|special)[:=\s]*(.+)', _I, confidence=0.6, triggers=("đặc biệt", "special")),
+        ),
+        parse=_text_value(5),
+        default=""
+    ),
+    
+    # ---------- Car ----------
+    FieldSpec(
+        name="pickup_location",
+        rules=(
+            _rule(r'(?:đón tại|pickup at|from)\s+([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.85, triggers=("đón tại", "pickup at", "from")),
+            _rule(r'từ\s+([A-Za-zÀ-ỹ\s,]+)\s+(?:đến|to)', _I, confidence=0.8, triggers=("từ",)),
+            _rule(r'điểm đón:\s*([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.9, triggers=("điểm đón:",)),
+        ),
+        parse=_text_value(2),
+        default=""
+    ),
+    FieldSpec(
+        name="destination",
+        rules=(
+            _rule(r'(?:đến|to|tới)\s+([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.75, triggers=("đến", "to", "tới")),
+            _rule(r'điểm đến:\s*([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.9, triggers=("điểm đến:",)),
+            _rule(r'(?:về|return to)\s+([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.6, triggers=("về", "return to")),
+        ),
+        parse=_text_value(2),
+        default=""
+    ),
+    FieldSpec(
+        name="pickup_time",
+        rules=(
+            _rule(r'lúc\s+(\d{1,2}):(\d{2})', confidence=0.9, triggers=("lúc",)),
+            _rule(r'(\d{1,2}):(\d{2})', confidence=0.8, triggers=(":",)),
+            _rule(r'(\d{1,2})\s*giờ\s*(\d{2})?', confidence=0.75, triggers=("giờ",)),
+            _rule(r'(\d{1,2})h(\d{2})?', confidence=0.6, triggers=("h",)),
+        ),
+        parse=_time_value,
+        default=""
+    ),
+    FieldSpec(
+        name="car_type",
+        keywords=(
+            ("4 chỗ", ("4 chỗ", "sedan", "4 seats")),
+            ("7 chỗ", ("7 chỗ", "suv", "7 seats")),
+            ("16 chỗ", ("16 chỗ", "minibus", "16 seats")),
+            ("taxi", ("taxi",)),
+            ("grab", ("grab",)),
+            ("luxury", ("luxury", "sang trọng")),
+        ),
+        keyword_confidence=0.8,
+        default="4 chỗ"
+    ),
+    FieldSpec(
+        name="seats",
+        rules=(
+            _rule(r'(\d+)\s*chỗ', _I, confidence=0.9, triggers=("chỗ",)),
+            _rule(r'(\d+)\s*seats?', _I, confidence=0.9, triggers=("seat",)),
+        ),
+        parse=_int_value,
+        default=4
+    ),
+    
+    # ---------- Travel plan ----------
+    FieldSpec(
+        name="travel_destination",
+        rules=(
+            _rule(r'(?:đến|tới|du lịch|ghé)\s+([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.75, triggers=("đến", "tới", "du lịch", "ghé")),
+            _rule(r'điểm đến:\s*([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.9, triggers=("điểm đến:",)),
+            _rule(r'(?:ở|tại)\s+([A-Za-zÀ-ỹ\s,]+)', _I, confidence=0.5, triggers=("ở", "tại")),
+        ),
+        parse=_text_value(2)
+    ),
+    FieldSpec(
+        name="travel_dates",
+        rules=(
+            _rule(r'ngày\s+(\d{1,2})/(\d{1,2})/(\d{4})', confidence=0.95, triggers=("ngày",)),
+            _rule(r'(\d{1,2})/(\d{1,2})/(\d{4})', confidence=0.85, triggers=("/",)),
+            _rule(r'ngày\s+(\d{1,2})\s+tháng\s+(\d{1,2})\s+năm\s+(\d{4})', confidence=0.9, triggers=("năm",)),
+        ),
+        parse=_travel_date_value,
+        keywords=(
+            ({'flexible': True, 'timeframe': "tương lai gần"}, ("tuần sau", "tháng sau", "sắp tới")),
+        ),
+        keyword_confidence=0.4
+    ),
+    FieldSpec(
+        name="travel_duration",
+        rules=(
+            _rule(r'(\d+)\s*ngày', _I, confidence=0.85, triggers=("ngày",)),
+            _rule(r'(\d+)\s*tuần', _I, confidence=0.85, triggers=("tuần",)),
+            _rule(r'(\d+)\s*tháng', _I, confidence=0.85, triggers=("tháng",)),
+            _rule(r'(\d+)\s*days?', _I, confidence=0.85, triggers=("day",)),
+            _rule(r'(\d+)\s*weeks?', _I, confidence=0.85, triggers=("week",)),
+            _rule(r'(\d+)\s*months?', _I, confidence=0.85, triggers=("month",)),
+        ),
+        parse=_duration_value
+    ),
+    FieldSpec(
+        name="travel_participants",
+        rules=(
+            _rule(r'(\d+)\s*(?:người|khách|people)', _I, confidence=0.85, triggers=("người", "khách", "people")),
+            _rule(r'(?:gia đình|family)\s*(\d+)\s*(?:người|members)', _I, confidence=0.85, triggers=("gia đình", "family")),
+            _rule(r'(\d+)\s*(?:adults?|người lớn)', _I, confidence=0.9, triggers=("adult", "người lớn")),
+            _rule(r'(\d+)\s*(?:children|trẻ em)', _I, confidence=0.9, triggers=("children", "trẻ em")),
+        ),
+        parse=_participants_value
+    ),
+    FieldSpec(
+        name="participant_count",
+        rules=(
+            _rule(r'(\d+)\s*(?:người|khách)', confidence=0.85, triggers=("người", "khách")),
+        ),
+        parse=_int_value,
+        default=1
+    ),
+    FieldSpec(
+        name="travel_budget",
+        rules=(
+            _rule(r'(?:ngân sách|budget)\s*[:=]\s*([0-9,]+)\s*(?:đồng|vnd|usd|\$)', _I, confidence=0.95, triggers=("ngân sách", "budget")),
+            _rule(r'([0-9,]+)\s*(?:triệu|million)', _I, confidence=0.8, triggers=("triệu", "million")),
+            _rule(r'([0-9,]+)\s*(?:nghìn|thousand)', _I, confidence=0.8, triggers=("nghìn", "thousand")),
+        ),
+        parse=_budget_value
+    ),
+    FieldSpec(name="visa_requirements", scan=_scan_visa),
+    FieldSpec(name="health_requirements", scan=_scan_health),
+    FieldSpec(
+        name="travel_style",
+        keywords=(
+            ('budget', ('tiết kiệm', 'rẻ', 'budget', 'cheap')),
+            ('luxury', ('sang trọng', 'cao cấp', 'luxury', 'premium')),
+            ('adventure', ('phiêu lưu', 'adventure', 'thám hiểm')),
+            ('cultural', ('văn hóa', 'culture', 'lịch sử')),
+            ('relaxation', ('thư giãn', 'nghỉ dưỡng', 'relaxation')),
+            ('family', ('gia đình', 'family')),
+        )
+    ),
+    FieldSpec(
+        name="activities",
+        keywords=(
+            ('sightseeing', ('tham quan', 'ngắm cảnh', 'sightseeing')),
+            ('food_tour', ('ẩm thực', 'food', 'đặc sản')),
+            ('shopping', ('mua sắm', 'shopping')),
+            ('photography', ('chụp ảnh', 'photography')),
+            ('outdoor', ('ngoài trời', 'outdoor', 'trekking')),
+            ('beach', ('biển', 'beach', 'bơi lội')),
+            ('cultural', ('văn hóa', 'cultural', 'bảo tàng', 'museum')),
+            ('nightlife', ('đêm', 'nightlife', 'bar')),
+        ),
+        multi=True,
+        default=()
+    ),
+    FieldSpec(
+        name="accommodation_type",
+        keywords=(
+            ('hotel', ('khách sạn', 'hotel')),
+            ('resort', ('resort',)),
+            ('homestay', ('homestay',)),
+            ('hostel', ('hostel',)),
+        )
+    ),
+    FieldSpec(
+        name="transportation",
+        keywords=(
+            ('flight', ('máy bay', 'flight', 'fly')),
+            ('train', ('tàu', 'train')),
+            ('bus', ('xe buýt', 'bus')),
+            ('car', ('xe hơi', 'car', 'ô tô')),
+        )
+    ),
+    FieldSpec(name="meals", scan=_scan_meals),
+)
+
+
+class _TextPass:
+    """Normalized buffers for one (query, context) plus the slots computed from them"""
+    
+    __slots__ = ("buffers", "query_end", "slots", "aligned", "_present")
+    
+    def __init__(self, query: str, context: str):
+        raw = query + " " + context
+        lower = raw.lower()
+        self.buffers = {"raw": raw, "lower": lower}
+        self.query_end = len(query)
+        self.slots: Dict[str, Slot] = {}
+        # Offsets match between raw and lower text (false only for rare characters like "İ")
+        self.aligned = len(raw) == len(lower)
+        self._present: Dict[str, bool] = {}
+    
+    def has_any(self, literals: Tuple[str, ...]) -> bool:
+        """True if any literal occurs in the lowercase text (memoized per literal)"""
+        lower = self.buffers["lower"]
+        for literal in literals:
+            present = self._present.get(literal)
+            if present is None:
+                present = self._present[literal] = literal in lower
+            if present:
+                return True
+        return False
+
+
+class ExtractionEngine:
+    """
+    Extracts booking / travel plan slots from a query and its context:
+    - Text is concatenated and lowercased once per (query, context)
+    - All field patterns are compiled once at import time
+    - Each field is computed at most once per (query, context), so the per-field
+      wrappers in the agent share a single pass over the text
+    """
+    
+    def __init__(self, specs: Iterable[FieldSpec] = FIELD_SPECS, cache_size: int = 256):
+        self.specs = {spec.name: spec for spec in specs}
+        self.cache_size = cache_size
+        self._passes: "OrderedDict[Tuple[str, str, date], _TextPass]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def fields(self) -> List[str]:
+        return list(self.specs.keys())
+    
+    def extract(self, query: str, context: str = "", fields: Iterable[str] = None) -> Dict[str, Slot]:
+        """
+        Extract slots from query + context
+        
+        Args:
+            query: Current user message
+            context: Rewritten conversation context
+            fields: Field names to extract (default: all fields)
+        
+        Returns:
+            Dict mapping field name to Slot (defaults are returned with source="default")
+        """
+        names = list(fields) if fields is not None else list(self.specs.keys())
+        unknown = [name for name in names if name not in self.specs]
+        if unknown:
+            raise KeyError(f"Unknown extraction fields: {unknown}")
+        
+        text_pass = self._get_pass(query or "", context or "")
+        return {name: self._get_slot(text_pass, name) for name in names}
+    
+    def get(self, name: str, query: str, context: str = "") -> Slot:
+        """Extract a single slot (reuses the cached pass for this query/context)"""
+        if name not in self.specs:
+            raise KeyError(f"Unknown extraction field: {name}")
+        return self._get_slot(self._get_pass(query or "", context or ""), name)
+    
+    def clear_cache(self):
+        with self._lock:
+            self._passes.clear()
+    
+    def _get_pass(self, query: str, context: str) -> _TextPass:
+        # Relative dates ("hôm nay", "ngày mai") depend on the current day
+        key = (query, context, date.today())
+        
+        with self._lock:
+            text_pass = self._passes.get(key)
+            if text_pass is not None:
+                self._passes.move_to_end(key)
+                return text_pass
+        
+        text_pass = _TextPass(query, context)
+        
+        with self._lock:
+            if self.cache_size > 0:
+                text_pass = self._passes.setdefault(key, text_pass)
+                self._passes.move_to_end(key)
+                while len(self._passes) > self.cache_size:
+                    self._passes.popitem(last=False)
+        return text_pass
+    
+    def _get_slot(self, text_pass: _TextPass, name: str) -> Slot:
+        slot = text_pass.slots.get(name)
+        if slot is None:
+            slot = self._extract_field(self.specs[name], text_pass)
+            text_pass.slots[name] = slot
+        return slot
+    
+    def _extract_field(self, spec: FieldSpec, text_pass: _TextPass) -> Slot:
+        buffers = text_pass.buffers
+        query_end = text_pass.query_end
+        
+        # 1. Patterns, in priority order
+        for rule in spec.rules:
+            # Cheap substring check before running the regex over the whole text
+            if rule.triggers and not text_pass.has_any(rule.triggers):
+                continue
+            for match in self._matches(rule, text_pass):
+                value = spec.parse(match)
+                if value is not None:
+                    return self._slot(spec.name, value, match.span(), rule.confidence, query_end)
+        
+        # 2. Composite scanners
+        if spec.scan is not None:
+            result = spec.scan(buffers["raw"], buffers["lower"])
+            if result is not None:
+                value, span = result
+                return self._slot(spec.name, value, span, 0.7, query_end)
+        
+        # 3. Keyword tables
+        if spec.keywords:
+            lower = buffers["lower"]
+            found = []
+            first_span = None
+            for value, words in spec.keywords:
+                span = _find_any(lower, words)
+                if span is None:
+                    continue
+                value = value() if callable(value) else value
+                if not spec.multi:
+                    return self._slot(spec.name, value, span, spec.keyword_confidence, query_end)
+                found.append(value)
+                first_span = first_span or span
+            if found:
+                return self._slot(spec.name, tuple(found), first_span, spec.keyword_confidence, query_end)
+        
+        return Slot(spec.name, spec.default)
+    
+    @staticmethod
+    def _matches(rule: PatternRule, text_pass: _TextPass) -> Iterable[Any]:
+        text = text_pass.buffers[rule.buffer]
+        
+        if rule.find_all:
+            return rule.pattern.finditer(text)
+        
+        if rule.locator is not None and text_pass.aligned:
+            located = rule.locator.search(text_pass.buffers["lower"])
+            if located is None:
+                return []
+            match = rule.pattern.match(text, located.start())
+            if match is not None:
+                return [match]
+        
+        match = rule.pattern.search(text)
+        return [match] if match else []
+    
+    @staticmethod
+    def _slot(name: str, value: Any, span: Tuple[int, int], confidence: float, query_end: int) -> Slot:
+        source = "query" if span[0] < query_end else "context"
+        return Slot(name, value, span, confidence, source)
+
+
+_shared_engine: Optional[ExtractionEngine] = None
+_shared_lock = threading.Lock()
+
+
+def get_extraction_engine() -> ExtractionEngine:
+    """Get the process-wide extraction engine (created on first use)"""
+    global _shared_engine
+    
+    if _shared_engine is None:
+        with _shared_lock:
+            if _shared_engine is None:
+                _shared_engine = ExtractionEngine()
+    return _shared_engine
@@ -0,0 +1,396 @@
+"""
+Gazetteer - Vietnamese provinces, cities and landmarks with an Aho-Corasick matcher
+"""
+
+import threading
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Iterable
+
+
+# Sub-regions used by the travel domain, grouped into the three main regions
+SUBREGIONS = {
+    "Tây Bắc": "Miền Bắc",
+    "Đông Bắc": "Miền Bắc",
+    "Đồng bằng sông Hồng": "Miền Bắc",
+    "Bắc Trung Bộ": "Miền Trung",
+    "Nam Trung Bộ": "Miền Trung",
+    "Tây Nguyên": "Miền Trung",
+    "Đông Nam Bộ": "Miền Nam",
+    "Đồng bằng sông Cửu Long": "Miền Nam",
+}
+
+# (name, subregion, lat, lon, aliases) - coordinates are the provincial capital
+PROVINCES = [
+    # Miền Bắc
+    ("Hà Nội", "Đồng bằng sông Hồng", 21.0285, 105.8542, ("hanoi", "thủ đô hà nội")),
+    ("Hà Giang", "Đông Bắc", 22.8233, 104.9836, ()),
+    ("Cao Bằng", "Đông Bắc", 22.6657, 106.2570, ()),
+    ("Bắc Kạn", "Đông Bắc", 22.1470, 105.8348, ("bắc cạn",)),
+    ("Tuyên Quang", "Đông Bắc", 21.8237, 105.2140, ()),
+    ("Lào Cai", "Tây Bắc", 22.4809, 103.9755, ()),
+    ("Điện Biên", "Tây Bắc", 21.3860, 103.0230, ("điện biên phủ",)),
+    ("Lai Châu", "Tây Bắc", 22.3964, 103.4582, ()),
+    ("Sơn La", "Tây Bắc", 21.3270, 103.9141, ()),
+    ("Yên Bái", "Tây Bắc", 21.7229, 104.9113, ()),
+    ("Hòa Bình", "Tây Bắc", 20.8133, 105.3383, ("hoà bình",)),
+    ("Thái Nguyên", "Đông Bắc", 21.5942, 105.8482, ()),
+    ("Lạng Sơn", "Đông Bắc", 21.8537, 106.7615, ("lang sơn",)),
+    ("Quảng Ninh", "Đông Bắc", 20.9712, 107.0448, ()),
+    ("Bắc Giang", "Đông Bắc", 21.2731, 106.1946, ()),
+    ("Phú Thọ", "Đông Bắc", 21.3227, 105.4020, ()),
+    ("Vĩnh Phúc", "Đồng bằng sông Hồng", 21.3089, 105.6049, ()),
+    ("Bắc Ninh", "Đồng bằng sông Hồng", 21.1861, 106.0763, ()),
+    ("Hải Dương", "Đồng bằng sông Hồng", 20.9373, 106.3146, ()),
+    ("Hải Phòng", "Đồng bằng sông Hồng", 20.8449, 106.6881, ("haiphong",)),
+    ("Hưng Yên", "Đồng bằng sông Hồng", 20.6464, 106.0511, ()),
+    ("Thái Bình", "Đồng bằng sông Hồng", 20.4463, 106.3366, ()),
+    ("Hà Nam", "Đồng bằng sông Hồng", 20.5411, 105.9139, ()),
+    ("Nam Định", "Đồng bằng sông Hồng", 20.4200, 106.1683, ()),
+    ("Ninh Bình", "Đồng bằng sông Hồng", 20.2506, 105.9745, ()),
+    # Miền Trung
+    ("Thanh Hóa", "Bắc Trung Bộ", 19.8067, 105.7852, ("thanh hoá",)),
+    ("Nghệ An", "Bắc Trung Bộ", 18.6796, 105.6813, ()),
+    ("Hà Tĩnh", "Bắc Trung Bộ", 18.3428, 105.9057, ()),
+    ("Quảng Bình", "Bắc Trung Bộ", 17.4689, 106.6223, ()),
+    ("Quảng Trị", "Bắc Trung Bộ", 16.8163, 107.1003, ("quảng trì",)),
+    ("Thừa Thiên Huế", "Bắc Trung Bộ", 16.4637, 107.5909, ("thừa thiên - huế",)),
+    ("Đà Nẵng", "Nam Trung Bộ", 16.0544, 108.2022, ("danang",)),
+    ("Quảng Nam", "Nam Trung Bộ", 15.5736, 108.4740, ()),
+    ("Quảng Ngãi", "Nam Trung Bộ", 15.1214, 108.8044, ()),
+    ("Bình Định", "Nam Trung Bộ", 13.7829, 109.2196, ()),
+    ("Phú Yên", "Nam Trung Bộ", 13.0882, 109.0929, ()),
+    ("Khánh Hòa", "Nam Trung Bộ", 12.2388, 109.1967, ("khánh hoà",)),
+    ("Ninh Thuận", "Nam Trung Bộ", 11.5646, 108.9886, ()),
+    ("Bình Thuận", "Nam Trung Bộ", 10.9289, 108.1021, ()),
+    ("Kon Tum", "Tây Nguyên", 14.3545, 108.0076, ("kontum",)),
+    ("Gia Lai", "Tây Nguyên", 13.9833, 108.0000, ()),
+    ("Đắk Lắk", "Tây Nguyên", 12.6667, 108.0500, ("đắc lắc", "daklak")),
+    ("Đắk Nông", "Tây Nguyên", 12.0045, 107.6907, ("đắc nông",)),
+    ("Lâm Đồng", "Tây Nguyên", 11.9404, 108.4583, ()),
+    # Miền Nam
+    ("Hồ Chí Minh", "Đông Nam Bộ", 10.7769, 106.7009,
+     ("thành phố hồ chí minh", "tp hồ chí minh", "tp. hồ chí minh", "tp hcm", "tp.hcm", "tphcm",
+      "hcm", "sài gòn", "saigon")),
+    ("Bình Phước", "Đông Nam Bộ", 11.5349, 106.8832, ()),
+    ("Tây Ninh", "Đông Nam Bộ", 11.3100, 106.0983, ()),
+    ("Bình Dương", "Đông Nam Bộ", 10.9804, 106.6519, ()),
+    ("Đồng Nai", "Đông Nam Bộ", 10.9574, 106.8427, ()),
+    ("Bà Rịa - Vũng Tàu", "Đông Nam Bộ", 10.4963, 107.1684,
+     ("bà rịa vũng tàu", "bà rịa-vũng tàu", "bà rịa vũng tầu", "brvt")),
+    ("Long An", "Đồng bằng sông Cửu Long", 10.5360, 106.4138, ()),
+    ("Tiền Giang", "Đồng bằng sông Cửu Long", 10.3600, 106.3600, ()),
+    ("Bến Tre", "Đồng bằng sông Cửu Long", 10.2415, 106.3759, ()),
+    ("Trà Vinh", "Đồng bằng sông Cửu Long", 9.9347, 106.3453, ()),
+    ("Vĩnh Long", "Đồng bằng sông Cửu Long", 10.2537, 105.9722, ()),
+    ("Đồng Tháp", "Đồng bằng sông Cửu Long", 10.4600, 105.6330, ()),
+    ("An Giang", "Đồng bằng sông Cửu Long", 10.3866, 105.4352, ()),
+    ("Kiên Giang", "Đồng bằng sông Cửu Long", 10.0125, 105.0809, ()),
+    ("Cần Thơ", "Đồng bằng sông Cửu Long", 10.0452, 105.7469, ("cantho",)),
+    ("Hậu Giang", "Đồng bằng sông Cửu Long", 9.7845, 105.4701, ()),
+    ("Sóc Trăng", "Đồng bằng sông Cửu Long", 9.6025, 105.9739, ()),
+    ("Bạc Liêu", "Đồng bằng sông Cửu Long", 9.2940, 105.7216, ()),
+    ("Cà Mau", "Đồng bằng sông Cửu Long", 9.1769, 105.1524, ()),
+]
+
+# (name, province, lat, lon, aliases)
+CITIES = [
+    ("Sapa", "Lào Cai", 22.3364, 103.8438, ("sa pa",)),
+    ("Hạ Long", "Quảng Ninh", 20.9517, 107.0800, ("halong",)),
+    ("Huế", "Thừa Thiên Huế", 16.4637, 107.5909, ("cố đô huế", "thành phố huế")),
+    ("Hội An", "Quảng Nam", 15.8801, 108.3380, ("phố cổ hội an", "hoian")),
+    ("Nha Trang", "Khánh Hòa", 12.2388, 109.1967, ("nhatrang",)),
+    ("Đà Lạt", "Lâm Đồng", 11.9404, 108.4583, ("dalat",)),
+    ("Phú Quốc", "Kiên Giang", 10.2899, 103.9840, ("đảo phú quốc", "phuquoc")),
+    ("Vũng Tàu", "Bà Rịa - Vũng Tàu", 10.3460, 107.0843, ("vũng tầu",)),
+    ("Phan Thiết", "Bình Thuận", 10.9289, 108.1021, ()),
+    ("Mũi Né", "Bình Thuận", 10.9333, 108.2833, ()),
+    ("Quy Nhơn", "Bình Định", 13.7829, 109.2196, ("qui nhơn",)),
+    ("Tuy Hòa", "Phú Yên", 13.0882, 109.0929, ("tuy hoà",)),
+    ("Phan Rang", "Ninh Thuận", 11.5646, 108.9886, ("phan rang - tháp chàm", "phan rang tháp chàm")),
+    ("Cam Ranh", "Khánh Hòa", 11.9214, 109.1591, ()),
+    ("Buôn Ma Thuột", "Đắk Lắk", 12.6667, 108.0500, ("buôn mê thuột", "bmt")),
+    ("Pleiku", "Gia Lai", 13.9833, 108.0000, ()),
+    ("Vinh", "Nghệ An", 18.6796, 105.6813, ()),
+    ("Đồng Hới", "Quảng Bình", 17.4689, 106.6223, ()),
+    ("Đông Hà", "Quảng Trị", 16.8163, 107.1003, ()),
+    ("Châu Đốc", "An Giang", 10.7011, 105.1119, ()),
+    ("Rạch Giá", "Kiên Giang", 10.0125, 105.0809, ()),
+    ("Hà Tiên", "Kiên Giang", 10.3831, 104.4875, ()),
+    ("Mỹ Tho", "Tiền Giang", 10.3600, 106.3600, ()),
+    ("Côn Đảo", "Bà Rịa - Vũng Tàu", 8.6833, 106.6089, ("côn sơn",)),
+    ("Cát Bà", "Hải Phòng", 20.7276, 107.0480, ("đảo cát bà",)),
+    ("Cô Tô", "Quảng Ninh", 20.9686, 107.7664, ("đảo cô tô",)),
+    ("Lý Sơn", "Quảng Ngãi", 15.3790, 109.1210, ("đảo lý sơn",)),
+    ("Mộc Châu", "Sơn La", 20.8472, 104.6361, ()),
+    ("Mù Cang Chải", "Yên Bái", 21.8497, 104.0906, ()),
+    ("Đồng Văn", "Hà Giang", 23.2783, 105.3614, ()),
+    ("Tam Đảo", "Vĩnh Phúc", 21.4575, 105.6433, ()),
+    ("Bảo Lộc", "Lâm Đồng", 11.5480, 107.8077, ()),
+]
+
+# (name, parent city/province, lat, lon, aliases)
+LANDMARKS = [
+    ("Vịnh Hạ Long", "Hạ Long", 20.9101, 107.1839, ("vịnh hạ long", "ha long bay")),
+    ("Tam Cốc", "Ninh Bình", 20.2155, 105.9380, ("tam cốc bích động",)),
+    ("Tràng An", "Ninh Bình", 20.2520, 105.8960, ()),
+    ("Bái Đính", "Ninh Bình", 20.2742, 105.8648, ("chùa bái đính",)),
+    ("Phong Nha - Kẻ Bàng", "Quảng Bình", 17.5900, 106.2830, ("phong nha", "phong nha kẻ bàng")),
+    ("Sơn Đoòng", "Quảng Bình", 17.4567, 106.2873, ("hang sơn đoòng",)),
+    ("Bà Nà Hills", "Đà Nẵng", 15.9977, 107.9880, ("bà nà", "ba na hills")),
+    ("Ngũ Hành Sơn", "Đà Nẵng", 16.0036, 108.2636, ()),
+    ("Mỹ Khê", "Đà Nẵng", 16.0610, 108.2470, ("biển mỹ khê", "bãi biển mỹ khê")),
+    ("Mỹ Sơn", "Hội An", 15.7642, 108.1240, ("thánh địa mỹ sơn",)),
+    ("Cù Lao Chàm", "Hội An", 15.9550, 108.5130, ()),
+    ("Đại Nội", "Huế", 16.4698, 107.5786, ("kinh thành huế", "đại nội huế")),
+    ("Fansipan", "Sapa", 22.3033, 103.7750, ("phan xi păng",)),
+    ("Hồ Hoàn Kiếm", "Hà Nội", 21.0288, 105.8525, ("hồ gươm",)),
+    ("Văn Miếu", "Hà Nội", 21.0294, 105.8355, ("văn miếu quốc tử giám",)),
+    ("Địa đạo Củ Chi", "Hồ Chí Minh", 11.1416, 106.4625, ("củ chi",)),
+    ("Chợ Bến Thành", "Hồ Chí Minh", 10.7725, 106.6980, ("bến thành",)),
+    ("Hồ Ba Bể", "Bắc Kạn", 22.4167, 105.6167, ("ba bể",)),
+    ("Thác Bản Giốc", "Cao Bằng", 22.8542, 106.7236, ("bản giốc",)),
+    ("Chợ nổi Cái Răng", "Cần Thơ", 10.0050, 105.7480, ("cái răng",)),
+    ("Đồi cát Mũi Né", "Mũi Né", 10.9447, 108.2883, ("đồi cát bay",)),
+]
+
+# Tie-break when two entries share the same alias
+KIND_PRIORITY = {"province": 0, "city": 1, "landmark": 2}
+
+
+@dataclass(frozen=True)
+class Location:
+    """A gazetteer entry"""
+    name: str
+    kind: str  # "province", "city" or "landmark"
+    region: str
+    subregion: str
+    lat: float
+    lon: float
+    parent: Optional[str] = None  # Province for cities, nearest city/province for landmarks
+    country: str = "Việt Nam"
+    aliases: Tuple[str, ...] = ()
+    
+    @property
+    def weather_name(self) -> str:
+        """Name to use for weather lookups (landmarks use their parent city)"""
+        return self.parent if self.kind == "landmark" and self.parent else self.name
+
+
+@dataclass(frozen=True)
+class Mention:
+    """A location found in text"""
+    location: Location
+    start: int
+    end: int
+    text: str  # Text as written by the user
+
+
+@lru_cache(maxsize=4096)
+def _fold_char(char: str) -> str:
+    lowered = char.lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFD", lowered)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip Vietnamese diacritics ("Đà Nẵng" -> "da nang")"""
+    return "".join(_fold_char(c) for c in text or "")
+
+
+def _fold_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Fold text and keep, for every folded character, its index in the original text"""
+    folded = []
+    offsets = []
+    for index, char in enumerate(text):
+        for folded_char in _fold_char(char):
+            folded.append(folded_char)
+            offsets.append(index)
+    return "".join(folded), offsets
+
+
+def _accents_compatible(written: str, alias: str) -> bool:
+    """
+    Accept a diacritic-insensitive match only if the user either typed the
+    diacritics correctly or left them out ("Hue" and "Huế" match "huế",
+    "huệ" does not).
+    """
+    written = unicodedata.normalize("NFC", written.lower())
+    alias = unicodedata.normalize("NFC", alias.lower())
+    if written == alias:
+        return True
+    if len(written) != len(alias):
+        return fold(written) == written
+    return all(w == a or w == _fold_char(a) for w, a in zip(written, alias))
+
+
+class _AhoCorasick:
+    """Minimal Aho-Corasick automaton over folded strings"""
+    
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[int, int]]] = [[]]  # (pattern length, pattern id)
+        
+        for pattern, pattern_id in patterns:
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                node = next_node
+            self.outputs[node].append((len(pattern), pattern_id))
+        
+        # Breadth-first construction of failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if node and target != child else 0
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+    
+    def iter_matches(self, text: str):
+        """Yield (start, end, pattern_id) for every occurrence, in one pass"""
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for length, pattern_id in self.outputs[node]:
+                yield index - length + 1, index + 1, pattern_id
+
+
+class Gazetteer:
+    """
+    Vietnamese location gazetteer:
+    - All 63 provinces, major cities and landmarks with aliases
+    - Diacritic-insensitive matching ("Da Nang", "đà nẵng", "ĐÀ NẴNG")
+    - Every mention is found in a single Aho-Corasick pass over the text
+    """
+    
+    def __init__(self, provinces=PROVINCES, cities=CITIES, landmarks=LANDMARKS):
+        self.locations: Dict[str, Location] = {}
+        province_by_name = {}
+        
+        for name, subregion, lat, lon, aliases in provinces:
+            location = Location(name, "province", SUBREGIONS[subregion], subregion, lat, lon,
+                                aliases=tuple(aliases))
+            self.locations[name] = location
+            province_by_name[name] = location
+        
+        for name, province, lat, lon, aliases in cities:
+            parent = province_by_name[province]
+            self.locations[name] = Location(name, "city", parent.region, parent.subregion, lat, lon,
+                                            parent=province, aliases=tuple(aliases))
+        
+        for name, parent_name, lat, lon, aliases in landmarks:
+            parent = self.locations[parent_name]
+            self.locations[name] = Location(name, "landmark", parent.region, parent.subregion, lat, lon,
+                                            parent=parent_name, aliases=tuple(aliases))
+        
+        # Every alias (including the canonical name) becomes one automaton pattern
+        self._aliases: List[Tuple[str, Location]] = []
+        self._by_folded: Dict[str, List[Location]] = {}
+        for location in self.locations.values():
+            for alias in (location.name,) + location.aliases:
+                alias = alias.lower()
+                self._aliases.append((alias, location))
+                self._by_folded.setdefault(fold(alias), []).append(location)
+        
+        self._automaton = _AhoCorasick((fold(alias), i) for i, (alias, _) in enumerate(self._aliases))
+    
+    def find_all(self, text: str, kinds: Iterable[str] = None) -> List[Mention]:
+        """
+        Find every location mentioned in text, in order of appearance
+        
+        Overlapping matches are resolved leftmost-longest, so "Bà Rịa - Vũng Tàu"
+        is one province rather than the city "Vũng Tàu".
+        """
+        if not text:
+            return []
+        
+        folded, offsets = _fold_with_offsets(text)
+        candidates = []
+        
+        for start, end, alias_id in self._automaton.iter_matches(folded):
+            # Whole words only
+            if start > 0 and folded[start - 1].isalnum():
+                continue
+            if end < len(folded) and folded[end].isalnum():
+                continue
+            
+            alias, location = self._aliases[alias_id]
+            original_start = offsets[start]
+            original_end = offsets[end - 1] + 1
+            written = text[original_start:original_end]
+            if not _accents_compatible(written, alias):
+                continue
+            
+            candidates.append((original_start, original_end, location, written))
+        
+        candidates.sort(key=lambda c: (c[0], -(c[1] - c[0]), KIND_PRIORITY[c[2].kind]))
+        
+        mentions = []
+        last_end = -1
+        for start, end, location, written in candidates:
+            if start < last_end:
+                continue
+            last_end = end
+            mentions.append(Mention(location, start, end, written))
+        
+        if kinds is not None:
+            kinds = set(kinds)
+            mentions = [m for m in mentions if m.location.kind in kinds]
+        return mentions
+    
+    def find_first(self, text: str, kinds: Iterable[str] = None) -> Optional[Location]:
+        """First location mentioned in text"""
+        mentions = self.find_all(text, kinds)
+        return mentions[0].location if mentions else None
+    
+    def find_locations(self, text: str, kinds: Iterable[str] = None) -> List[Location]:
+        """Distinct locations mentioned in text, in order of first appearance"""
+        seen = set()
+        locations = []
+        for mention in self.find_all(text, kinds):
+            if mention.location.name not in seen:
+                seen.add(mention.location.name)
+                locations.append(mention.location)
+        return locations
+    
+    def lookup(self, name: str) -> Optional[Location]:
+        """Exact (diacritic-insensitive) lookup by name or alias"""
+        matches = self._by_folded.get(fold((name or "").strip()))
+        if not matches:
+            return None
+        return min(matches, key=lambda location: KIND_PRIORITY[location.kind])
+    
+    def resolve(self, text: str) -> Optional[Location]:
+        """Lookup by exact name, falling back to the first mention in text"""
+        return self.lookup(text) or self.find_first(text)
+
+
+_shared_gazetteer: Optional[Gazetteer] = None
+_shared_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Get the process-wide gazetteer (automaton is built on first use)"""
+    global _shared_gazetteer
+    
+    if _shared_gazetteer is None:
+        with _shared_lock:
+            if _shared_gazetteer is None:
+                _shared_gazetteer = Gazetteer()
+    return _shared_gazetteer
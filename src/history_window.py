@@ -0,0 +1,104 @@
+"""
+History Window - Token-bounded conversation history for prompts
+Keeps the most recent turns verbatim within a token budget and folds the older ones into a short
+extractive summary, so the prompt size of a turn does not grow with the conversation
+"""
+
+from typing import List, Optional, Tuple
+
+DEFAULT_TOKEN_BUDGET = 800
+
+# Assistant replies mostly restate tool output (weather tables, booking forms), so they get a small share
+ASSISTANT_TURN_TOKENS = 80
+USER_TURN_TOKENS = 200
+
+# Older messages folded into the summary line, and its size
+SUMMARY_MESSAGES = 20
+SUMMARY_TOKENS = 120
+SUMMARY_ITEM_TOKENS = 25
+
+
+def count_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token, as in the scheduler)"""
+    return len(text or "") // 4 + 1
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    text = (text or "").strip()
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "..."
+
+
+class HistoryWindow:
+    """Recent turns kept verbatim (clipped), plus a summary of older turns"""
+    
+    __slots__ = ("messages", "summary", "tokens", "summarized")
+    
+    def __init__(self, messages: List[Tuple[str, str]], summary: str = "", summarized: int = 0):
+        self.messages = messages
+        self.summary = summary
+        self.summarized = summarized
+        self.tokens = sum(count_tokens(content) for _, content in messages) + (count_tokens(summary) if summary else 0)
+    
+    def __bool__(self) -> bool:
+        return bool(self.messages or self.summary)
+    
+    def lines(self) -> List[str]:
+        """Prompt lines, oldest first"""
+        lines = [f"Tóm tắt trước đó: {self.summary}"] if self.summary else []
+        for role, content in self.messages:
+            lines.append(f"{'Người dùng' if role == 'user' else 'Trợ lý'}: {content}")
+        return lines
+    
+    def text(self) -> str:
+        return "\n".join(self.lines())
+
+
+def history_fetch_limit(max_messages: Optional[int] = None) -> int:
+    """Messages to load from the end of a conversation: the verbatim window plus the summarized tail"""
+    return (max_messages or SUMMARY_MESSAGES) + SUMMARY_MESSAGES
+
+
+def build_history_window(history: List[Tuple[str, str]], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                         max_messages: Optional[int] = None) -> HistoryWindow:
+    """
+    Pack the newest turns into token_budget (the summary of older turns is counted too)
+    
+    Args:
+        history: (role, content) tuples, oldest first (only the tail is used)
+        token_budget: Upper bound for the history part of a prompt
+        max_messages: Upper bound for the number of verbatim messages
+    """
+    tail = history_fetch_limit(max_messages)
+    history = [(role, content) for role, content in history[-tail:] if role in ("user", "assistant") and content]
+    
+    # Newest first, until the budget (minus room for a summary) or the message limit is reached
+    budget = max(token_budget - SUMMARY_TOKENS, 0)
+    kept: List[Tuple[str, str]] = []
+    used = 0
+    for role, content in reversed(history):
+        if max_messages is not None and len(kept) >= max_messages:
+            break
+        clipped = _clip(content, ASSISTANT_TURN_TOKENS if role == "assistant" else USER_TURN_TOKENS)
+        tokens = count_tokens(clipped)
+        if kept and used + tokens > budget:
+            break
+        kept.append((role, clipped))
+        used += tokens
+    kept.reverse()
+    
+    # Older user turns become one summary line (newest first until its budget, shown oldest first)
+    older = history[:len(history) - len(kept)]
+    items: List[str] = []
+    summary_tokens = 0
+    for role, content in reversed(older):
+        if role != "user":
+            continue
+        item = _clip(content, SUMMARY_ITEM_TOKENS)
+        if summary_tokens + count_tokens(item) > SUMMARY_TOKENS:
+            break
+        items.append(item)
+        summary_tokens += count_tokens(item)
+    summary = f"người dùng đã hỏi: {'; '.join(reversed(items))}" if items else ""
+    
+    return HistoryWindow(kept, summary, len(older))
@@ -0,0 +1,329 @@
+"""
+LLM Scheduler - Process-wide admission control for Azure OpenAI chat calls
+Keeps requests- and tokens-per-minute under budget and serves waiting calls by priority
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Optional
+import logging
+
+from .usage_tracker import usage_from_response
+from .resilience import rate_limit_handler
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower value is served first)
+INTERACTIVE = 0
+ROUTING = 1
+SUGGESTIONS = 2
+TITLING = 3
+
+PRIORITY_NAMES = {
+    INTERACTIVE: "interactive",
+    ROUTING: "routing",
+    SUGGESTIONS: "suggestions",
+    TITLING: "titling"
+}
+
+# Pipeline stage -> priority class
+STAGE_PRIORITIES = {
+    "general_response": INTERACTIVE,
+    "general_knowledge": INTERACTIVE,
+    "rag.generation": INTERACTIVE,
+    "rewrite_context": ROUTING,
+    "intent_detection": ROUTING,
+    "suggestions": SUGGESTIONS,
+    "conversation_title": TITLING
+}
+
+# Speculative work (suggestion prefetch) is served after every interactive and routing call
+_background = contextvars.ContextVar("llm_background", default=False)
+
+
+@contextmanager
+def background_priority():
+    """LLM calls made inside (including tasks and threads started here) queue as suggestions"""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def in_background() -> bool:
+    """True inside background_priority()"""
+    return _background.get()
+
+
+def stage_priority(stage: str) -> int:
+    """Priority class of a pipeline stage in the current context"""
+    priority = STAGE_PRIORITIES.get(stage, INTERACTIVE)
+    return max(priority, SUGGESTIONS) if _background.get() else priority
+
+
+# How long a call may wait in the queue before it is rejected (seconds)
+DEFAULT_MAX_WAIT = {
+    INTERACTIVE: 30.0,
+    ROUTING: 30.0,
+    SUGGESTIONS: 10.0,
+    TITLING: 5.0
+}
+
+WINDOW_SECONDS = 60.0
+
+# Dispatch pause after a 429 without a retry-after header (seconds)
+DEFAULT_RATE_LIMIT_PAUSE = 1.0
+
+# Async waiters poll the shared state (a threading.Condition cannot wake a coroutine)
+ASYNC_POLL_SECONDS = 0.05
+
+
+class SchedulerRejectedError(Exception):
+    """The scheduler could not admit a call (queue full or waited too long)"""
+
+
+def estimate_tokens(prompt: str, max_completion_tokens: int = 500) -> int:
+    """Rough token budget of a call: prompt (about 4 chars per token) plus expected completion"""
+    return len(prompt or "") // 4 + 1 + max_completion_tokens
+
+
+class _Slot:
+    """Admission of one call; set .response so the real token usage is charged"""
+    
+    __slots__ = ("priority", "estimated_tokens", "queued_ms", "response", "_entry")
+    
+    def __init__(self, priority: int, estimated_tokens: int):
+        self.priority = priority
+        self.estimated_tokens = estimated_tokens
+        self.queued_ms = 0.0
+        self.response = None
+        self._entry = None
+
+
+class LLMScheduler:
+    """
+    Admission control shared by every session:
+    - Sliding 60s windows for requests and tokens (rpm / tpm; 0 disables a budget)
+    - At most max_concurrency calls in flight
+    - Waiting calls are served strictly by priority (interactive > routing > suggestions > titling),
+      FIFO within a class; background classes give up sooner, so they absorb the queueing
+    - A provider 429 pauses dispatch for the retry-after delay
+    """
+    
+    def __init__(self, rpm: int = 0, tpm: int = 0, max_concurrency: int = 16, max_queue: int = 256,
+                 max_wait: Dict[int, float] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = {**DEFAULT_MAX_WAIT, **(max_wait or {})}
+        
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._window: deque = deque()  # [started_at, tokens]
+        self._window_tokens = 0
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self.stats = {name: {"admitted": 0, "rejected": 0, "queued_ms": 0.0} for name in PRIORITY_NAMES.values()}
+    
+    def _expire(self, now: float):
+        while self._window and now - self._window[0][0] >= WINDOW_SECONDS:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+    
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """0 if a call of this size can start now, else seconds until capacity may free up"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= self.max_concurrency:
+            return WINDOW_SECONDS  # woken by release()
+        over_requests = self.rpm and len(self._window) >= self.rpm
+        over_tokens = self.tpm and self._window and self._window_tokens + tokens > self.tpm
+        if over_requests or over_tokens:
+            return max(0.01, self._window[0][0] + WINDOW_SECONDS - now)
+        return 0.0
+    
+    def acquire(self, priority: int, estimated_tokens: int) -> _Slot:
+        """Block until the call may start (raises SchedulerRejectedError on backpressure)"""
+        slot = _Slot(priority, estimated_tokens)
+        name = PRIORITY_NAMES.get(priority, "interactive")
+        start = time.monotonic()
+        deadline = start + self.max_wait.get(priority, DEFAULT_MAX_WAIT[INTERACTIVE])
+        
+        with self._cond:
+            ticket = self._enqueue(priority, name)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._expire(now)
+                    wait = self._wait_time(estimated_tokens, now) if self._waiting[0] == ticket else WINDOW_SECONDS
+                    if wait == 0.0:
+                        break
+                    if now >= deadline:
+                        self.stats[name]["rejected"] += 1
+                        raise SchedulerRejectedError(
+                            f"LLM {name} call waited {now - start:.1f}s without capacity"
+                        )
+                    self._cond.wait(min(wait, deadline - now))
+            finally:
+                self._dequeue(ticket)
+            self._admit(slot, name, start)
+        return slot
+    
+    async def aacquire(self, priority: int, estimated_tokens: int) -> _Slot:
+        """Async acquire: waits in the same priority queue without blocking the event loop"""
+        slot = _Slot(priority, estimated_tokens)
+        name = PRIORITY_NAMES.get(priority, "interactive")
+        start = time.monotonic()
+        deadline = start + self.max_wait.get(priority, DEFAULT_MAX_WAIT[INTERACTIVE])
+        
+        with self._cond:
+            ticket = self._enqueue(priority, name)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    self._expire(now)
+                    wait = self._wait_time(estimated_tokens, now) if self._waiting[0] == ticket else WINDOW_SECONDS
+                    if wait == 0.0:
+                        self._dequeue(ticket)
+                        ticket = None
+                        self._admit(slot, name, start)
+                        return slot
+                    if now >= deadline:
+                        self.stats[name]["rejected"] += 1
+                        raise SchedulerRejectedError(
+                            f"LLM {name} call waited {now - start:.1f}s without capacity"
+                        )
+                await asyncio.sleep(min(wait, deadline - now, ASYNC_POLL_SECONDS))
+        finally:
+            if ticket is not None:
+                with self._cond:
+                    self._dequeue(ticket)
+    
+    def _enqueue(self, priority: int, name: str) -> tuple:
+        """Take a place in the waiting queue (caller holds the lock)"""
+        if len(self._waiting) >= self.max_queue:
+            self.stats[name]["rejected"] += 1
+            raise SchedulerRejectedError(f"LLM queue full ({len(self._waiting)} waiting)")
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+    
+    def _dequeue(self, ticket: tuple):
+        """Leave the waiting queue and let the next waiter re-check (caller holds the lock)"""
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+        self._cond.notify_all()
+    
+    def _admit(self, slot: _Slot, name: str, start: float):
+        """Charge the estimate to the window and count the call as in flight (caller holds the lock)"""
+        slot._entry = [time.monotonic(), slot.estimated_tokens]
+        self._window.append(slot._entry)
+        self._window_tokens += slot.estimated_tokens
+        self._in_flight += 1
+        
+        slot.queued_ms = (time.monotonic() - start) * 1000
+        self.stats[name]["admitted"] += 1
+        self.stats[name]["queued_ms"] += slot.queued_ms
+    
+    def release(self, slot: _Slot):
+        """Finish a call: charge the real token usage instead of the estimate"""
+        actual = None
+        if slot.response is not None:
+            usage = usage_from_response(slot.response)
+            if usage["prompt_tokens"] or usage["completion_tokens"]:
+                actual = usage["prompt_tokens"] + usage["completion_tokens"]
+        
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            self._expire(now)
+            # Entries older than the window were already dropped with their estimate
+            if actual is not None and slot._entry is not None and now - slot._entry[0] < WINDOW_SECONDS:
+                self._window_tokens += actual - slot._entry[1]
+                slot._entry[1] = actual
+            self._cond.notify_all()
+    
+    def note_rate_limited(self, retry_after: float = None) -> float:
+        """
+        Pause dispatch after a provider 429 (for its retry-after delay)
+        
+        Returns:
+            Seconds until dispatch resumes; the rate-limited call waits this long before its retry
+        """
+        pause = DEFAULT_RATE_LIMIT_PAUSE if retry_after is None else retry_after
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + pause)
+            remaining = self._paused_until - now
+        logger.warning(f"LLM rate limited, pausing dispatch for {remaining:.1f}s")
+        return remaining
+    
+    @contextmanager
+    def slot(self, stage: str, estimated_tokens: int):
+        """
+        Admit one LLM call for a pipeline stage
+        
+        Usage:
+            with scheduler.slot("intent_detection", estimate_tokens(prompt)) as slot:
+                slot.response = llm.invoke(prompt)
+        """
+        slot = self.acquire(stage_priority(stage), estimated_tokens)
+        try:
+            # Every 429 of the resilient call inside pauses dispatch and is retried after the pause
+            with rate_limit_handler(self.note_rate_limited):
+                yield slot
+        finally:
+            self.release(slot)
+    
+    @asynccontextmanager
+    async def aslot(self, stage: str, estimated_tokens: int):
+        """Async counterpart of slot() for coroutines"""
+        slot = await self.aacquire(stage_priority(stage), estimated_tokens)
+        try:
+            with rate_limit_handler(self.note_rate_limited):
+                yield slot
+        finally:
+            self.release(slot)
+    
+    def state(self) -> Dict[str, Any]:
+        """Current load and per-class counters"""
+        with self._cond:
+            self._expire(time.monotonic())
+            return {
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiting),
+                "requests_last_minute": len(self._window),
+                "tokens_last_minute": self._window_tokens,
+                "classes": {name: dict(stats) for name, stats in self.stats.items()}
+            }
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the process-wide scheduler (LLM_RPM_LIMIT / LLM_TPM_LIMIT / LLM_MAX_CONCURRENCY)"""
+    global _shared_scheduler
+    
+    if _shared_scheduler is None:
+        with _shared_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = LLMScheduler(
+                    rpm=int(os.getenv("LLM_RPM_LIMIT", "0")),
+                    tpm=int(os.getenv("LLM_TPM_LIMIT", "0")),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+                    max_queue=int(os.getenv("LLM_MAX_QUEUE", "256"))
+                )
+    return _shared_scheduler
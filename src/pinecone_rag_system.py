@@ -4,10 +4,21 @@ Pinecone RAG System - Retrieval-Augmented Generation with Pinecone Vector Databa
 
 import os
 import json
-from typing import Dict, Any, List, Optional
-from pinecone import Pinecone, ServerlessSpec
-from openai import AzureOpenAI
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 import logging
+from .tracing import get_tracer
+from .usage_tracker import get_usage_tracker
+from .resilience import resilient_call, aresilient_call
+from .llm_scheduler import get_llm_scheduler, estimate_tokens
+from .async_runtime import loop_local, to_thread
+from .stage_models import StageModel, resolve_stage_model
+from .prompt_registry import get_prompt_registry, prompt_text
+from .providers import (
+    create_chat_client, create_embedding_client, create_vector_index, use_fake_providers,
+    create_async_chat_client, create_async_embedding_client
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,50 +43,78 @@ class PineconeRAGSystem:
         
         self.index_name = os.getenv("PINECONE_INDEX_NAME", "travel-agency")
         
-        # Initialize clients
-        self.pc = Pinecone(api_key=self.pinecone_api_key)
-        self.embedding_client = AzureOpenAI(
+        # Initialize clients (Azure OpenAI / Pinecone, or offline fakes with TRAVEL_PROVIDER=fake)
+        self.embedding_client = create_embedding_client(
             api_key=self.azure_embedding_api_key,
-            azure_endpoint=self.azure_embedding_endpoint,
-            api_version="2024-07-01-preview"
+            endpoint=self.azure_embedding_endpoint
         )
         
+        # Chat client is created on first answer and reused afterwards
+        self._chat_client = None
+        
+        # Retrievals run ahead of time for displayed suggestions: (query, top_k) -> (expires, documents)
+        self._prefetched: Dict[Tuple[str, int], Tuple[float, List[Dict]]] = {}
+        self._prefetch_lock = threading.Lock()
+        
         # Initialize index
         self.index = self._setup_index()
         
+        # The in-memory fake index starts empty; seed it from a JSON dump for offline runs
+        fake_index_data = os.getenv("FAKE_INDEX_DATA")
+        if use_fake_providers() and fake_index_data:
+            self.load_data_to_index(fake_index_data)
+        
         # Ensure data is loaded
         self._ensure_data_loaded()
     
     def _setup_index(self):
         """Setup or create Pinecone index"""
         try:
-            # Check if index exists
-            if self.index_name not in self.pc.list_indexes().names():
-                logger.info(f"Creating Pinecone index: {self.index_name}")
-                self.pc.create_index(
-                    name=self.index_name,
-                    dimension=1536,  # text-embedding-3-small dimension
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region='us-east-1'
-                    )
-                )
-            
-            return self.pc.Index(self.index_name)
+            # Creates the index if it does not exist yet
+            return create_vector_index(self.pinecone_api_key, self.index_name)
             
         except Exception as e:
             logger.error(f"Error setting up index: {e}")
             raise
     
+    def _get_chat_client(self):
+        """Get the shared chat completion client (one connection pool per process)"""
+        if self._chat_client is None:
+            self._chat_client = create_chat_client(
+                api_key=self.azure_chat_api_key,
+                endpoint=self.azure_chat_endpoint
+            )
+        return self._chat_client
+    
+    def _answer_model(self) -> StageModel:
+        """Model settings of the RAG answer stage (defaults when no app config is available)"""
+        try:
+            from .resource_registry import get_resource_registry
+            return get_resource_registry().config_manager.get_stage_model("rag_answer")
+        except Exception as e:
+            logger.warning(f"Using default RAG answer model: {e}")
+            return resolve_stage_model("rag_answer")
+    
+    @staticmethod
+    def _completion_args(stage_model: StageModel) -> Dict[str, Any]:
+        """model / temperature / max_tokens arguments of chat.completions.create"""
+        args = {"model": stage_model.deployment, "temperature": stage_model.temperature}
+        if stage_model.max_tokens:
+            args["max_tokens"] = stage_model.max_tokens
+        return args
+    
     def get_embedding(self, text: str) -> List[float]:
         """Get embedding for text using Azure OpenAI"""
         try:
-            response = self.embedding_client.embeddings.create(
-                model=self.embed_model,
-                input=text
-            )
-            return response.data[0].embedding
+            with get_tracer().span("rag.embedding", model=self.embed_model), \
+                    get_usage_tracker().track("rag.embedding", self.embed_model, embedding=True) as call:
+                call.response = resilient_call(
+                    "embedding",
+                    self.embedding_client.embeddings.create,
+                    model=self.embed_model,
+                    input=text
+                )
+            return call.response.data[0].embedding
         except Exception as e:
             logger.error(f"Error getting embedding: {e}")
             raise
@@ -125,6 +164,8 @@ class PineconeRAGSystem:
                     batch = vectors[i:i + batch_size]
                     self.index.upsert(batch)
                 
+                with self._prefetch_lock:
+                    self._prefetched.clear()
                 logger.info(f"Successfully loaded {len(vectors)} vectors to index")
                 return True
             else:
@@ -149,35 +190,108 @@ class PineconeRAGSystem:
         except Exception as e:
             logger.error(f"Error checking index stats: {e}")
     
+    async def aprefetch_search(self, query: str, top_k: int = 5, ttl: float = 120.0):
+        """Run a retrieval ahead of time; the next search for the same query uses it (once)"""
+        documents = await self.asearch(query, top_k)
+        if not documents:
+            return
+        now = time.monotonic()
+        with self._prefetch_lock:
+            for key in [key for key, (expires, _) in self._prefetched.items() if expires < now]:
+                del self._prefetched[key]
+            self._prefetched[(query.strip(), top_k)] = (now + ttl, documents)
+    
+    def _take_prefetched(self, query: str, top_k: int) -> Optional[List[Dict]]:
+        with self._prefetch_lock:
+            entry = self._prefetched.pop((query.strip(), top_k), None)
+        return entry[1] if entry and entry[0] >= time.monotonic() else None
+    
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         """Search similar documents in the index"""
+        prefetched = self._take_prefetched(query, top_k)
+        if prefetched is not None:
+            return prefetched
+        
         try:
             # Get query embedding
             query_embedding = self.get_embedding(query)
             
             # Search in Pinecone
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
+            with get_tracer().span("rag.vector_query", top_k=top_k) as span:
+                results = resilient_call(
+                    "vector",
+                    self.index.query,
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True
+                )
+                span["matches"] = len(results.get("matches", []))
+            
+            return self._format_matches(results)
             
-            # Format results
-            documents = []
-            for match in results.get("matches", []):
-                documents.append({
-                    "id": match.get("id"),
-                    "score": match.get("score", 0),
-                    "text": match.get("metadata", {}).get("text", ""),
-                    "metadata": match.get("metadata", {})
-                })
+        except Exception as e:
+            logger.error(f"Error searching: {e}")
+            return []
+    
+    async def aget_embedding(self, text: str) -> List[float]:
+        """Async get_embedding (async Azure OpenAI client of the running event loop)"""
+        try:
+            client = loop_local("rag_embedding_client", lambda: create_async_embedding_client(
+                api_key=self.azure_embedding_api_key,
+                endpoint=self.azure_embedding_endpoint
+            ))
+            with get_tracer().span("rag.embedding", model=self.embed_model), \
+                    get_usage_tracker().track("rag.embedding", self.embed_model, embedding=True) as call:
+                call.response = await aresilient_call(
+                    "embedding",
+                    client.embeddings.create,
+                    model=self.embed_model,
+                    input=text
+                )
+            return call.response.data[0].embedding
+        except Exception as e:
+            logger.error(f"Error getting embedding: {e}")
+            raise
+    
+    async def asearch(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Async search; the Pinecone SDK is sync-only, so the vector query runs on the I/O pool"""
+        prefetched = self._take_prefetched(query, top_k)
+        if prefetched is not None:
+            return prefetched
+        
+        try:
+            query_embedding = await self.aget_embedding(query)
+            
+            with get_tracer().span("rag.vector_query", top_k=top_k) as span:
+                results = await to_thread(
+                    resilient_call,
+                    "vector",
+                    self.index.query,
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True
+                )
+                span["matches"] = len(results.get("matches", []))
             
-            return documents
+            return self._format_matches(results)
             
         except Exception as e:
             logger.error(f"Error searching: {e}")
             return []
     
+    def _format_matches(self, results: Dict) -> List[Dict]:
+        """Flatten index matches into documents"""
+        documents = []
+        for match in results.get("matches", []):
+            documents.append({
+                "id": match.get("id"),
+                "score": match.get("score", 0),
+                "text": match.get("metadata", {}).get("text", ""),
+                "metadata": match.get("metadata", {})
+            })
+        
+        return documents
+    
     def query(self, question: str, top_k: int = 5) -> Dict[str, Any]:
         """
         Query the RAG system with a question
@@ -193,135 +307,160 @@ class PineconeRAGSystem:
             # Search for relevant documents
             documents = self.search(question, top_k)
             
-            # Filter documents by relevance score (minimum threshold)
-            min_score = 0.5  # Lowered threshold for better coverage
-            relevant_docs = [doc for doc in documents if doc.get('score', 0) >= min_score]
-            
-            logger.info(f"Found {len(documents)} total docs, {len(relevant_docs)} above threshold {min_score}")
-            
+            relevant_docs, context, chunk_mapping = self._build_context(documents)
             if not relevant_docs:
-                logger.info("No relevant docs found, returning no_relevant_info")
-                return {
-                    "answer": None,  # Signal that no relevant info was found
-                    "source_documents": [],
-                    "context_used": "",
-                    "sources": [],
-                    "no_relevant_info": True,
-                    "query": question
-                }
-            
-            logger.info(f"Using {len(relevant_docs)} relevant docs for answer generation")
-            
-            # Prepare context with numbered chunks for tracking
-            context_parts = []
-            chunk_mapping = {}
-            for i, doc in enumerate(relevant_docs):
-                chunk_id = f"CHUNK_{i+1}"
-                context_parts.append(f"[{chunk_id}] {doc['text']}")
-                chunk_mapping[chunk_id] = doc["id"]
-            
-            context = "\n".join(context_parts)
+                return self._no_relevant_info(question)
             
             # Generate answer with source tracking
             result = self._generate_answer_with_sources(question, context, chunk_mapping)
+            return self._query_result(result, relevant_docs, context)
             
-            # If no chunks were cited, fall back to showing all sources
-            used_sources = result["used_sources"]
-            if not used_sources and relevant_docs:
-                logger.info("No chunks cited, falling back to all sources")
-                used_sources = [doc["id"] for doc in relevant_docs[:3]]  # Show top 3
+        except Exception as e:
+            return self._query_error(e)
+    
+    async def aquery(self, question: str, top_k: int = 5, generate: bool = True) -> Dict[str, Any]:
+        """
+        Async query (same result shape as query)
+        generate=False answers with the retrieved passages themselves (no chat completion)
+        """
+        try:
+            documents = await self.asearch(question, top_k)
             
-            logger.info(f"Final sources to display: {used_sources}")
+            relevant_docs, context, chunk_mapping = self._build_context(documents)
+            if not relevant_docs:
+                return self._no_relevant_info(question)
             
-            return {
-                "answer": result["answer"],
-                "source_documents": relevant_docs,
-                "context_used": context,
-                "sources": used_sources,  # Sources to display (used or fallback)
-                "all_sources": [doc["id"] for doc in relevant_docs]  # All retrieved sources
-            }
+            if generate:
+                result = await self._agenerate_answer_with_sources(question, context, chunk_mapping)
+            else:
+                result = self._extractive_answer(relevant_docs)
+            return self._query_result(result, relevant_docs, context)
             
         except Exception as e:
-            logger.error(f"Error in query: {e}")
-            return {
-                "answer": f"Xin lỗi, có lỗi xảy ra khi xử lý câu hỏi: {str(e)}",
-                "source_documents": [],
-                "context_used": "",
-                "sources": [],
-                "error": str(e)
-            }
+            return self._query_error(e)
+    
+    @staticmethod
+    def _extractive_answer(relevant_docs: List[Dict], max_docs: int = 3, max_chars: int = 300) -> Dict[str, Any]:
+        """Answer made of the top passages (used when answer generation is too slow)"""
+        lines = ["📚 Thông tin liên quan từ cơ sở dữ liệu du lịch:"]
+        for doc in relevant_docs[:max_docs]:
+            text = doc["text"].strip()
+            lines.append(f"- {text[:max_chars].rstrip()}{'...' if len(text) > max_chars else ''}")
+        return {"answer": "\n".join(lines), "used_sources": [doc["id"] for doc in relevant_docs[:max_docs]]}
+    
+    def _build_context(self, documents: List[Dict]):
+        """Relevant documents, numbered context and chunk id -> document id mapping"""
+        # Filter documents by relevance score (minimum threshold)
+        min_score = 0.5  # Lowered threshold for better coverage
+        relevant_docs = [doc for doc in documents if doc.get('score', 0) >= min_score]
+        
+        logger.info(f"Found {len(documents)} total docs, {len(relevant_docs)} above threshold {min_score}")
+        
+        # Prepare context with numbered chunks for tracking
+        context_parts = []
+        chunk_mapping = {}
+        for i, doc in enumerate(relevant_docs):
+            chunk_id = f"CHUNK_{i+1}"
+            context_parts.append(f"[{chunk_id}] {doc['text']}")
+            chunk_mapping[chunk_id] = doc["id"]
+        
+        return relevant_docs, "\n".join(context_parts), chunk_mapping
+    
+    def _no_relevant_info(self, question: str) -> Dict[str, Any]:
+        logger.info("No relevant docs found, returning no_relevant_info")
+        return {
+            "answer": None,  # Signal that no relevant info was found
+            "source_documents": [],
+            "context_used": "",
+            "sources": [],
+            "no_relevant_info": True,
+            "query": question
+        }
+    
+    def _query_result(self, result: Dict[str, Any], relevant_docs: List[Dict], context: str) -> Dict[str, Any]:
+        """Final query result, falling back to the top sources when no chunk was cited"""
+        used_sources = result["used_sources"]
+        if not used_sources and relevant_docs:
+            logger.info("No chunks cited, falling back to all sources")
+            used_sources = [doc["id"] for doc in relevant_docs[:3]]  # Show top 3
+        
+        logger.info(f"Final sources to display: {used_sources}")
+        
+        return {
+            "answer": result["answer"],
+            "source_documents": relevant_docs,
+            "context_used": context,
+            "sources": used_sources,  # Sources to display (used or fallback)
+            "all_sources": [doc["id"] for doc in relevant_docs]  # All retrieved sources
+        }
+    
+    def _query_error(self, e: Exception) -> Dict[str, Any]:
+        logger.error(f"Error in query: {e}")
+        return {
+            "answer": f"Xin lỗi, có lỗi xảy ra khi xử lý câu hỏi: {str(e)}",
+            "source_documents": [],
+            "context_used": "",
+            "sources": [],
+            "error": str(e)
+        }
+    
+    def _sources_prompt(self, question: str, context: str) -> List[Dict[str, str]]:
+        """Answer messages that ask the model to cite [CHUNK_X] (instructions first, chunks last)"""
+        template = get_prompt_registry().get("rag_answer_with_sources")
+        return template.openai_messages(question=question, context=context)
     
     def _generate_answer_with_sources(self, question: str, context: str, chunk_mapping: Dict) -> Dict[str, Any]:
         """Generate answer and track which chunks were actually used"""
         try:
-            client = AzureOpenAI(
-                api_key=self.azure_chat_api_key,
-                azure_endpoint=self.azure_chat_endpoint,
-                api_version="2024-07-01-preview"
-            )
-            
-            prompt = f"""
-            Bạn là trợ lý du lịch thông minh chuyên về du lịch Việt Nam.
-            
-            Dựa vào thông tin sau đây để trả lời câu hỏi của khách hàng:
-            
-            THÔNG TIN THAM KHẢO:
-            {context}
-            
-            CÂU HỎI: {question}
-            
-            HƯỚNG DẪN QUAN TRỌNG:
-            - Trả lời bằng tiếng Việt
-            - BẮT BUỘC: Khi sử dụng thông tin từ chunk nào, PHẢI ghi [CHUNK_X] ngay sau thông tin đó
-            - Ví dụ: "Hà Nội có Hồ Hoàn Kiếm [CHUNK_1] và phố cổ với 36 phố phường [CHUNK_2]"
-            - Nếu thông tin không đủ để trả lời, hãy trả lời "NO_RELEVANT_INFO"
-            - Chỉ sử dụng thông tin từ các chunk được cung cấp
-            - Trả lời chi tiết và hữu ích
-            
-            Hãy trả lời và nhớ ghi rõ [CHUNK_X] cho mỗi thông tin sử dụng:
-            """
-            
-            response = client.chat.completions.create(
-                model="GPT-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            logger.info(f"Raw LLM response: {answer[:200]}...")
-            
-            # Check if no relevant info found
-            if "NO_RELEVANT_INFO" in answer:
-                logger.info("LLM returned NO_RELEVANT_INFO")
-                return {
-                    "answer": None,
-                    "used_sources": []
-                }
-            
-            # Extract which chunks were referenced
-            import re
-            used_chunks = re.findall(r'\[CHUNK_(\d+)\]', answer)
-            logger.info(f"Found chunk references: {used_chunks}")
-            
-            used_sources = []
-            for chunk_num in used_chunks:
-                chunk_id = f"CHUNK_{chunk_num}"
-                if chunk_id in chunk_mapping:
-                    used_sources.append(chunk_mapping[chunk_id])
-                    logger.info(f"Mapped {chunk_id} to {chunk_mapping[chunk_id]}")
-            
-            logger.info(f"Used sources: {used_sources}")
+            client = self._get_chat_client()
+            messages = self._sources_prompt(question, context)
+            prompt = prompt_text(messages)
+            
+            stage_model = self._answer_model()
+            with get_tracer().span("rag.generation", model=stage_model.deployment), \
+                    get_llm_scheduler().slot("rag.generation", estimate_tokens(prompt, stage_model.completion_budget)) as slot, \
+                    get_usage_tracker().track("rag.generation", stage_model.deployment) as call:
+                call.response = slot.response = resilient_call(
+                    "llm",
+                    client.chat.completions.create,
+                    timeout=stage_model.timeout,
+                    messages=messages,
+                    **self._completion_args(stage_model)
+                )
             
-            # Clean the answer by removing chunk references
-            clean_answer = re.sub(r'\[CHUNK_\d+\]', '', answer).strip()
+            return self._parse_sourced_answer(call.response, chunk_mapping)
             
+        except Exception as e:
+            logger.error(f"Error generating answer with sources: {e}")
             return {
-                "answer": clean_answer,
-                "used_sources": list(set(used_sources))  # Remove duplicates
+                "answer": f"Xin lỗi, có lỗi xảy ra khi tạo câu trả lời: {str(e)}",
+                "used_sources": []
             }
+    
+    async def _agenerate_answer_with_sources(self, question: str, context: str, chunk_mapping: Dict) -> Dict[str, Any]:
+        """Async _generate_answer_with_sources (async chat client of the running event loop)"""
+        try:
+            client = loop_local("rag_chat_client", lambda: create_async_chat_client(
+                api_key=self.azure_chat_api_key,
+                endpoint=self.azure_chat_endpoint
+            ))
+            messages = self._sources_prompt(question, context)
+            prompt = prompt_text(messages)
+            
+            stage_model = self._answer_model()
+            with get_tracer().span("rag.generation", model=stage_model.deployment), \
+                    get_usage_tracker().track("rag.generation", stage_model.deployment) as call:
+                async with get_llm_scheduler().aslot("rag.generation",
+                                                     estimate_tokens(prompt, stage_model.completion_budget)) as slot:
+                    call.response = slot.response = await aresilient_call(
+                        "llm",
+                        client.chat.completions.create,
+                        timeout=stage_model.timeout,
+                        messages=messages,
+                        **self._completion_args(stage_model)
+                    )
+            
+            return self._parse_sourced_answer(call.response, chunk_mapping)
             
         except Exception as e:
             logger.error(f"Error generating answer with sources: {e}")
@@ -330,14 +469,45 @@ class PineconeRAGSystem:
                 "used_sources": []
             }
     
+    def _parse_sourced_answer(self, response: Any, chunk_mapping: Dict) -> Dict[str, Any]:
+        """Answer text without [CHUNK_X] markers, plus the document ids it cited"""
+        answer = response.choices[0].message.content.strip()
+        logger.info(f"Raw LLM response: {answer[:200]}...")
+        
+        # Check if no relevant info found
+        if "NO_RELEVANT_INFO" in answer:
+            logger.info("LLM returned NO_RELEVANT_INFO")
+            return {
+                "answer": None,
+                "used_sources": []
+            }
+        
+        # Extract which chunks were referenced
+        import re
+        used_chunks = re.findall(r'\[CHUNK_(\d+)\]', answer)
+        logger.info(f"Found chunk references: {used_chunks}")
+        
+        used_sources = []
+        for chunk_num in used_chunks:
+            chunk_id = f"CHUNK_{chunk_num}"
+            if chunk_id in chunk_mapping:
+                used_sources.append(chunk_mapping[chunk_id])
+                logger.info(f"Mapped {chunk_id} to {chunk_mapping[chunk_id]}")
+        
+        logger.info(f"Used sources: {used_sources}")
+        
+        # Clean the answer by removing chunk references
+        clean_answer = re.sub(r'\[CHUNK_\d+\]', '', answer).strip()
+        
+        return {
+            "answer": clean_answer,
+            "used_sources": list(set(used_sources))  # Remove duplicates
+        }
+    
     def _generate_answer(self, question: str, context: str) -> str:
         """Generate answer using context and question"""
         try:
-            client = AzureOpenAI(
-                api_key=self.azure_chat_api_key,
-                azure_endpoint=self.azure_chat_endpoint,
-                api_version="2024-07-01-preview"
-            )
+            client = self._get_chat_client()
             
             prompt = f"""
             Bạn là trợ lý du lịch thông minh chuyên về du lịch Việt Nam.
@@ -359,14 +529,20 @@ class PineconeRAGSystem:
             TRẢ LỜI:
             """
             
-            response = client.chat.completions.create(
-                model="GPT-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+            stage_model = self._answer_model()
+            with get_tracer().span("rag.generation", model=stage_model.deployment), \
+                    get_llm_scheduler().slot("rag.generation", estimate_tokens(prompt, stage_model.completion_budget)) as slot, \
+                    get_usage_tracker().track("rag.generation", stage_model.deployment) as call:
+                call.response = slot.response = resilient_call(
+                    "llm",
+                    client.chat.completions.create,
+                    timeout=stage_model.timeout,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    **self._completion_args(stage_model)
+                )
+            response = call.response
             
             return response.choices[0].message.content.strip()
             
@@ -391,6 +567,8 @@ class PineconeRAGSystem:
         """Delete all vectors from index"""
         try:
             self.index.delete(delete_all=True)
+            with self._prefetch_lock:
+                self._prefetched.clear()
             logger.info("All vectors deleted from index")
             return True
         except Exception as e:
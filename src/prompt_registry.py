@@ -0,0 +1,231 @@
+"""
+Prompt Registry - Versioned prompt templates laid out for provider-side prompt caching
+Static instructions form a stable system message (the cacheable prefix); the per-turn parts
+(context, history, question, retrieved chunks) go last, in the user message
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A prompt is a plain string, (role, content) messages or OpenAI-style message dicts
+Prompt = Union[str, List[Tuple[str, str]], List[Dict[str, str]]]
+
+
+class PromptTemplate:
+    """
+    One version of a prompt
+    - system: static instructions; may only use settings that rarely change (agent name, personality)
+    - user: the per-call parts, formatted with str.format
+    """
+    
+    def __init__(self, name: str, version: int, system: str, user: str):
+        self.name = name
+        self.version = version
+        self.system = system.strip()
+        self.user = user.strip()
+    
+    @property
+    def key(self) -> str:
+        """Identifier recorded in traces, e.g. intent_detection@v1"""
+        return f"{self.name}@v{self.version}"
+    
+    def messages(self, **values) -> List[Tuple[str, str]]:
+        """(role, content) messages for LangChain chat models"""
+        return [("system", self.system.format(**values)), ("user", self.user.format(**values))]
+    
+    def openai_messages(self, **values) -> List[Dict[str, str]]:
+        """Messages for the OpenAI SDK (chat.completions.create)"""
+        return [{"role": role, "content": content} for role, content in self.messages(**values)]
+
+
+def prompt_text(prompt: Prompt) -> str:
+    """Plain text of a prompt (token estimates, span attributes)"""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(message["content"] if isinstance(message, dict) else message[1] for message in prompt)
+
+
+INTENT_DETECTION = PromptTemplate("intent_detection", 1, system="""
+Phân tích ý định của người dùng dựa trên câu hỏi hiện tại và ngữ cảnh cuộc hội thoại.
+
+Các công cụ có sẵn:
+1. RAG - Tra cứu thông tin dịch vụ du lịch, danh lam thắng cảnh địa phương
+2. WEATHER - Kiểm tra thời tiết hiện tại hoặc dự đoán thời tiết tương lai
+3. HOTEL - Đặt phòng khách sạn
+4. CAR - Đặt xe/vận chuyển
+5. TRAVEL_PLAN - Lên kế hoạch du lịch chi tiết, lưu kế hoạch
+6. GENERAL - Trò chuyện chung, không cần công cụ đặc biệt
+
+Quy tắc phân loại (ĐẶC BIỆT chú ý ngữ cảnh):
+- RAG: Hỏi về địa điểm, danh lam, ẩm thực, hoạt động du lịch, "có gì", "làm gì"
+- WEATHER: Hỏi về thời tiết, nhiệt độ, trời mưa/nắng, dự báo (CHÚ Ý: nếu ngữ cảnh có địa điểm, thời tiết sẽ của địa điểm đó)
+- HOTEL: Yêu cầu đặt phòng, tìm khách sạn, booking accommodation
+- CAR: Yêu cầu đặt xe, thuê xe, book transportation, di chuyển
+- TRAVEL_PLAN: Lên kế hoạch du lịch, tạo itinerary, lưu kế hoạch, "lên kế hoạch", "tạo kế hoạch", "lưu kế hoạch"
+- GENERAL: Chào hỏi, cảm ơn, câu hỏi chung không liên quan du lịch
+
+QUAN TRỌNG: Nếu câu hỏi đơn giản như "thời tiết" nhưng ngữ cảnh có địa điểm,
+vẫn chọn WEATHER vì người dùng muốn biết thời tiết của địa điểm đó.
+
+Trả lời CHÍNH XÁC một trong: RAG, WEATHER, HOTEL, CAR, TRAVEL_PLAN, GENERAL
+""", user="""
+Ngữ cảnh hội thoại: {context}
+Câu hỏi hiện tại: {user_input}
+""")
+
+# v2: a message may hold several requests; the router returns one (tool, query) per request
+INTENT_DETECTION_MULTI = PromptTemplate("intent_detection", 2, system="""
+Phân tích ý định của người dùng dựa trên câu hỏi hiện tại và ngữ cảnh cuộc hội thoại.
+Một tin nhắn có thể chứa nhiều yêu cầu, ví dụ: "thời tiết Đà Nẵng và đặt khách sạn ở đó".
+
+Các công cụ có sẵn:
+1. RAG - Tra cứu thông tin dịch vụ du lịch, danh lam thắng cảnh địa phương
+2. WEATHER - Kiểm tra thời tiết hiện tại hoặc dự đoán thời tiết tương lai
+3. HOTEL - Đặt phòng khách sạn
+4. CAR - Đặt xe/vận chuyển
+5. TRAVEL_PLAN - Lên kế hoạch du lịch chi tiết, lưu kế hoạch
+6. GENERAL - Trò chuyện chung, không cần công cụ đặc biệt
+
+Quy tắc phân loại (ĐẶC BIỆT chú ý ngữ cảnh):
+- RAG: Hỏi về địa điểm, danh lam, ẩm thực, hoạt động du lịch, "có gì", "làm gì"
+- WEATHER: Hỏi về thời tiết, nhiệt độ, trời mưa/nắng, dự báo (CHÚ Ý: nếu ngữ cảnh có địa điểm, thời tiết sẽ của địa điểm đó)
+- HOTEL: Yêu cầu đặt phòng, tìm khách sạn, booking accommodation
+- CAR: Yêu cầu đặt xe, thuê xe, book transportation, di chuyển
+- TRAVEL_PLAN: Lên kế hoạch du lịch, tạo itinerary, lưu kế hoạch, "lên kế hoạch", "tạo kế hoạch", "lưu kế hoạch"
+- GENERAL: Chào hỏi, cảm ơn, câu hỏi chung không liên quan du lịch
+
+Trả về một mảng JSON, mỗi phần tử là một yêu cầu theo thứ tự trong tin nhắn:
+[{{"tool": "WEATHER", "query": "thời tiết Đà Nẵng"}}, {{"tool": "HOTEL", "query": "đặt khách sạn ở Đà Nẵng"}}]
+- "tool": một trong RAG, WEATHER, HOTEL, CAR, TRAVEL_PLAN, GENERAL
+- "query": phần tin nhắn dành cho công cụ đó, viết đủ ý (thay "ở đó", "nơi này" bằng tên địa điểm)
+- Chỉ tách khi tin nhắn thật sự có nhiều yêu cầu; một yêu cầu thì trả về mảng một phần tử
+Chỉ trả về JSON, không giải thích.
+""", user="""
+Ngữ cảnh hội thoại: {context}
+Câu hỏi hiện tại: {user_input}
+""")
+
+REWRITE_CONTEXT = PromptTemplate("rewrite_context", 1, system="""
+Hãy phân tích cuộc hội thoại và tóm tắt ngữ cảnh, ĐẶC BIỆT chú ý các địa điểm được đề cập.
+
+QUAN TRỌNG: Nếu có địa điểm nào được đề cập trong lịch sử hội thoại,
+hãy ưu tiên ghi nhớ và đề cập trong tóm tắt ngữ cảnh.
+
+Tóm tắt ngữ cảnh (1-2 câu, bao gồm địa điểm nếu có).
+""", user="""
+Lịch sử hội thoại:
+{history}
+Câu hỏi hiện tại: {user_input}
+""")
+
+RAG_ANSWER_WITH_SOURCES = PromptTemplate("rag_answer_with_sources", 1, system="""
+Bạn là trợ lý du lịch thông minh chuyên về du lịch Việt Nam.
+
+Dựa vào THÔNG TIN THAM KHẢO trong tin nhắn để trả lời CÂU HỎI của khách hàng.
+
+HƯỚNG DẪN QUAN TRỌNG:
+- Trả lời bằng tiếng Việt
+- BẮT BUỘC: Khi sử dụng thông tin từ chunk nào, PHẢI ghi [CHUNK_X] ngay sau thông tin đó
+- Ví dụ: "Hà Nội có Hồ Hoàn Kiếm [CHUNK_1] và phố cổ với 36 phố phường [CHUNK_2]"
+- Nếu thông tin không đủ để trả lời, hãy trả lời "NO_RELEVANT_INFO"
+- Chỉ sử dụng thông tin từ các chunk được cung cấp
+- Trả lời chi tiết và hữu ích
+""", user="""
+THÔNG TIN THAM KHẢO:
+{context}
+
+CÂU HỎI: {question}
+
+Hãy trả lời và nhớ ghi rõ [CHUNK_X] cho mỗi thông tin sử dụng:
+""")
+
+GENERAL_RESPONSE = PromptTemplate("general_response", 1, system="""
+Hãy trả lời một cách tự nhiên và hữu ích theo tính cách của bạn.
+Nếu liên quan đến du lịch, hãy gợi ý người dùng hỏi cụ thể hơn về địa điểm, thời tiết, hoặc đặt dịch vụ.
+Nếu biết sở thích của người dùng, hãy đưa ra gợi ý phù hợp.
+Trả lời bằng tiếng Việt.
+
+Bạn là {agent_name}, trợ lý du lịch với tính cách {personality}.
+{interest_context}
+""", user="""
+Ngữ cảnh: {context}
+Câu hỏi: {user_input}
+""")
+
+# Fallback when the knowledge base has nothing on the question
+GENERAL_KNOWLEDGE = PromptTemplate("general_knowledge", 1, system="""
+Bạn là trợ lý du lịch thông minh.
+Cơ sở dữ liệu không có thông tin cụ thể về câu hỏi của khách hàng.
+
+Hãy trả lời dựa trên kiến thức chung của bạn về du lịch Việt Nam:
+- Đưa ra thông tin hữu ích và chính xác
+- Giữ giọng điệu thân thiện và chuyên nghiệp
+- Trả lời bằng tiếng Việt
+- Nếu không chắc chắn, hãy khuyên khách tìm hiểu thêm từ nguồn chính thức
+""", user="""
+Khách hàng hỏi về: "{query}"
+""")
+
+DEFAULT_TEMPLATES = [INTENT_DETECTION, INTENT_DETECTION_MULTI, REWRITE_CONTEXT, RAG_ANSWER_WITH_SOURCES, GENERAL_RESPONSE,
+                     GENERAL_KNOWLEDGE]
+
+
+class PromptRegistry:
+    """
+    Templates by name and version
+    get(name) returns the pinned version (PROMPT_VERSIONS="intent_detection=1,...") or the latest
+    """
+    
+    def __init__(self, templates: List[PromptTemplate] = None, pinned: Dict[str, int] = None):
+        self._templates: Dict[str, Dict[int, PromptTemplate]] = {}
+        self._lock = threading.Lock()
+        self.pinned = dict(pinned or {})
+        for template in templates or []:
+            self.register(template)
+    
+    @staticmethod
+    def pinned_from_env() -> Dict[str, int]:
+        pinned = {}
+        for item in os.getenv("PROMPT_VERSIONS", "").split(","):
+            name, _, version = item.partition("=")
+            if name.strip() and version.strip().isdigit():
+                pinned[name.strip()] = int(version)
+        return pinned
+    
+    def register(self, template: PromptTemplate):
+        """Add a template version (replaces the same name and version)"""
+        with self._lock:
+            self._templates.setdefault(template.name, {})[template.version] = template
+    
+    def get(self, name: str, version: int = None) -> PromptTemplate:
+        """
+        Template to use for a prompt name
+        
+        Raises:
+            KeyError: unknown name or version
+        """
+        versions = self._templates[name]
+        version = version or self.pinned.get(name)
+        return versions[version if version is not None else max(versions)]
+    
+    def versions(self, name: str) -> List[int]:
+        return sorted(self._templates.get(name, {}))
+
+
+_shared_registry: Optional[PromptRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get the process-wide prompt registry with the built-in templates"""
+    global _shared_registry
+    
+    if _shared_registry is None:
+        with _shared_lock:
+            if _shared_registry is None:
+                _shared_registry = PromptRegistry(DEFAULT_TEMPLATES, PromptRegistry.pinned_from_env())
+    return _shared_registry
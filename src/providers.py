@@ -0,0 +1,606 @@
+"""
+Providers - Factories for the LLM, embedding, vector index and weather backends
+TRAVEL_PROVIDER=azure (default) uses Azure OpenAI, Pinecone and OpenWeatherMap;
+TRAVEL_PROVIDER=fake uses deterministic in-process fakes for offline load tests;
+TRAVEL_CASSETTE_MODE=record/replay wraps either family with the cassette layer (src/cassette.py)
+"""
+
+import os
+import json
+import re
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import logging
+
+from .resilience import get_policy
+from .cassette import (
+    Cassette, CassetteAsyncChatClient, CassetteAsyncEmbeddingClient, CassetteAsyncWeatherSession,
+    CassetteChatClient, CassetteChatModel, CassetteEmbeddingClient, CassetteVectorIndex,
+    CassetteWeatherSession, get_cassette
+)
+
+logger = logging.getLogger(__name__)
+
+AZURE_API_VERSION = "2024-07-01-preview"
+EMBEDDING_DIMENSION = 1536  # text-embedding-3-small dimension
+
+# Canned routing for intent detection prompts, checked in order (same keywords as the agent fallback)
+ROUTING_KEYWORDS = [
+    ("WEATHER", ["thời tiết", "weather", "mưa", "nắng", "nhiệt độ", "dự báo"]),
+    ("HOTEL", ["đặt phòng", "khách sạn", "hotel", "booking", "phòng"]),
+    ("CAR", ["đặt xe", "thuê xe", "car", "taxi", "di chuyển", "transport"]),
+    ("TRAVEL_PLAN", ["lên kế hoạch", "tạo kế hoạch", "kế hoạch du lịch", "itinerary", "lưu kế hoạch"]),
+    ("RAG", ["địa điểm", "danh lam", "thắng cảnh", "du lịch", "gợi ý", "tham quan", "có gì", "ăn gì", "món"]),
+]
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def get_provider_name() -> str:
+    """Configured provider family ("azure" or "fake")"""
+    return os.getenv("TRAVEL_PROVIDER", "azure").strip().lower() or "azure"
+
+
+def use_fake_providers() -> bool:
+    """True when the offline fakes are selected"""
+    return get_provider_name() == "fake"
+
+
+class LatencyModel:
+    """
+    Simulated call latency
+    Spec: "0" / "fixed:20" / "uniform:10:50" / "normal:40:10" / "lognormal:40:0.5" (milliseconds;
+    lognormal takes the median and sigma)
+    """
+    
+    def __init__(self, spec: str = "0", seed: int = None):
+        self.spec = (spec or "0").strip()
+        parts = self.spec.split(":")
+        if len(parts) == 1:
+            parts = ["fixed", parts[0]]
+        self.kind = parts[0].lower()
+        self.params = [float(p) for p in parts[1:]]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.spec}")
+        self._random = random.Random(seed)
+    
+    @classmethod
+    def from_env(cls, name: str) -> "LatencyModel":
+        seed = os.getenv("FAKE_SEED")
+        return cls(os.getenv(name, "0"), int(seed) if seed else None)
+    
+    def sample_ms(self) -> float:
+        """Draw one latency in milliseconds"""
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self._random.uniform(self.params[0], self.params[1])
+        if self.kind == "normal":
+            return max(0.0, self._random.gauss(self.params[0], self.params[1]))
+        median, sigma = self.params
+        return self._random.lognormvariate(0.0, sigma) * median
+    
+    def wait(self):
+        """Sleep for one sampled latency"""
+        delay_ms = self.sample_ms()
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+    
+    async def async_wait(self):
+        """Sleep for one sampled latency without blocking the event loop"""
+        delay_ms = self.sample_ms()
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+
+class _Namespace:
+    """Attribute bag used to mimic SDK response objects"""
+    
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)"""
+    return len(text or "") // 4 + 1
+
+
+@lru_cache(maxsize=4096)
+def _hashed_terms(text: str) -> Tuple[Tuple[int, float], ...]:
+    """Sparse bag-of-words vector: each word (and word pair) hashed into a signed bucket"""
+    words = WORD_PATTERN.findall((text or "").lower())
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    buckets: Dict[int, float] = {}
+    for term in terms:
+        digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % EMBEDDING_DIMENSION
+        buckets[bucket] = buckets.get(bucket, 0.0) + (1.0 if digest[4] & 1 else -1.0)
+    
+    norm = sum(value * value for value in buckets.values()) ** 0.5
+    if not norm:
+        return ((0, 1.0),)
+    return tuple((bucket, value / norm) for bucket, value in buckets.items() if value)
+
+
+def fake_embedding(text: str) -> List[float]:
+    """Deterministic unit vector for a text (same text, same vector, in every process)"""
+    vector = [0.0] * EMBEDDING_DIMENSION
+    for bucket, value in _hashed_terms(text):
+        vector[bucket] = value
+    return vector
+
+
+def _find_line(prompt: str, label: str) -> Optional[str]:
+    """Value after "label:" on its line, if present"""
+    match = re.search(re.escape(label) + r"\s*:?\s*(.+)", prompt)
+    return match.group(1).strip().strip('"') if match else None
+
+
+def _fake_route(text: str) -> str:
+    text = text.lower()
+    for label, keywords in ROUTING_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return label
+    return "GENERAL"
+
+
+def _fake_intents(question: str) -> List[Dict[str, str]]:
+    """Split on "và" / "rồi" / ";"; a part without routing keywords belongs to the previous one"""
+    intents: List[Dict[str, str]] = []
+    for part in re.split(r"\s+(?:và|rồi)\s+|\s*;\s*", question):
+        part = part.strip()
+        if not part:
+            continue
+        tool = _fake_route(part)
+        if intents and (tool == "GENERAL" or tool == intents[-1]["tool"]):
+            intents[-1]["query"] += f" và {part}"
+        else:
+            intents.append({"tool": tool, "query": part})
+    return intents or [{"tool": "GENERAL", "query": question}]
+
+
+def fake_completion(prompt: str) -> str:
+    """Canned answer for the prompts used by the agent, the RAG system and the history page"""
+    if "Trả về một mảng JSON" in prompt:
+        question = _find_line(prompt, "Câu hỏi hiện tại") or prompt
+        return json.dumps(_fake_intents(question), ensure_ascii=False)
+    
+    if "Trả lời CHÍNH XÁC một trong" in prompt:
+        return _fake_route(_find_line(prompt, "Câu hỏi hiện tại") or prompt)
+    
+    if "Tóm tắt ngữ cảnh" in prompt:
+        user_lines = re.findall(r"Người dùng: (.+)", prompt)
+        question = _find_line(prompt, "Câu hỏi hiện tại") or ""
+        return " ".join(["Người dùng đã hỏi:"] + user_lines[-3:] + [f"Hiện tại hỏi: {question}"])
+    
+    if "[CHUNK_" in prompt:
+        chunks = re.findall(r"^\s*\[(CHUNK_\d+)\] (.+)$", prompt, re.MULTILINE)
+        if not chunks:
+            return "NO_RELEVANT_INFO"
+        return " ".join(f"{text[:160]} [{chunk_id}]" for chunk_id, text in chunks[:2])
+    
+    if "tiêu đề" in prompt.lower():
+        return "Hội thoại du lịch"
+    
+    question = (_find_line(prompt, "Câu hỏi") or _find_line(prompt, "Khách hàng hỏi về")
+                or _find_line(prompt, "CÂU HỎI") or "câu hỏi của bạn")
+    return f"Đây là câu trả lời mô phỏng cho: {question[:200]}"
+
+
+class _FakePromptCache:
+    """Mimics provider prompt caching: a system message seen before is reported as cached input"""
+    
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+    
+    def cached_tokens(self, messages: List[Tuple[str, str]]) -> int:
+        if not messages or messages[0][0] != "system":
+            return 0
+        digest = hashlib.blake2b(messages[0][1].encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            if digest in self._seen:
+                return _count_tokens(messages[0][1])
+            self._seen.add(digest)
+        return 0
+
+
+_fake_prompt_cache = _FakePromptCache()
+
+
+def _role_messages(prompt: Any) -> List[Tuple[str, str]]:
+    """(role, content) pairs of a string, LangChain messages or (role, content) tuples"""
+    if isinstance(prompt, str):
+        return [("user", prompt)]
+    messages = []
+    for message in prompt:
+        if isinstance(message, tuple):
+            messages.append((message[0], message[1]))
+        elif isinstance(message, dict):
+            messages.append((message.get("role", "user"), message.get("content", "")))
+        else:
+            messages.append((getattr(message, "type", "user"), getattr(message, "content", str(message))))
+    return messages
+
+
+class FakeChatModel:
+    """LangChain-style chat model (invoke / predict) returning canned answers"""
+    
+    def __init__(self, model: str = "GPT-4o-mini", temperature: float = 0.7, latency: LatencyModel = None):
+        self.model_name = model
+        self.temperature = temperature
+        self.latency = latency or LatencyModel.from_env("FAKE_LLM_LATENCY_MS")
+    
+    def invoke(self, prompt: Any) -> Any:
+        self.latency.wait()
+        return self._message(prompt)
+    
+    async def ainvoke(self, prompt: Any) -> Any:
+        await self.latency.async_wait()
+        return self._message(prompt)
+    
+    def _message(self, prompt: Any) -> Any:
+        messages = _role_messages(prompt)
+        prompt = "\n".join(content for _, content in messages)
+        content = fake_completion(prompt)
+        usage = {
+            "input_tokens": _count_tokens(prompt),
+            "output_tokens": _count_tokens(content),
+            "input_token_details": {"cache_read": _fake_prompt_cache.cached_tokens(messages)}
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return _Namespace(
+            content=content,
+            usage_metadata=usage,
+            response_metadata={"model_name": self.model_name}
+        )
+    
+    def predict(self, prompt: str) -> str:
+        return self.invoke(prompt).content
+
+
+class FakeChatClient:
+    """OpenAI-style client: client.chat.completions.create(model=..., messages=[...])"""
+    
+    def __init__(self, latency: LatencyModel = None):
+        self.latency = latency or LatencyModel.from_env("FAKE_LLM_LATENCY_MS")
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+    
+    def _create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        self.latency.wait()
+        return self._completion(model, messages)
+    
+    def _completion(self, model: str, messages: List[Dict[str, str]]) -> Any:
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        content = fake_completion(prompt)
+        return _Namespace(
+            model=model,
+            choices=[_Namespace(index=0, message=_Namespace(role="assistant", content=content), finish_reason="stop")],
+            usage=_Namespace(
+                prompt_tokens=_count_tokens(prompt),
+                completion_tokens=_count_tokens(content),
+                total_tokens=_count_tokens(prompt) + _count_tokens(content),
+                prompt_tokens_details=_Namespace(
+                    cached_tokens=_fake_prompt_cache.cached_tokens(_role_messages(messages))
+                )
+            )
+        )
+
+
+class FakeAsyncChatClient(FakeChatClient):
+    """Async variant: await client.chat.completions.create(...)"""
+    
+    async def _create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        await self.latency.async_wait()
+        return self._completion(model, messages)
+
+
+class FakeEmbeddingClient:
+    """OpenAI-style client: client.embeddings.create(model=..., input=...) with hash-based vectors"""
+    
+    def __init__(self, latency: LatencyModel = None):
+        self.latency = latency or LatencyModel.from_env("FAKE_EMBEDDING_LATENCY_MS")
+        self.embeddings = _Namespace(create=self._create)
+    
+    def _create(self, model: str, input: Any, **kwargs) -> Any:
+        self.latency.wait()
+        return self._embed(model, input)
+    
+    def _embed(self, model: str, input: Any) -> Any:
+        texts = [input] if isinstance(input, str) else list(input)
+        tokens = sum(_count_tokens(text) for text in texts)
+        return _Namespace(
+            model=model,
+            data=[_Namespace(index=i, embedding=fake_embedding(text)) for i, text in enumerate(texts)],
+            usage=_Namespace(prompt_tokens=tokens, total_tokens=tokens)
+        )
+
+
+class FakeAsyncEmbeddingClient(FakeEmbeddingClient):
+    """Async variant: await client.embeddings.create(...)"""
+    
+    async def _create(self, model: str, input: Any, **kwargs) -> Any:
+        await self.latency.async_wait()
+        return self._embed(model, input)
+
+
+class FakeVectorIndex:
+    """
+    In-memory stand-in for a Pinecone index
+    Scores are the share of the query's hashed terms present in a document, so queries that
+    share words with a document score high enough to pass the RAG relevance threshold
+    """
+    
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, latency: LatencyModel = None):
+        self.dimension = dimension
+        self.latency = latency or LatencyModel.from_env("FAKE_VECTOR_LATENCY_MS")
+        self._vectors: Dict[str, Tuple[Dict[int, float], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _sparse(values: List[float]) -> Dict[int, float]:
+        return {i: value for i, value in enumerate(values) if value}
+    
+    def upsert(self, vectors: List[Any], **kwargs) -> Dict[str, int]:
+        with self._lock:
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    vector_id, values, metadata = vector["id"], vector["values"], vector.get("metadata", {})
+                else:
+                    vector_id, values, metadata = vector[0], vector[1], (vector[2] if len(vector) > 2 else {})
+                self._vectors[vector_id] = (self._sparse(values), dict(metadata))
+        return {"upserted_count": len(vectors)}
+    
+    def query(self, vector: List[float], top_k: int = 5, include_metadata: bool = False, **kwargs) -> Dict[str, Any]:
+        self.latency.wait()
+        query_terms = self._sparse(vector).keys()
+        
+        with self._lock:
+            items = list(self._vectors.items())
+        
+        scored = []
+        for vector_id, (values, metadata) in items:
+            shared = sum(1 for i in query_terms if i in values)
+            scored.append((shared / max(len(query_terms), 1), vector_id, metadata))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        
+        return {"matches": [
+            {"id": vector_id, "score": round(score, 4), "metadata": metadata if include_metadata else {}}
+            for score, vector_id, metadata in scored[:top_k]
+        ]}
+    
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            count = len(self._vectors)
+        return {"total_vector_count": count, "dimension": self.dimension, "index_fullness": 0.0}
+    
+    def delete(self, ids: List[str] = None, delete_all: bool = False, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            if delete_all:
+                self._vectors.clear()
+            for vector_id in ids or []:
+                self._vectors.pop(vector_id, None)
+        return {}
+
+
+class FakeWeatherSession:
+    """requests.Session stand-in answering OpenWeatherMap current / forecast calls with stable data"""
+    
+    DESCRIPTIONS = ["trời quang", "mây rải rác", "mưa nhẹ", "nhiều mây", "nắng nhẹ"]
+    
+    def __init__(self, latency: LatencyModel = None):
+        self.latency = latency or LatencyModel.from_env("FAKE_WEATHER_LATENCY_MS")
+    
+    def _reading(self, city: str, offset: int = 0) -> Dict[str, Any]:
+        seed = int.from_bytes(hashlib.blake2b(f"{city.lower()}:{offset}".encode("utf-8"), digest_size=4).digest(), "little")
+        return {
+            "main": {"temp": 18 + seed % 16 + (seed >> 8) % 10 / 10, "humidity": 55 + (seed >> 4) % 40},
+            "weather": [{"description": self.DESCRIPTIONS[seed % len(self.DESCRIPTIONS)]}],
+            "wind": {"speed": round(1 + (seed >> 12) % 60 / 10, 1)}
+        }
+    
+    def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None, **kwargs) -> Any:
+        self.latency.wait()
+        return self._response(url, params)
+    
+    def _response(self, url: str, params: Dict[str, Any] = None) -> Any:
+        city = (params or {}).get("q", "")
+        if url.endswith("/forecast"):
+            start = int(time.time() // 10800 * 10800)
+            payload = {
+                "city": {"name": city},
+                "list": [
+                    dict(self._reading(city, i), dt=start + i * 10800,
+                         dt_txt=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start + i * 10800)))
+                    for i in range(1, 41)
+                ]
+            }
+        else:
+            payload = dict(self._reading(city), name=city)
+        return _Namespace(status_code=200, json=lambda: payload)
+
+
+class FakeAsyncWeatherSession(FakeWeatherSession):
+    """httpx.AsyncClient stand-in: await session.get(...)"""
+    
+    async def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None, **kwargs) -> Any:
+        await self.latency.async_wait()
+        return self._response(url, params)
+
+
+def _build_chat_model(model: str, temperature: float, max_tokens: int = None, timeout: float = None) -> Any:
+    if use_fake_providers():
+        return FakeChatModel(model, temperature)
+    
+    # Timeouts and retries are handled by the resilience layer, not stacked inside the SDK
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        base_url=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        timeout=timeout or get_policy("llm").timeout,
+        max_retries=0
+    )
+
+
+def _build_openai_client(fake_class: type, dependency: str, api_key: str, endpoint: str, api_version: str,
+                         use_async: bool = False) -> Any:
+    if use_fake_providers():
+        return fake_class()
+    
+    from openai import AzureOpenAI, AsyncAzureOpenAI
+    client_class = AsyncAzureOpenAI if use_async else AzureOpenAI
+    return client_class(
+        api_key=api_key,
+        azure_endpoint=endpoint,
+        api_version=api_version,
+        timeout=get_policy(dependency).timeout,
+        max_retries=0
+    )
+
+
+def _build_vector_index(api_key: str, index_name: str, dimension: int) -> Any:
+    if use_fake_providers():
+        return FakeVectorIndex(dimension)
+    
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=api_key)
+    if index_name not in pc.list_indexes().names():
+        logger.info(f"Creating Pinecone index: {index_name}")
+        pc.create_index(
+            name=index_name,
+            dimension=dimension,
+            metric="cosine",
+            spec=ServerlessSpec(
+                cloud='aws',
+                region='us-east-1'
+            )
+        )
+    return pc.Index(index_name)
+
+
+def _build_weather_session(pool_size: int = 20) -> Any:
+    if use_fake_providers():
+        return FakeWeatherSession()
+    
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _build_async_weather_session(pool_size: int = 20) -> Any:
+    if use_fake_providers():
+        return FakeAsyncWeatherSession()
+    
+    import httpx
+    return httpx.AsyncClient(limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+
+
+def _with_cassette(build: Callable[[], Any], wrap: Callable[[Cassette, Any], Any]) -> Any:
+    """Wrap a client with the record / replay cassette when TRAVEL_CASSETTE_MODE is set
+    (when replaying, the real client is never built)"""
+    cassette = get_cassette()
+    if cassette is None:
+        return build()
+    return wrap(cassette, None if cassette.replaying else build())
+
+
+def create_chat_model(model: str = "GPT-4o-mini", temperature: float = 0.7, max_tokens: int = None,
+                      timeout: float = None) -> Any:
+    """LangChain chat model used by the agent (max_tokens None = no limit, timeout None = llm policy)"""
+    return _with_cassette(
+        lambda: _build_chat_model(model, temperature, max_tokens, timeout),
+        lambda cassette, inner: CassetteChatModel(cassette, inner, model, temperature, max_tokens)
+    )
+
+
+def create_chat_client(api_key: str = None, endpoint: str = None, api_version: str = AZURE_API_VERSION) -> Any:
+    """Chat completion client (OpenAI SDK interface)"""
+    return _with_cassette(
+        lambda: _build_openai_client(
+            FakeChatClient,
+            "llm",
+            api_key or os.getenv("AZURE_OPENAI_API_KEY"),
+            endpoint or os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_version
+        ),
+        CassetteChatClient
+    )
+
+
+def create_embedding_client(api_key: str = None, endpoint: str = None, api_version: str = AZURE_API_VERSION) -> Any:
+    """Embedding client (OpenAI SDK interface)"""
+    return _with_cassette(
+        lambda: _build_openai_client(
+            FakeEmbeddingClient,
+            "embedding",
+            api_key or os.getenv("AZURE_OPENAI_EMBEDDING_API_KEY"),
+            endpoint or os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT"),
+            api_version
+        ),
+        CassetteEmbeddingClient
+    )
+
+
+def create_vector_index(api_key: str, index_name: str, dimension: int = EMBEDDING_DIMENSION) -> Any:
+    """Vector index (Pinecone interface); the Pinecone index is created if missing"""
+    return _with_cassette(
+        lambda: _build_vector_index(api_key, index_name, dimension),
+        lambda cassette, inner: CassetteVectorIndex(cassette, inner, index_name)
+    )
+
+
+def create_weather_session() -> Optional[Any]:
+    """HTTP session for the weather client (None lets the client build its pooled session)"""
+    if get_cassette() is None and not use_fake_providers():
+        return None
+    return _with_cassette(_build_weather_session, CassetteWeatherSession)
+
+
+# Async clients keep their connections on the event loop that first used them,
+# so callers create one per loop (see async_runtime.loop_local)
+
+def create_async_chat_client(api_key: str = None, endpoint: str = None, api_version: str = AZURE_API_VERSION) -> Any:
+    """Async chat completion client (AsyncAzureOpenAI interface)"""
+    return _with_cassette(
+        lambda: _build_openai_client(
+            FakeAsyncChatClient,
+            "llm",
+            api_key or os.getenv("AZURE_OPENAI_API_KEY"),
+            endpoint or os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_version,
+            use_async=True
+        ),
+        CassetteAsyncChatClient
+    )
+
+
+def create_async_embedding_client(api_key: str = None, endpoint: str = None, api_version: str = AZURE_API_VERSION) -> Any:
+    """Async embedding client (AsyncAzureOpenAI interface)"""
+    return _with_cassette(
+        lambda: _build_openai_client(
+            FakeAsyncEmbeddingClient,
+            "embedding",
+            api_key or os.getenv("AZURE_OPENAI_EMBEDDING_API_KEY"),
+            endpoint or os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT"),
+            api_version,
+            use_async=True
+        ),
+        CassetteAsyncEmbeddingClient
+    )
+
+
+def create_async_weather_session() -> Any:
+    """Async HTTP session for the weather client (httpx.AsyncClient interface)"""
+    return _with_cassette(_build_async_weather_session, CassetteAsyncWeatherSession)
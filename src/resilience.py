@@ -0,0 +1,372 @@
+"""
+Resilience - Timeouts, retries, circuit breakers and hedging for external dependencies
+Every Azure OpenAI, Pinecone and OpenWeatherMap call goes through resilient_call(dependency, fn, ...)
+(or aresilient_call for async clients; both share the same breaker and counters)
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Awaitable, Callable, Optional
+import logging
+
+from .tracing import submit_with_context
+
+logger = logging.getLogger(__name__)
+
+# Exception class names (from openai, httpx, requests, pinecone) worth retrying
+RETRYABLE_ERROR_NAMES = {
+    "TimeoutError", "ConnectionError", "APIConnectionError", "APITimeoutError", "RateLimitError",
+    "InternalServerError", "ServiceUnavailableError", "Timeout", "ConnectTimeout", "ReadTimeout",
+    "ConnectError", "ReadError", "RemoteProtocolError", "ServiceException"
+}
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Defaults per dependency: (timeout s, retries, hedge after ms or 0 for no hedging)
+DEFAULT_POLICIES = {
+    "llm": (30.0, 2, 0),
+    "embedding": (10.0, 2, 0),
+    "vector": (5.0, 2, 0),
+    "weather": (10.0, 1, 0),
+}
+
+
+# Told about every 429 inside the retry loop: handler(retry_after seconds or None) -> seconds to wait
+# before retrying (the LLM scheduler installs one around each admitted call, see llm_scheduler.slot)
+_rate_limit_handler: contextvars.ContextVar = contextvars.ContextVar("rate_limit_handler", default=None)
+
+
+@contextmanager
+def rate_limit_handler(handler: Callable[[Optional[float]], float]):
+    """Calls made inside report their 429s to handler and wait as long as it says instead of backing off"""
+    token = _rate_limit_handler.set(handler)
+    try:
+        yield
+    finally:
+        _rate_limit_handler.reset(token)
+
+
+class DependencyUnavailableError(Exception):
+    """A dependency is failing (circuit open, or retries exhausted / timed out)"""
+    
+    def __init__(self, dependency: str, reason: str = ""):
+        self.dependency = dependency
+        self.reason = reason
+        super().__init__(f"Dịch vụ {dependency} tạm thời không khả dụng{f' ({reason})' if reason else ''}")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Provider quota backpressure (RateLimitError / HTTP 429): retried, but not a dependency failure"""
+    if any(cls.__name__ == "RateLimitError" for cls in type(error).__mro__):
+        return True
+    return _status_code(error) == 429
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Delay the provider asked for in a 429 (retry-after-ms / retry-after headers), if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            value = headers.get(header)
+            if value is not None:
+                return max(0.0, float(value) * scale)
+        except (TypeError, ValueError, AttributeError):
+            continue  # HTTP-date form or unusable header
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient errors (timeouts, connection errors, rate limits, 5xx) are retried"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    for cls in type(error).__mro__:
+        if cls.__name__ in RETRYABLE_ERROR_NAMES:
+            return True
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class CallPolicy:
+    """Timeout, retry and hedging settings of one dependency"""
+    
+    def __init__(self, timeout: float = 30.0, retries: int = 2, backoff_base: float = 0.2,
+                 backoff_max: float = 2.0, hedge_after_ms: float = 0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after_ms = hedge_after_ms
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+    
+    @classmethod
+    def from_env(cls, dependency: str) -> "CallPolicy":
+        """Policy from RESILIENCE_<DEPENDENCY>_TIMEOUT / _RETRIES / _HEDGE_MS and the shared breaker settings"""
+        timeout, retries, hedge_ms = DEFAULT_POLICIES.get(dependency, (30.0, 2, 0))
+        prefix = f"RESILIENCE_{dependency.upper()}_"
+        return cls(
+            timeout=float(os.getenv(prefix + "TIMEOUT", timeout)),
+            retries=int(os.getenv(prefix + "RETRIES", retries)),
+            hedge_after_ms=float(os.getenv(prefix + "HEDGE_MS", hedge_ms)),
+            failure_threshold=int(os.getenv("RESILIENCE_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("RESILIENCE_BREAKER_RESET", "30"))
+        )
+    
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff in seconds"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive dependency failures;
+    open -> half-open after reset_timeout (one trial call); a trial success closes it again
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class ResilientCaller:
+    """
+    Runs calls to one dependency with a deadline, retries, a circuit breaker and optional hedging
+    Calls run on a bounded per-dependency pool so the caller can stop waiting at the deadline;
+    a timed-out call finishes in the background and its result is dropped
+    """
+    
+    def __init__(self, dependency: str, policy: CallPolicy = None, max_workers: int = 32):
+        self.dependency = dependency
+        self.policy = policy or CallPolicy.from_env(dependency)
+        self.breaker = CircuitBreaker(self.policy.failure_threshold, self.policy.reset_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"call-{dependency}")
+        self.stats = {"calls": 0, "retries": 0, "timeouts": 0, "rejected": 0, "hedged": 0, "failures": 0,
+                      "rate_limited": 0}
+        self._stats_lock = threading.Lock()
+    
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+    
+    def _attempt(self, fn: Callable, args: tuple, kwargs: dict, hedge: bool, timeout: float) -> Any:
+        """One attempt within the deadline, optionally hedged with a second request"""
+        deadline = time.monotonic() + timeout
+        futures = {submit_with_context(self._executor, fn, *args, **kwargs)}
+        
+        if hedge and self.policy.hedge_after_ms > 0:
+            done, _ = wait(futures, timeout=min(self.policy.hedge_after_ms / 1000, timeout))
+            if not done:
+                self._count("hedged")
+                futures.add(submit_with_context(self._executor, fn, *args, **kwargs))
+        
+        error = None
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, futures = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        if error is not None and not futures:
+            raise error
+        
+        self._count("timeouts")
+        raise TimeoutError(f"{self.dependency} call exceeded {timeout:.1f}s")
+    
+    async def _aattempt(self, fn: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict, hedge: bool,
+                        timeout: float) -> Any:
+        """Async attempt: same deadline and hedging, but late tasks are cancelled instead of abandoned"""
+        deadline = time.monotonic() + timeout
+        tasks = {asyncio.ensure_future(fn(*args, **kwargs))}
+        
+        try:
+            if hedge and self.policy.hedge_after_ms > 0:
+                done, _ = await asyncio.wait(tasks, timeout=min(self.policy.hedge_after_ms / 1000, timeout))
+                if not done:
+                    self._count("hedged")
+                    tasks.add(asyncio.ensure_future(fn(*args, **kwargs)))
+            
+            error = None
+            while tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, tasks = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not tasks:
+                raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        self._count("timeouts")
+        raise TimeoutError(f"{self.dependency} call exceeded {timeout:.1f}s")
+    
+    def _handle_failure(self, error: Exception, attempt: int) -> float:
+        """Record a failed attempt; returns the backoff before the next one, or raises when out of retries"""
+        if not is_retryable(error):
+            # The dependency answered; the request itself was bad
+            self.breaker.record_success()
+            raise error
+        if is_rate_limited(error):
+            # Quota backpressure: the dependency is up, so a burst of 429s must not open the circuit.
+            # The 429 is reported before the retry check, so the first one of a burst already pauses
+            # dispatch; the retry then waits out the scheduler pause instead of its own backoff
+            self.breaker.record_success()
+            self._count("rate_limited")
+            handler = _rate_limit_handler.get()
+            retry_after = retry_after_seconds(error)
+            if handler is not None:
+                delay = handler(retry_after)
+            else:
+                delay = max(self.policy.backoff(attempt), retry_after or 0.0)
+        else:
+            self.breaker.record_failure()
+            self._count("failures")
+            delay = self.policy.backoff(attempt)
+        if attempt >= self.policy.retries:
+            raise DependencyUnavailableError(self.dependency, f"{type(error).__name__}: {error}") from error
+        self._count("retries")
+        logger.warning(f"{self.dependency} call failed ({type(error).__name__}), retry {attempt + 1} in {delay:.2f}s")
+        return delay
+    
+    def _admit(self):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise DependencyUnavailableError(self.dependency, "circuit open")
+    
+    def call(self, fn: Callable, *args, hedge: bool = True, timeout: float = None, **kwargs) -> Any:
+        """
+        Call fn(*args, **kwargs) under the dependency policy
+        
+        Args:
+            hedge: Allow a hedged second request (when the policy enables hedging)
+            timeout: Deadline of each attempt instead of the policy timeout (not passed to fn)
+        
+        Raises:
+            DependencyUnavailableError: circuit open, or retryable failures exhausted the retries
+            Any non-retryable error of fn unchanged (bad request, cassette miss, ...)
+        """
+        self._count("calls")
+        for attempt in range(self.policy.retries + 1):
+            self._admit()
+            try:
+                result = self._attempt(fn, args, kwargs, hedge, timeout or self.policy.timeout)
+            except Exception as e:
+                time.sleep(self._handle_failure(e, attempt))
+                continue
+            
+            self.breaker.record_success()
+            return result
+    
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, hedge: bool = True, timeout: float = None,
+                    **kwargs) -> Any:
+        """Async counterpart of call() for coroutine functions (async SDK clients)"""
+        self._count("calls")
+        for attempt in range(self.policy.retries + 1):
+            self._admit()
+            try:
+                result = await self._aattempt(fn, args, kwargs, hedge, timeout or self.policy.timeout)
+            except Exception as e:
+                await asyncio.sleep(self._handle_failure(e, attempt))
+                continue
+            
+            self.breaker.record_success()
+            return result
+    
+    def state(self) -> Dict[str, Any]:
+        """Breaker state and counters"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {"state": self.breaker.state, "consecutive_failures": self.breaker.failures, **stats}
+
+
+_callers: Dict[str, ResilientCaller] = {}
+_callers_lock = threading.Lock()
+
+
+def get_caller(dependency: str) -> ResilientCaller:
+    """Process-wide caller for a dependency (llm, embedding, vector, weather)"""
+    caller = _callers.get(dependency)
+    if caller is None:
+        with _callers_lock:
+            caller = _callers.get(dependency)
+            if caller is None:
+                caller = ResilientCaller(dependency)
+                _callers[dependency] = caller
+    return caller
+
+
+def resilient_call(dependency: str, fn: Callable, *args, hedge: bool = True, timeout: float = None, **kwargs) -> Any:
+    """Shortcut for get_caller(dependency).call(fn, *args, **kwargs)"""
+    return get_caller(dependency).call(fn, *args, hedge=hedge, timeout=timeout, **kwargs)
+
+
+async def aresilient_call(dependency: str, fn: Callable[..., Awaitable[Any]], *args, hedge: bool = True,
+                          timeout: float = None, **kwargs) -> Any:
+    """Shortcut for await get_caller(dependency).acall(fn, *args, **kwargs)"""
+    return await get_caller(dependency).acall(fn, *args, hedge=hedge, timeout=timeout, **kwargs)
+
+
+def get_policy(dependency: str) -> CallPolicy:
+    """Policy of a dependency (e.g. to pass its timeout down to the SDK client)"""
+    return get_caller(dependency).policy
+
+
+def dependency_states() -> Dict[str, Dict[str, Any]]:
+    """Breaker state and counters of every dependency used so far"""
+    with _callers_lock:
+        callers = dict(_callers)
+    return {name: caller.state() for name, caller in sorted(callers.items())}
@@ -0,0 +1,110 @@
+"""
+Resource Registry - Process-wide clients and data shared by every Streamlit session
+"""
+
+import threading
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+from .config_manager import ConfigManager
+from .suggestion_engine import SuggestionEngine
+from .providers import create_chat_model
+from .async_runtime import loop_local
+
+if TYPE_CHECKING:
+    # Heavy SDKs (langchain, pinecone, openai) are imported on first use
+    from langchain_openai import ChatOpenAI
+    from .pinecone_rag_system import PineconeRAGSystem
+    from .stage_models import StageModel
+
+
+class ResourceRegistry:
+    """
+    Owns the expensive, thread-safe objects of the app so sessions only hold references:
+    - ConfigManager (SQLite opens a connection per call, cached settings are shared)
+    - PineconeRAGSystem (Pinecone index + Azure OpenAI clients)
+    - Chat model clients keyed by (model, temperature, max_tokens, timeout) (ChatOpenAI, or fakes with TRAVEL_PROVIDER=fake);
+      async callers get one per event loop, since async HTTP connections are bound to their loop
+    - SuggestionEngine (immutable suggestion templates)
+    
+    Per-session state (messages, active conversation, last RAG sources) stays in st.session_state.
+    """
+    
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._config_manager: Optional[ConfigManager] = None
+        self._rag_system: Optional["PineconeRAGSystem"] = None
+        self._suggestion_engine: Optional[SuggestionEngine] = None
+        self._llms: Dict[Tuple[str, float, Optional[int], Optional[float]], "ChatOpenAI"] = {}
+    
+    @property
+    def config_manager(self) -> ConfigManager:
+        """Shared configuration manager"""
+        if self._config_manager is None:
+            with self._lock:
+                if self._config_manager is None:
+                    self._config_manager = ConfigManager(self.db_path)
+        return self._config_manager
+    
+    @property
+    def rag_system(self) -> "PineconeRAGSystem":
+        """Shared Pinecone RAG system (index connection is opened once per process)"""
+        if self._rag_system is None:
+            with self._lock:
+                if self._rag_system is None:
+                    from .pinecone_rag_system import PineconeRAGSystem
+                    self._rag_system = PineconeRAGSystem()
+        return self._rag_system
+    
+    @property
+    def suggestion_engine(self) -> SuggestionEngine:
+        """Shared suggestion engine"""
+        if self._suggestion_engine is None:
+            with self._lock:
+                if self._suggestion_engine is None:
+                    self._suggestion_engine = SuggestionEngine(self.config_manager)
+        return self._suggestion_engine
+    
+    def get_llm(self, model: str = "GPT-4o-mini", temperature: float = 0.7, max_tokens: int = None,
+                timeout: float = None) -> "ChatOpenAI":
+        """Shared chat model client for a (model, temperature, max_tokens, timeout) combination"""
+        key = (model, round(float(temperature), 2), max_tokens, timeout)
+        llm = self._llms.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(key)
+                if llm is None:
+                    llm = create_chat_model(*key)
+                    self._llms[key] = llm
+        return llm
+    
+    def get_async_llm(self, model: str = "GPT-4o-mini", temperature: float = 0.7, max_tokens: int = None,
+                      timeout: float = None) -> "ChatOpenAI":
+        """Chat model client for ainvoke() in the running event loop"""
+        key = (model, round(float(temperature), 2), max_tokens, timeout)
+        return loop_local(("llm",) + key, lambda: create_chat_model(*key))
+    
+    def get_stage_llm(self, stage_model: "StageModel") -> "ChatOpenAI":
+        """Shared chat model client configured for a pipeline stage"""
+        return self.get_llm(stage_model.deployment, stage_model.temperature, stage_model.max_tokens,
+                            stage_model.timeout)
+    
+    def get_async_stage_llm(self, stage_model: "StageModel") -> "ChatOpenAI":
+        """Async chat model client of the running event loop configured for a pipeline stage"""
+        return self.get_async_llm(stage_model.deployment, stage_model.temperature, stage_model.max_tokens,
+                                  stage_model.timeout)
+
+
+_shared_registry: Optional[ResourceRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_resource_registry() -> ResourceRegistry:
+    """Get the process-wide resource registry (created on first use)"""
+    global _shared_registry
+    
+    if _shared_registry is None:
+        with _shared_lock:
+            if _shared_registry is None:
+                _shared_registry = ResourceRegistry()
+    return _shared_registry
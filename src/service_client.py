@@ -0,0 +1,138 @@
+"""
+Service Client - Talks to the headless travel assistant service (service.py) over HTTP
+Exposes the agent methods the Streamlit app uses, so the app can run without a local agent
+"""
+
+import os
+import json
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class TravelServiceClient:
+    """
+    HTTP stand-in for TravelPlannerAgent:
+    - plan_travel / get_suggestions / get_general_knowledge_response / update_booking_status return the same shapes
+    - stream_plan_travel yields the server-sent progress events of a turn
+    - Connection errors come back as unsuccessful results, like agent errors
+    """
+    
+    def __init__(self, base_url: str, timeout: float = 120.0, pool_size: int = 10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def _post(self, path: str, payload: Dict[str, Any]) -> Any:
+        response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    @staticmethod
+    def _plan_payload(user_input: str, chat_history: List, conversation_id: str,
+                      routing_hint: Dict[str, Any] = None) -> Dict[str, Any]:
+        return {
+            "query": user_input,
+            "history": [list(message) for message in chat_history or []],
+            "conversation_id": conversation_id,
+            "routing_hint": routing_hint
+        }
+    
+    def plan_travel(self, user_input: str, chat_history: List = None,
+                    conversation_id: str = None, routing_hint: Dict[str, Any] = None) -> Dict[str, Any]:
+        """One turn of plan_travel on the service"""
+        try:
+            return self._post("/v1/plan", self._plan_payload(user_input, chat_history, conversation_id, routing_hint))
+        except Exception as e:
+            logger.error(f"Travel service call failed: {e}")
+            return {
+                "success": False,
+                "response": f"Xin lỗi, không kết nối được dịch vụ trợ lý: {str(e)}",
+                "error": str(e),
+                "tool_used": "ERROR"
+            }
+    
+    def stream_plan_travel(self, user_input: str, chat_history: List = None, conversation_id: str = None,
+                           routing_hint: Dict[str, Any] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (event, data) while the turn runs: context, tool, response, result (or error), then suggestions"""
+        with self.session.post(
+            f"{self.base_url}/v1/plan/stream",
+            json=self._plan_payload(user_input, chat_history, conversation_id, routing_hint),
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            event, data_lines = None, []
+            for line in response.iter_lines(decode_unicode=True):
+                if line is None:
+                    continue
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[len("data:"):].strip())
+                elif not line and event:
+                    yield event, json.loads("\n".join(data_lines) or "{}")
+                    event, data_lines = None, []
+    
+    def get_suggestions(self, turn_id: str, timeout: float = None) -> Optional[List[Dict[str, Any]]]:
+        """Suggestions of a turn, or None while the service is still generating them"""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/v1/suggestions/{turn_id}",
+                params={"wait": timeout or 0},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            return None if data.get("pending") else data.get("suggestions", [])
+        except Exception as e:
+            logger.error(f"Suggestion fetch failed: {e}")
+            return []
+    
+    def get_general_knowledge_response(self, query: str) -> Dict[str, Any]:
+        """RAG fallback answer from general knowledge"""
+        try:
+            return self._post("/v1/general-knowledge", {"query": query})
+        except Exception as e:
+            return {
+                "success": False,
+                "response": f"Xin lỗi, có lỗi xảy ra: {str(e)}",
+                "error": str(e)
+            }
+    
+    def update_booking_status(self, conversation_id: str, booking_type: str, status: str) -> bool:
+        """Move the booking of a conversation to a new status"""
+        if not conversation_id:
+            return False
+        try:
+            response = self.session.put(
+                f"{self.base_url}/v1/conversations/{conversation_id}/bookings/{booking_type}",
+                json={"status": status},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json().get("success", False)
+        except Exception as e:
+            logger.error(f"Booking status update failed: {e}")
+            return False
+    
+    def health(self) -> Dict[str, Any]:
+        """Service health (dependency breakers, LLM queue)"""
+        response = self.session.get(f"{self.base_url}/health", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def get_service_client() -> Optional[TravelServiceClient]:
+    """Client for TRAVEL_SERVICE_URL, or None to run the agent in-process"""
+    base_url = os.getenv("TRAVEL_SERVICE_URL", "").strip()
+    if not base_url:
+        return None
+    return TravelServiceClient(base_url, timeout=float(os.getenv("TRAVEL_SERVICE_TIMEOUT", "120")))
@@ -0,0 +1,124 @@
+"""
+Stage Models - Per-stage model configuration (deployment, temperature, max_tokens, timeout)
+Classification stages can run on a small, fast deployment while answers use a stronger one;
+overrides are stored in agent_config["stage_models"] as {stage: {field: value}}
+"""
+
+from typing import Dict, Any, Optional
+
+# Configurable stages and their defaults (temperature None = the agent's creativity setting,
+# max_tokens None = no limit)
+STAGE_MODEL_DEFAULTS = {
+    "router": {"deployment": "GPT-4o-mini", "temperature": 0.0, "max_tokens": 150, "timeout": 10.0},
+    "rewrite": {"deployment": "GPT-4o-mini", "temperature": 0.2, "max_tokens": 200, "timeout": 15.0},
+    "rag_answer": {"deployment": "GPT-4o-mini", "temperature": 0.7, "max_tokens": 500, "timeout": 30.0},
+    "general_answer": {"deployment": "GPT-4o-mini", "temperature": None, "max_tokens": None, "timeout": 30.0},
+    "titling": {"deployment": "GPT-4o-mini", "temperature": 0.7, "max_tokens": 50, "timeout": 10.0},
+}
+
+STAGE_LABELS = {
+    "router": "Phân loại yêu cầu",
+    "rewrite": "Viết lại ngữ cảnh",
+    "rag_answer": "Trả lời từ Knowledge Base",
+    "general_answer": "Trả lời chung",
+    "titling": "Đặt tiêu đề hội thoại",
+}
+
+# Pipeline stage (tracing / scheduler name) -> configurable stage
+PIPELINE_STAGES = {
+    "intent_detection": "router",
+    "rewrite_context": "rewrite",
+    "rag.generation": "rag_answer",
+    "general_response": "general_answer",
+    "general_knowledge": "general_answer",
+    "conversation_title": "titling",
+}
+
+
+class StageModel:
+    """Model settings of one stage"""
+    
+    __slots__ = ("stage", "deployment", "temperature", "max_tokens", "timeout")
+    
+    def __init__(self, stage: str, deployment: str, temperature: float, max_tokens: Optional[int],
+                 timeout: float):
+        self.stage = stage
+        self.deployment = deployment
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+    
+    @property
+    def completion_budget(self) -> int:
+        """Expected completion tokens for the scheduler's rate budget"""
+        return self.max_tokens or 500
+
+
+def resolve_stage_model(stage: str, overrides: Dict[str, Any] = None,
+                        default_temperature: float = 0.7) -> StageModel:
+    """
+    Settings of a stage: defaults, then the stored overrides
+    
+    Args:
+        stage: Configurable stage ("router", ...) or pipeline stage ("intent_detection", ...)
+        overrides: agent_config["stage_models"]
+        default_temperature: Used when the stage has no temperature of its own
+    """
+    stage = PIPELINE_STAGES.get(stage, stage)
+    settings = dict(STAGE_MODEL_DEFAULTS.get(stage, STAGE_MODEL_DEFAULTS["general_answer"]))
+    for key, value in ((overrides or {}).get(stage) or {}).items():
+        # max_tokens 0 means the stage default
+        if key in settings and value not in (None, "") and (value or key != "max_tokens"):
+            settings[key] = value
+    
+    temperature = settings["temperature"]
+    max_tokens = settings["max_tokens"]
+    return StageModel(
+        stage,
+        str(settings["deployment"]),
+        round(float(default_temperature if temperature is None else temperature), 2),
+        int(max_tokens) if max_tokens else None,
+        float(settings["timeout"])
+    )
+
+
+def stage_overrides(stage: str, values: Dict[str, Any], stored: Dict[str, Any] = None,
+                    default_temperature: float = 0.7) -> Dict[str, Any]:
+    """
+    Overrides to store for a stage: only the fields that differ from its defaults, so stages keep
+    following default changes of later releases
+    
+    Args:
+        stage: Configurable stage
+        values: Edited settings (deployment, temperature, max_tokens, timeout; max_tokens 0 = default)
+        stored: Overrides currently stored for the stage
+        default_temperature: Creativity setting, followed by stages without a temperature of their own
+    """
+    defaults = STAGE_MODEL_DEFAULTS[stage]
+    overrides = {}
+    
+    deployment = str(values.get("deployment") or "").strip()
+    if deployment and deployment != defaults["deployment"]:
+        overrides["deployment"] = deployment
+    
+    temperature = values.get("temperature")
+    if temperature is not None:
+        temperature = round(float(temperature), 2)
+        if defaults["temperature"] is None:
+            # A stored temperature stays; an untouched one keeps following the creativity setting
+            keep = ((stored or {}).get("temperature") not in (None, "")
+                    or temperature != round(float(default_temperature), 2))
+        else:
+            keep = temperature != float(defaults["temperature"])
+        if keep:
+            overrides["temperature"] = temperature
+    
+    max_tokens = int(values.get("max_tokens") or 0) or None
+    if max_tokens is not None and max_tokens != defaults["max_tokens"]:
+        overrides["max_tokens"] = max_tokens
+    
+    timeout = values.get("timeout")
+    if timeout is not None and float(timeout) != float(defaults["timeout"]):
+        overrides["timeout"] = float(timeout)
+    
+    return overrides
@@ -10,6 +10,8 @@ from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from .gazetteer import get_gazetteer
+
 
 class ToolType(Enum):
     """Enum for different tool types"""
@@ -42,12 +44,27 @@ class Suggestion:
     tool_target: ToolType
     priority: float
     context_relevance: float
+    location: Optional[str] = None  # place the text refers to, passed on as a routing hint
     
     def total_score(self) -> float:
         """Calculate total relevance score"""
         return (self.priority * 0.6) + (self.context_relevance * 0.4)
 
 
+def routing_hint(suggestion: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Routing hint of a clicked suggestion (UI dict): plan_travel runs its target tool directly
+    
+    Returns:
+        {"tool": "WEATHER", "location": "Đà Nẵng" or None}, or None for an unknown target
+    """
+    try:
+        tool = ToolType(suggestion.get('tool_target')).value
+    except ValueError:
+        return None
+    return {"tool": tool, "location": suggestion.get('location')}
+
+
 class SuggestionEngine:
     """
     Main engine for generating contextual suggestions based on user interactions
@@ -55,9 +72,17 @@ class SuggestionEngine:
     
     def __init__(self, config_manager=None):
         self.config_manager = config_manager
-        self.suggestion_templates = self._load_suggestion_templates()
+        self.suggestion_templates = None
+        self._templates_config = None
+        self.apply_config()
+    
+    def apply_config(self):
+        """(Re)load settings from ConfigManager; templates are only rebuilt when their config changed"""
+        templates_config = self.config_manager.get_suggestion_templates_config() if self.config_manager else {}
+        if self.suggestion_templates is None or templates_config != self._templates_config:
+            self.suggestion_templates = self._load_suggestion_templates()
+            self._templates_config = templates_config
         
-        # Configuration from ConfigManager or defaults
         if self.config_manager:
             self.max_suggestions = self.config_manager.get_max_suggestions()
             self.min_relevance_score = self.config_manager.get_suggestion_min_score()
@@ -144,7 +169,8 @@ class SuggestionEngine:
                 category=template["category"],
                 tool_target=ToolType(template["tool_target"]),
                 priority=template["priority"],
-                context_relevance=self._calculate_context_relevance(template, context)
+                context_relevance=self._calculate_context_relevance(template, context),
+                location=location or None
             ))
         
         return suggestions
@@ -163,7 +189,8 @@ class SuggestionEngine:
                 category=template["category"],
                 tool_target=ToolType(template["tool_target"]),
                 priority=template["priority"],
-                context_relevance=self._calculate_context_relevance(template, context)
+                context_relevance=self._calculate_context_relevance(template, context),
+                location=location or None
             ))
         
         return suggestions
@@ -182,7 +209,8 @@ class SuggestionEngine:
                 category=template["category"],
                 tool_target=ToolType(template["tool_target"]),
                 priority=template["priority"],
-                context_relevance=self._calculate_context_relevance(template, context)
+                context_relevance=self._calculate_context_relevance(template, context),
+                location=location or None
             ))
         
         return suggestions
@@ -201,7 +229,8 @@ class SuggestionEngine:
                 category=template["category"],
                 tool_target=ToolType(template["tool_target"]),
                 priority=template["priority"],
-                context_relevance=self._calculate_context_relevance(template, context)
+                context_relevance=self._calculate_context_relevance(template, context),
+                location=location or None
             ))
         
         return suggestions
@@ -220,7 +249,8 @@ class SuggestionEngine:
                 category=template["category"],
                 tool_target=ToolType(template["tool_target"]),
                 priority=template["priority"],
-                context_relevance=self._calculate_context_relevance(template, context)
+                context_relevance=self._calculate_context_relevance(template, context),
+                location=location or None
             ))
         
         return suggestions
@@ -275,7 +305,8 @@ class SuggestionEngine:
                     category="cross_tool",
                     tool_target=next_tool,
                     priority=template["priority"] * 0.8,  # Slightly lower priority for cross-tool
-                    context_relevance=self._calculate_context_relevance(template, context)
+                    context_relevance=self._calculate_context_relevance(template, context),
+                    location=location or None
                 ))
         
         return suggestions
@@ -306,7 +337,8 @@ class SuggestionEngine:
                     category="location_specific",
                     tool_target=ToolType(template["tool_target"]),
                     priority=template["priority"],
-                    context_relevance=self._calculate_context_relevance(template, context) + 0.2  # Boost for location match
+                    context_relevance=self._calculate_context_relevance(template, context) + 0.2,  # Boost for location match
+                    location=location
                 ))
         
         return suggestions
@@ -348,7 +380,8 @@ class SuggestionEngine:
                         category=f"rag_{category}",
                         tool_target=ToolType(template["tool_target"]),
                         priority=template["priority"],
-                        context_relevance=self._calculate_context_relevance(template, context) + 0.3  # High boost for RAG match
+                        context_relevance=self._calculate_context_relevance(template, context) + 0.3,  # High boost for RAG match
+                        location=location if locations_found else None
                     ))
         
         return suggestions
@@ -430,20 +463,12 @@ class SuggestionEngine:
         return selected
     
     def _extract_location_from_text(self, text: str) -> Optional[str]:
-        """Extract location from text using simple pattern matching"""
-        # Vietnamese location patterns
-        vietnam_locations = [
-            "hà nội", "hồ chí minh", "đà nẵng", "nha trang", "huế", "hội an",
-            "sapa", "đà lạt", "phú quốc", "cần thơ", "vũng tầu", "phan thiết",
-            "hạ long", "ninh bình", "mù cang chải", "tam cốc", "bái đính"
-        ]
-        
-        text_lower = text.lower()
-        for location in vietnam_locations:
-            if location in text_lower:
-                return location.title()
+        """Extract location from text using the shared gazetteer"""
+        if not text:
+            return None
         
-        return None
+        location = get_gazetteer().find_first(text)
+        return location.name if location else None
     
     def _load_suggestion_templates(self) -> Dict:
         """Load suggestion templates from configuration"""
@@ -0,0 +1,158 @@
+"""
+Suggestion Prefetcher - Speculative work for the suggestions shown under an answer
+While the user reads, the top suggestions' tools run ahead of time: a full answer for high-score
+suggestions of side-effect-free tools, a cache warm-up (weather fetch, RAG retrieval) for the rest.
+Clicking a prefetched suggestion returns the stored answer instead of starting a cold turn
+"""
+
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from .async_runtime import get_agent_loop
+
+logger = logging.getLogger(__name__)
+
+# Tools whose turn only reads (bookings and travel plans collect and save state)
+PREFETCH_TOOLS = ("RAG", "WEATHER", "GENERAL")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+class SuggestionPrefetcher:
+    """
+    Prefetched answers per conversation, valid for its next turn only
+    - schedule() starts prefetches on the agent loop within the budget (top_k, max_inflight)
+    - take() hands over the answer for the next message (if it was prefetched) and cancels the rest
+    """
+    
+    def __init__(self, enabled: bool = False, top_k: int = 2, answer_score: float = 0.75,
+                 ttl: float = 120.0, max_inflight: int = 4, min_score: float = 0.4):
+        self.enabled = enabled
+        self.top_k = top_k
+        self.answer_score = answer_score
+        self.ttl = ttl
+        self.max_inflight = max_inflight
+        self.min_score = min_score  # same cut-off as render_inline_suggestions
+        self._entries: Dict[str, Dict[str, Tuple[float, Future]]] = {}
+        self._advanced: "OrderedDict[str, float]" = OrderedDict()  # conversation -> when its last turn started
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self.stats = {"scheduled": 0, "answers": 0, "hits": 0, "misses": 0, "skipped": 0}
+    
+    def schedule(self, conversation_id: Optional[str], suggestions: List[Dict[str, Any]],
+                 run: Callable[[Dict[str, Any], bool], Awaitable[Optional[Dict[str, Any]]]],
+                 issued_at: float):
+        """
+        Prefetch the top suggestions of a turn (never blocks)
+        
+        Args:
+            conversation_id: Conversation the suggestions were shown in
+            suggestions: Suggestion dicts (text, tool_target, score)
+            run: run(suggestion, full_answer) coroutine; returns the answer to store, or None
+            issued_at: time.monotonic() when the turn ended; late suggestions of a conversation
+                that has moved on, or older than ttl, are not prefetched
+        """
+        if not self.enabled or issued_at < time.monotonic() - self.ttl:
+            return
+        with self._lock:
+            if self._advanced.get(conversation_id or "", 0.0) > issued_at:
+                return
+        
+        candidates = sorted(
+            (s for s in suggestions if s.get("score", 0) > self.min_score),
+            key=lambda s: s.get("score", 0), reverse=True
+        )[:self.top_k]
+        entries: Dict[str, Tuple[float, Future]] = {}
+        for suggestion in candidates:
+            with self._lock:
+                if self._inflight >= self.max_inflight:
+                    self.stats["skipped"] += 1
+                    continue
+                self._inflight += 1
+            
+            full_answer = (suggestion.get("tool_target") in PREFETCH_TOOLS
+                           and suggestion.get("score", 0) >= self.answer_score)
+            future = asyncio.run_coroutine_threadsafe(run(suggestion, full_answer), get_agent_loop())
+            future.add_done_callback(self._on_done)
+            self.stats["scheduled"] += 1
+            if full_answer:
+                self.stats["answers"] += 1
+                entries[_normalize(suggestion.get("text"))] = (time.monotonic() + self.ttl, future)
+        
+        with self._lock:
+            stale = self._entries.pop(conversation_id or "", {})
+            if entries:
+                self._entries[conversation_id or ""] = entries
+        self._cancel(stale.values())
+    
+    def _on_done(self, future: Future):
+        with self._lock:
+            self._inflight -= 1
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Suggestion prefetch failed: {future.exception()}")
+    
+    @staticmethod
+    def _cancel(entries):
+        for _, future in entries:
+            future.cancel()
+    
+    def take(self, conversation_id: Optional[str], user_input: str) -> Optional[Future]:
+        """
+        Prefetched answer for the next message of a conversation (a concurrent Future that may
+        still be running), or None; other prefetches of the conversation are dropped either way
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._advanced[conversation_id or ""] = now
+            self._advanced.move_to_end(conversation_id or "")
+            # Only suggestions issued within ttl can still be scheduled late, so older marks are dropped
+            while self._advanced and next(iter(self._advanced.values())) < now - self.ttl:
+                self._advanced.popitem(last=False)
+            entries = self._entries.pop(conversation_id or "", None)
+        if not entries:
+            return None
+        
+        expires, future = entries.pop(_normalize(user_input), (0.0, None))
+        self._cancel(entries.values())
+        if future is None or expires < time.monotonic():
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return future
+    
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, inflight=self._inflight, conversations=len(self._entries),
+                        tracked=len(self._advanced))
+
+
+_shared_prefetcher: Optional[SuggestionPrefetcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_suggestion_prefetcher() -> SuggestionPrefetcher:
+    """Get the process-wide prefetcher (off unless SUGGESTION_PREFETCH=true)"""
+    global _shared_prefetcher
+    
+    if _shared_prefetcher is None:
+        with _shared_lock:
+            if _shared_prefetcher is None:
+                _shared_prefetcher = SuggestionPrefetcher(
+                    enabled=os.getenv("SUGGESTION_PREFETCH", "false").lower() == "true",
+                    top_k=int(os.getenv("PREFETCH_TOP_K", "2")),
+                    answer_score=float(os.getenv("PREFETCH_ANSWER_SCORE", "0.75")),
+                    ttl=float(os.getenv("PREFETCH_TTL", "120")),
+                    max_inflight=int(os.getenv("PREFETCH_MAX_INFLIGHT", "4"))
+                )
+    return _shared_prefetcher
@@ -0,0 +1,123 @@
+"""
+Suggestion Worker - Follow-up suggestions generated after the answer is returned
+plan_travel submits the suggestion job keyed by turn id and returns; the UI (or the service)
+picks the result up when it is ready, so answer latency never includes suggestion work
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from .tracing import submit_with_context
+
+logger = logging.getLogger(__name__)
+
+
+class SuggestionWorker:
+    """
+    Background suggestion jobs by turn id
+    - submit() never blocks; when the backlog is full the job is dropped (suggestions are optional)
+    - get() returns None while a job is running, its suggestions when done, [] for unknown/failed jobs
+    - Finished results are kept for the newest max_results turns
+    """
+    
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, max_results: int = 500):
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="suggestions")
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.failed = 0
+    
+    def _pending(self) -> int:
+        return sum(1 for future in self._jobs.values() if not future.done())
+    
+    def submit(self, key: str, fn: Callable[..., List[Dict[str, Any]]], *args, **kwargs) -> bool:
+        """
+        Run fn(*args, **kwargs) in the background (keeping the current turn for tracing)
+        
+        Returns:
+            False when the job was dropped because the backlog is full
+        """
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                self.dropped += 1
+                logger.warning(f"Suggestion backlog full, dropping job for turn {key}")
+                return False
+            future = submit_with_context(self._executor, fn, *args, **kwargs)
+            future.add_done_callback(self._on_done)
+            self._jobs[key] = future
+            self._jobs.move_to_end(key)
+            
+            # Forget the oldest finished jobs
+            while len(self._jobs) > self.max_results:
+                oldest_key, oldest = next(iter(self._jobs.items()))
+                if not oldest.done():
+                    break
+                del self._jobs[oldest_key]
+        return True
+    
+    def _on_done(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.failed += 1
+            logger.error(f"Suggestion job failed: {future.exception()}")
+    
+    @staticmethod
+    def _result(future: Future) -> List[Dict[str, Any]]:
+        if future.cancelled() or future.exception() is not None:
+            return []
+        return future.result() or []
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Suggestions of a turn, or None while they are still being generated"""
+        with self._lock:
+            future = self._jobs.get(key)
+        if future is None:
+            return []
+        if not future.done():
+            return None
+        return self._result(future)
+    
+    def wait(self, key: str, timeout: float = None) -> Optional[List[Dict[str, Any]]]:
+        """Block until the suggestions of a turn are ready (None if still running after timeout)"""
+        with self._lock:
+            future = self._jobs.get(key)
+        if future is None:
+            return []
+        try:
+            future.exception(timeout=timeout)
+        except FutureTimeout:
+            return None
+        return self._result(future)
+    
+    def state(self) -> Dict[str, int]:
+        """Backlog and counters for health endpoints"""
+        with self._lock:
+            return {
+                "pending": self._pending(),
+                "stored": len(self._jobs),
+                "dropped": self.dropped,
+                "failed": self.failed
+            }
+
+
+_shared_worker: Optional[SuggestionWorker] = None
+_shared_lock = threading.Lock()
+
+
+def get_suggestion_worker() -> SuggestionWorker:
+    """Get the process-wide suggestion worker"""
+    global _shared_worker
+    
+    if _shared_worker is None:
+        with _shared_lock:
+            if _shared_worker is None:
+                _shared_worker = SuggestionWorker(
+                    max_workers=int(os.getenv("SUGGESTION_WORKERS", "2")),
+                    max_pending=int(os.getenv("SUGGESTION_MAX_PENDING", "64"))
+                )
+    return _shared_worker
@@ -0,0 +1,243 @@
+"""
+Tracing - Lightweight per-stage timing spans for plan_travel turns
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Active turn of the current thread / task (copied into worker threads with submit_with_context)
+_current_turn: contextvars.ContextVar = contextvars.ContextVar("trace_turn", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+
+class _Turn:
+    """Ids and sampling decision shared by every span of one user turn"""
+    
+    __slots__ = ("turn_id", "conversation_id", "sampled", "attrs")
+    
+    def __init__(self, turn_id: str, conversation_id: Optional[str], sampled: bool):
+        self.turn_id = turn_id
+        self.conversation_id = conversation_id
+        self.sampled = sampled
+        self.attrs: Dict[str, Any] = {}  # Attributes of the root "turn" span
+
+
+class Tracer:
+    """
+    Records timing spans for the stages of a turn:
+    - Spans carry turn_id, conversation_id, parent stage and free-form attributes
+    - Sampling is decided once per turn, so a sampled turn is always complete
+    - Spans are buffered and appended to a JSONL sink once per turn (one file write)
+    - Recent spans stay in memory for summary() percentiles
+    """
+    
+    def __init__(self, sink_path: str = None, sample_rate: float = 1.0, enabled: bool = True,
+                 max_recent: int = 5000, flush_every: int = 50):
+        self.sink_path = sink_path
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.flush_every = flush_every
+        
+        self._recent: deque = deque(maxlen=max_recent)
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        
+        if sink_path:
+            os.makedirs(os.path.dirname(os.path.abspath(sink_path)), exist_ok=True)
+    
+    @contextmanager
+    def turn(self, conversation_id: str = None, turn_id: str = None):
+        """
+        Open a turn; spans recorded inside it share its ids
+        The turn context is set even when tracing is off so other recorders (usage) can attribute to it
+        """
+        sampled = self.enabled and random.random() < self.sample_rate
+        turn = _Turn(turn_id or uuid.uuid4().hex[:12], conversation_id, sampled)
+        token = _current_turn.set(turn)
+        try:
+            with self.span("turn") as attrs:
+                turn.attrs = attrs
+                yield turn
+        finally:
+            _current_turn.reset(token)
+            self.flush()
+    
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        """
+        Time a stage
+        
+        Usage:
+            with tracer.span("rag.vector_query", top_k=5) as span:
+                ...
+                span["matches"] = len(matches)  # optional extra attributes
+        """
+        turn = _current_turn.get()
+        sampled = turn.sampled if turn is not None else random.random() < self.sample_rate
+        if not self.enabled or not sampled:
+            yield attrs
+            return
+        
+        parent = _current_span.get()
+        token = _current_span.set(stage)
+        status = "ok"
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            _current_span.reset(token)
+            self._record({
+                "ts": start_wall,
+                "turn_id": turn.turn_id if turn else None,
+                "conversation_id": turn.conversation_id if turn else None,
+                "stage": stage,
+                "parent": parent,
+                "duration_ms": round(duration_ms, 3),
+                "status": status,
+                "attrs": attrs
+            })
+    
+    def current_turn_id(self) -> Optional[str]:
+        """Turn id of the active turn, if any"""
+        turn = _current_turn.get()
+        return turn.turn_id if turn else None
+    
+    def tag_turn(self, **attrs):
+        """Add attributes to the root span of the active turn (e.g. the routed tool)"""
+        turn = _current_turn.get()
+        if turn is not None:
+            turn.attrs.update(attrs)
+    
+    def _record(self, span: Dict[str, Any]):
+        """Buffer a finished span"""
+        with self._lock:
+            self._recent.append(span)
+            if self.sink_path:
+                self._pending.append(span)
+            flush_now = span["turn_id"] is None and len(self._pending) >= self.flush_every
+        if flush_now:
+            self.flush()
+    
+    def flush(self):
+        """Append buffered spans to the JSONL sink"""
+        if not self.sink_path:
+            return
+        
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        
+        try:
+            with open(self.sink_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(span, ensure_ascii=False, default=str) + "\n" for span in pending))
+        except Exception as e:
+            logger.warning(f"Could not write trace spans: {e}")
+    
+    def recent_spans(self, turn_id: str = None) -> List[Dict[str, Any]]:
+        """Spans kept in memory, optionally for one turn"""
+        with self._lock:
+            spans = list(self._recent)
+        if turn_id is not None:
+            spans = [span for span in spans if span["turn_id"] == turn_id]
+        return spans
+    
+    def summary(self, stages: Iterable[str] = None) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 per stage over the spans kept in memory"""
+        return summarize_spans(self.recent_spans(), stages)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_spans(spans: Iterable[Dict[str, Any]], stages: Iterable[str] = None) -> Dict[str, Dict[str, float]]:
+    """Group spans by stage and compute count, mean, p50, p95, p99 and max duration (ms)"""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    wanted = set(stages) if stages else None
+    
+    for span in spans:
+        stage = span["stage"]
+        if wanted is not None and stage not in wanted:
+            continue
+        durations.setdefault(stage, []).append(span["duration_ms"])
+        if span.get("status", "ok") != "ok":
+            errors[stage] = errors.get(stage, 0) + 1
+    
+    return {
+        stage: {
+            "count": len(values),
+            "errors": errors.get(stage, 0),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values)
+        }
+        for stage, values in sorted(durations.items())
+    }
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """Read spans back from a JSONL sink"""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def current_turn() -> Optional[_Turn]:
+    """The active turn (turn_id, conversation_id, attrs), if any"""
+    return _current_turn.get()
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the current turn, so spans in worker threads join it"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_shared_tracer: Optional[Tracer] = None
+_shared_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer (created on first use)"""
+    global _shared_tracer
+    
+    if _shared_tracer is None:
+        with _shared_lock:
+            if _shared_tracer is None:
+                default_sink = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "traces.jsonl")
+                _shared_tracer = Tracer(
+                    sink_path=os.getenv("TRACE_SINK", default_sink) or None,
+                    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+                    enabled=os.getenv("TRACE_ENABLED", "true").lower() == "true"
+                )
+    return _shared_tracer
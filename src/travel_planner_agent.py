@@ -3,15 +3,29 @@ Travel Planner Agent - Unified agent for travel planning with RAG and tools
 """
 
 import os
-from typing import Dict, Any, List
-from langchain.agents import initialize_agent, Tool
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-import requests
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import json
-from .pinecone_rag_system import PineconeRAGSystem
-from .config_manager import ConfigManager
-from .suggestion_engine import SuggestionEngine, SuggestionContext, ToolType
+import re
+from .weather_client import get_weather_client
+from .extraction_engine import get_extraction_engine
+from .gazetteer import get_gazetteer, KIND_PRIORITY
+from .booking_state import BookingState, COLLECTING
+from .tracing import get_tracer, submit_with_context
+from .usage_tracker import get_usage_tracker
+from .resilience import resilient_call, aresilient_call
+from .llm_scheduler import get_llm_scheduler, estimate_tokens, background_priority, in_background
+from .prompt_registry import Prompt, get_prompt_registry, prompt_text
+from .history_window import build_history_window
+from .async_runtime import run_sync, to_thread
+from .resource_registry import ResourceRegistry, get_resource_registry
+from .suggestion_engine import SuggestionContext, ToolType, routing_hint
+from .suggestion_worker import get_suggestion_worker
+from .suggestion_prefetcher import get_suggestion_prefetcher, PREFETCH_TOOLS
+from .degradation import get_degradation_controller, NORMAL, LEAN, KEYWORD_ROUTING, RETRIEVAL_ONLY, MODE_NAMES
 
 
 class TravelPlannerAgent:
@@ -23,7 +37,15 @@ class TravelPlannerAgent:
     - Travel planning with database storage
     """
     
-    def __init__(self, debug_mode: bool = False):
+    # Compound messages: most tools run in one turn, and the tools that collect and save state
+    MAX_INTENTS = 3
+    STATEFUL_TOOLS = ("HOTEL", "CAR", "TRAVEL_PLAN")
+    
+    # Multi-city weather fan-out limits
+    WEATHER_MAX_CONCURRENCY = 5
+    WEATHER_CITY_TIMEOUT = 8.0
+    
+    def __init__(self, debug_mode: bool = False, registry: ResourceRegistry = None):
         self.openai_api_key = os.getenv("AZURE_OPENAI_API_KEY")
         self.weather_api_key = os.getenv("WEATHER_API_KEY")
         self.openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -31,37 +53,120 @@ class TravelPlannerAgent:
         # Debug mode setting
         self.debug_mode = debug_mode or os.getenv("DEBUG_TRAVEL_AGENT", "false").lower() == "true"
         
-        # Initialize configuration manager
-        self.config_manager = ConfigManager()
+        # Clients, indexes and templates are shared by every session in the process
+        self.registry = registry or get_resource_registry()
+        self.config_manager = self.registry.config_manager
+        self.suggestion_engine = self.registry.suggestion_engine
+        
+        # Shared weather client (pooled HTTP session + city cache)
+        self.weather_client = get_weather_client()
+        
+        # Precompiled slot extraction shared by booking and travel planning
+        self.extraction_engine = get_extraction_engine()
+        
+        # Shared location gazetteer (provinces, cities, landmarks)
+        self.gazetteer = get_gazetteer()
+        
+        # Per-stage timing spans (JSONL sink, sampled per turn)
+        self.tracer = get_tracer()
         
-        # Initialize Pinecone RAG system
-        self.rag_system = PineconeRAGSystem()
+        # Token and cost accounting per stage, tool and conversation
+        self.usage_tracker = get_usage_tracker()
         
-        # Initialize Suggestion Engine
-        self.suggestion_engine = SuggestionEngine(self.config_manager)
+        # Shared LLM admission control (rate budgets, priority by stage)
+        self.llm_scheduler = get_llm_scheduler()
+        
+        # Versioned prompt templates (static system prefix + per-turn user message)
+        self.prompts = get_prompt_registry()
+        
+        # Suggestions are generated after the answer is returned (set to false to return them with it)
+        self.suggestion_worker = get_suggestion_worker()
+        self.background_suggestions = os.getenv("BACKGROUND_SUGGESTIONS", "true").lower() == "true"
+        
+        # Optional speculative answers for the suggestions shown under an answer
+        self.prefetcher = get_suggestion_prefetcher()
+        
+        # Rolling stage latency against SLOs; picks a cheaper pipeline while one is breached
+        self.degradation = get_degradation_controller()
         
         # Initialize variables for tracking sources and fallback
         self.last_rag_sources = []
         self.no_relevant_info = False
         self.fallback_query = ""
         
-        # Initialize LLM with configurable temperature
-        self.llm = ChatOpenAI(
-            model="GPT-4o-mini",
-            temperature=self.config_manager.get_temperature(),
-            openai_api_key=self.openai_api_key,
-            base_url=self.openai_endpoint
-        )
-        
-        # Setup tools and agent
-        self.tools = self._setup_tools()
-        self.agent = self._setup_agent()
+        # LLM client, LangChain tools and agent are created on first use;
+        # plan_travel routes tools itself and never needs the LangChain agent
+        self._llm = None
+        self._tools = None
+        self._agent = None
+        self.config_version = self.config_manager.config_version
         
         if self.debug_mode:
             print("🐛 DEBUG MODE ENABLED for TravelPlannerAgent")
         
-    def _setup_tools(self) -> List[Tool]:
+    @property
+    def rag_system(self):
+        """Shared Pinecone RAG system (connected on first use)"""
+        return self.registry.rag_system
+    
+    @property
+    def llm(self):
+        """Shared LLM client of the general answer stage (used by the LangChain agent)"""
+        if self._llm is None:
+            self._llm = self.registry.get_stage_llm(self.config_manager.get_stage_model("general_answer"))
+        return self._llm
+    
+    @property
+    def tools(self) -> List:
+        """LangChain tools (built on first access)"""
+        if self._tools is None:
+            self._tools = self._setup_tools()
+        return self._tools
+    
+    @property
+    def agent(self):
+        """LangChain conversational agent (built on first access)"""
+        if self._agent is None:
+            self._agent = self._setup_agent()
+        return self._agent
+    
+    def _llm_predict(self, prompt: Prompt, stage: str, prompt_key: str = None) -> str:
+        """Call the stage's model, with a timing span, admission control and token accounting"""
+        stage_model = self.config_manager.get_stage_model(stage)
+        llm = self.registry.get_stage_llm(stage_model)
+        text = prompt_text(prompt)
+        with self.tracer.span(f"llm.{stage}", prompt_chars=len(text), model=stage_model.deployment,
+                              prompt=prompt_key) as span:
+            with self.llm_scheduler.slot(stage, estimate_tokens(text, stage_model.completion_budget)) as slot:
+                span["queued_ms"] = round(slot.queued_ms, 1)
+                with self.usage_tracker.track(stage, stage_model.deployment) as call:
+                    call.response = slot.response = resilient_call(
+                        "llm", llm.invoke, prompt, timeout=stage_model.timeout
+                    )
+        return call.response.content
+    
+    async def _allm_predict(self, prompt: Prompt, stage: str, prompt_key: str = None) -> str:
+        """Async _llm_predict: waits for admission and the response without holding a thread"""
+        stage_model = self.config_manager.get_stage_model(stage)
+        llm = self.registry.get_async_stage_llm(stage_model)
+        text = prompt_text(prompt)
+        start = time.perf_counter()
+        with self.tracer.span(f"llm.{stage}", prompt_chars=len(text), model=stage_model.deployment,
+                              prompt=prompt_key) as span:
+            async with self.llm_scheduler.aslot(stage, estimate_tokens(text, stage_model.completion_budget)) as slot:
+                span["queued_ms"] = round(slot.queued_ms, 1)
+                with self.usage_tracker.track(stage, stage_model.deployment) as call:
+                    call.response = slot.response = await aresilient_call(
+                        "llm", llm.ainvoke, prompt, timeout=stage_model.timeout
+                    )
+        # Queue time included: it is what the user waits for (prefetch calls queue last on purpose)
+        if not in_background():
+            self.degradation.observe(stage, (time.perf_counter() - start) * 1000)
+        return call.response.content
+    
+    def _setup_tools(self) -> List:
         """Setup all tools for the travel planner agent"""
+        from langchain.agents import Tool
         
         def rag_search_tool(query: str) -> str:
             """Search travel knowledge base using RAG"""
@@ -90,13 +195,11 @@ class TravelPlannerAgent:
         def weather_tool(city: str) -> str:
             """Get weather information for a city"""
             try:
-                url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.weather_api_key}&units=metric"
-                response = requests.get(url, timeout=10)
+                data = self.weather_client.get_current(city)
                 
-                if response.status_code != 200:
+                if data is None:
                     return f"Không tìm thấy thông tin thời tiết cho {city}"
                 
-                data = response.json()
                 weather_info = (
                     f"Thời tiết tại {city}:\n"
                     f"- Nhiệt độ: {data['main']['temp']}°C\n"
@@ -205,6 +308,7 @@ class TravelPlannerAgent:
     
     def _setup_agent(self):
         """Setup the conversational agent"""
+        from langchain.agents import initialize_agent
         return initialize_agent(
             tools=self.tools,
             llm=self.llm,
@@ -213,18 +317,231 @@ class TravelPlannerAgent:
             max_iterations=3
         )
     
-    def plan_travel(self, user_input: str, chat_history: List = None) -> Dict[str, Any]:
+    def apply_config(self):
+        """
+        Pick up changed settings in place (no new Pinecone connection, tools or templates)
+        Personality and context window are read from ConfigManager on every turn;
+        only values captured at construction time need refreshing here.
+        """
+        self.config_version = self.config_manager.config_version
+        
+        # Shared clients are cached per stage settings, so re-resolving them is cheap
+        self._llm = None
+        self._agent = None
+        
+        self.suggestion_engine.apply_config()
+        
+        if self.debug_mode:
+            print(f"🔄 [DEBUG] Applied config version {self.config_version}")
+    
+    def _sync_config(self):
+        """Apply settings saved since the last turn (here or, e.g. from the app in front of the service, elsewhere)"""
+        self.config_manager.reload_if_changed()
+        if self.config_version != self.config_manager.config_version:
+            self.apply_config()
+    
+    def plan_travel(self, user_input: str, chat_history: List = None,
+                    conversation_id: str = None, routing_hint: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Main method to handle travel planning requests with smart tool detection
         
         Args:
             user_input: User's travel planning query
             chat_history: Previous conversation history
-            
+            conversation_id: Active conversation, used to keep unfinished bookings between turns
+            routing_hint: {"tool", "location"} of a clicked suggestion; runs that tool without intent detection
+        
         Returns:
             Dictionary with response and metadata
         """
+        # Thin wrapper: the turn runs on the shared agent event loop
+        return run_sync(self.aplan_travel(user_input, chat_history, conversation_id, routing_hint=routing_hint))
+    
+    async def aplan_travel(self, user_input: str, chat_history: List = None, conversation_id: str = None,
+                           on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                           routing_hint: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Async plan_travel: every stage awaits its I/O, so one event loop serves many conversations
+        
+        Args:
+            user_input: User's travel planning query
+            chat_history: Previous conversation history
+            conversation_id: Active conversation, used to keep unfinished bookings between turns
+            on_event: Optional progress callback(event, data), called on the event loop for
+                "context", "tool" and "response" (before suggestions are added)
+            routing_hint: {"tool", "location"} of a clicked suggestion (see plan_travel)
+            
+        Returns:
+            Dictionary with response and metadata; with suggestions_pending the suggestions
+            are still being generated (get_suggestions(result["turn_id"]))
+        """
+        prefetched = await self._atake_prefetched(conversation_id, user_input)
+        if prefetched is not None:
+            for event, data in (("context", {"context": prefetched.get("context", "")}),
+                                ("tool", {"tool": prefetched.get("tool_used")}),
+                                ("response", {key: prefetched.get(key) for key in ("response", "tool_used", "success")})):
+                self._emit(on_event, event, data)
+            return prefetched
+        
+        start = time.perf_counter()
+        with self.tracer.turn(conversation_id) as turn:
+            try:
+                result = await self._aplan_travel_turn(user_input, chat_history, conversation_id, on_event,
+                                                       routing_hint=routing_hint)
+            finally:
+                await to_thread(self.usage_tracker.flush)
+            self.degradation.observe("turn", (time.perf_counter() - start) * 1000)
+            result["turn_id"] = turn.turn_id
+            turn.attrs["tool_used"] = result.get("tool_used")
+            turn.attrs["success"] = result.get("success", False)
+            return result
+    
+    async def _aexecute_tool(self, tool: str, query: str, context: str, conversation_id: str,
+                             chat_history: List, mode: int = NORMAL) -> Dict[str, Any]:
+        """Run one tool, traced as tool.<name>; in retrieval-only mode answers come from the knowledge base"""
+        with self.tracer.span(f"tool.{tool.lower()}"):
+            if tool == "RAG":
+                start = time.perf_counter()
+                result = await self._aexecute_rag_search(query, context, generate=mode < RETRIEVAL_ONLY)
+                if not in_background():
+                    self.degradation.observe("rag", (time.perf_counter() - start) * 1000)
+                return result
+            elif tool == "GENERAL" and mode >= RETRIEVAL_ONLY:
+                return await self._adegraded_general_response(query, context)
+            elif tool == "WEATHER":
+                return await self._aexecute_weather_query(query, context)
+            elif tool == "HOTEL":
+                # Booking extraction is CPU + SQLite; keep it off the event loop
+                return await to_thread(self._execute_hotel_booking, query, context, conversation_id)
+            elif tool == "CAR":
+                return await to_thread(self._execute_car_booking, query, context, conversation_id)
+            elif tool == "TRAVEL_PLAN":
+                return await self._aexecute_travel_planning(query, context, chat_history)
+            else:
+                # Default to general conversation
+                return await self._aexecute_general_response(query, context)
+    
+    async def _aexecute_intents(self, intents: List[Dict[str, str]], context: str, conversation_id: str,
+                                chat_history: List, mode: int = NORMAL) -> Dict[str, Any]:
+        """
+        Run the tools of a compound message concurrently and compose one response
+        - Weather requests are merged into one multi-city lookup
+        - Only the first stateful tool (booking, travel plan) runs: the app confirms one pending item at a time
+        - At most MAX_INTENTS tools run; every request left out gets a follow-up note
+        """
+        weather = [intent for intent in intents if intent["tool"] == "WEATHER"]
+        if len(weather) > 1:
+            merged = {"tool": "WEATHER", "query": " và ".join(intent["query"] for intent in weather)}
+            intents = [merged if intent is weather[0] else intent for intent in intents
+                       if intent["tool"] != "WEATHER" or intent is weather[0]]
+        
+        runnable, deferred = [], []
+        for intent in intents:
+            if len(runnable) >= self.MAX_INTENTS or (
+                    intent["tool"] in self.STATEFUL_TOOLS and any(i["tool"] in self.STATEFUL_TOOLS for i in runnable)):
+                deferred.append(intent)
+            else:
+                runnable.append(intent)
+        
+        results = await asyncio.gather(*(
+            self._aexecute_tool(intent["tool"], intent["query"], context, conversation_id, chat_history, mode)
+            for intent in runnable
+        ), return_exceptions=True)
+        
+        sections, sources, parts = [], [], []
+        for intent, result in zip(runnable, results):
+            if isinstance(result, Exception):
+                result = {"success": False, "response": f"Lỗi xử lý '{intent['query']}': {str(result)}",
+                          "tool_used": intent["tool"]}
+            elif result.get("no_relevant_info"):
+                result = dict(result, response=f"Chưa có thông tin về \"{intent['query']}\" trong cơ sở dữ liệu.")
+            parts.append(result)
+            if result.get("response"):
+                sections.append(result["response"])
+            sources.extend(result.get("sources") or [])
+        for intent in deferred:
+            sections.append(f"📌 Mình sẽ xử lý \"{intent['query']}\" sau khi yêu cầu trên hoàn tất, bạn gửi lại ở tin nhắn tiếp theo nhé.")
+        
+        # Booking / travel plan metadata drives the confirmation flow, so its result leads
+        primary_index = next((i for i, intent in enumerate(runnable) if intent["tool"] in self.STATEFUL_TOOLS), 0)
+        composed = dict(parts[primary_index])
+        composed.update({
+            "success": any(part.get("success", False) for part in parts),
+            "response": "\n\n---\n\n".join(sections),
+            "sources": sources,
+            "context": context,
+            "primary_tool": runnable[primary_index]["tool"],
+            "tools_used": [part.get("tool_used") for part in parts],
+            "intents": intents
+        })
+        composed.pop("no_relevant_info", None)
+        for part in parts:
+            # Weather city and RAG flag of the other parts
+            if not composed.get("city") and part.get("city"):
+                composed["city"] = part["city"]
+            composed["rag_used"] = composed.get("rag_used") or part.get("rag_used", False)
+        return composed
+    
+    async def _atake_prefetched(self, conversation_id: str, user_input: str) -> Optional[Dict[str, Any]]:
+        """Result of a prefetched suggestion answer for this message (waits if still running)"""
+        future = self.prefetcher.take(conversation_id, user_input)
+        if future is None:
+            return None
+        try:
+            result = await asyncio.wrap_future(future)
+        except (Exception, asyncio.CancelledError) as e:
+            if self.debug_mode:
+                print(f"⚠️ [DEBUG] Prefetched answer unavailable: {str(e)}")
+            return None
+        if result is None:
+            return None
+        
+        if self.debug_mode:
+            print(f"⚡ [DEBUG] Serving prefetched answer for '{user_input}'")
+        return dict(result, prefetched=True)
+    
+    async def _aprefetch_suggestion(self, suggestion: Dict[str, Any], full_answer: bool, chat_history: List,
+                                    context: str, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Speculative work for a displayed suggestion (LLM calls queue behind interactive ones)
+        
+        Returns:
+            The full answer to serve if the suggestion is clicked, None for warm-ups
+        """
+        text = suggestion.get("text", "")
+        with background_priority():
+            if full_answer:
+                with self.tracer.turn(conversation_id) as turn:
+                    turn.attrs["prefetch"] = True
+                    try:
+                        result = await self._aplan_travel_turn(text, chat_history, conversation_id, speculative=True,
+                                                               routing_hint=routing_hint(suggestion))
+                    finally:
+                        await to_thread(self.usage_tracker.flush)
+                    result["turn_id"] = turn.turn_id
+                # Turns routed to a tool that saves state were not run
+                return result if result.get("success") else None
+            
+            # Warm the tool's cache: weather client TTL cache, or a one-shot RAG retrieval
+            with self.tracer.span("prefetch.warm", tool=suggestion.get("tool_target")):
+                if suggestion.get("tool_target") == "WEATHER":
+                    await self._aexecute_weather_query(text, context)
+                elif suggestion.get("tool_target") == "RAG":
+                    rag_system = await to_thread(getattr, self, "rag_system")
+                    await rag_system.aprefetch_search(text, ttl=self.prefetcher.ttl)
+            return None
+    
+    async def _aplan_travel_turn(self, user_input: str, chat_history: List, conversation_id: str,
+                                 on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                                 speculative: bool = False, routing_hint: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        One traced turn of plan_travel: rewrite context, detect intent, run the tool, suggest
+        speculative turns (prefetch) stop before tools that save state and do not prefetch further;
+        a routing hint skips intent detection, and context rewriting too when it names the location
+        """
         try:
+            self._sync_config()
+            
             # Prepare chat history for agent
             if chat_history is None:
                 chat_history = []
@@ -234,44 +551,113 @@ class TravelPlannerAgent:
                 print(f"📝 User input: '{user_input}'")
                 print(f"📚 Chat history: {len(chat_history)} messages")
             
+            hinted_tool, hinted_location = self._read_routing_hint(routing_hint)
+            
+            # Cheaper pipeline while a stage is over its latency SLO (see src/degradation.py)
+            mode = self.degradation.mode
+            if mode > NORMAL:
+                self.tracer.tag_turn(mode=MODE_NAMES[mode])
+                if self.debug_mode:
+                    print(f"🐢 [DEBUG] Degraded mode: {MODE_NAMES[mode]}")
+            
             # Step 1: Rewrite top 5 last messages for context
-            rewritten_context = self._rewrite_conversation_context(user_input, chat_history)
+            # (a suggestion that names its location already carries the context the rewrite would recover)
+            with self.tracer.span("rewrite_context", history=len(chat_history)) as span:
+                if hinted_tool and hinted_location:
+                    rewritten_context = f"Người dùng đang quan tâm đến {hinted_location}."
+                    span["shortcut"] = "routing_hint"
+                elif mode >= LEAN:
+                    rewritten_context = self._extractive_context(user_input, chat_history)
+                    span["shortcut"] = "degraded"
+                else:
+                    rewritten_context = await self._arewrite_conversation_context(user_input, chat_history)
+            self._emit(on_event, "context", {"context": rewritten_context})
             
             # Step 2: Detect which tool to use based on intent
-            detected_tool = self._detect_tool_intent(user_input, rewritten_context)
+            # A clicked suggestion names its tool, and a bare answer to the questions of an
+            # unfinished booking continues it; both skip intent detection
+            with self.tracer.span("intent_detection") as span:
+                open_booking = None if hinted_tool or speculative else await to_thread(
+                    BookingState.load_open, self._booking_db(), conversation_id
+                )
+                if open_booking and open_booking.status != COLLECTING:
+                    open_booking = None
+                if hinted_tool:
+                    intents = [{"tool": hinted_tool, "query": user_input}]
+                    span["shortcut"] = "routing_hint"
+                    if self.debug_mode:
+                        print(f"📌 [DEBUG] Routing hint: {hinted_tool} ({hinted_location or 'no location'})")
+                elif open_booking and open_booking.answers_asked(self._locate_booking_slot, user_input):
+                    intents = [{"tool": open_booking.booking_type.upper(), "query": user_input}]
+                    span["shortcut"] = "open_booking"
+                    if self.debug_mode:
+                        print(f"📌 [DEBUG] Continuing open {open_booking.booking_type} booking")
+                elif mode >= KEYWORD_ROUTING:
+                    intents = [{"tool": self._keyword_tool(user_input), "query": user_input}]
+                    span["shortcut"] = "degraded"
+                else:
+                    intents = await self._adetect_intents(user_input, rewritten_context)
+                detected_tool = intents[0]["tool"]
+                span["tool"] = detected_tool
+                if len(intents) > 1:
+                    span["tools"] = [intent["tool"] for intent in intents]
+            
+            # Anything else routed away from the open booking counts towards its expiry
+            if open_booking and not any(intent["tool"] == open_booking.booking_type.upper() for intent in intents):
+                await to_thread(open_booking.record_idle_turn, self._booking_db())
+            self.tracer.tag_turn(tool=detected_tool)
+            self._emit(on_event, "tool", {"tool": detected_tool, "tools": [intent["tool"] for intent in intents]})
+            
+            if speculative and any(intent["tool"] not in PREFETCH_TOOLS for intent in intents):
+                return {"success": False, "response": None, "tool_used": detected_tool, "context": rewritten_context}
             
             if self.debug_mode:
                 print(f"\n⚡ [DEBUG] Execution Route:")
-                print(f"🔧 Selected tool: {detected_tool}")
+                print(f"🔧 Selected tools: {[intent['tool'] for intent in intents]}")
                 print(f"➡️  Routing to execution method...")
             
-            # Step 3: Execute based on detected tool
-            if detected_tool == "RAG":
-                result = self._execute_rag_search(user_input, rewritten_context)
-            elif detected_tool == "WEATHER":
-                result = self._execute_weather_query(user_input, rewritten_context)
-            elif detected_tool == "HOTEL":
-                result = self._execute_hotel_booking(user_input, rewritten_context)
-            elif detected_tool == "CAR":
-                result = self._execute_car_booking(user_input, rewritten_context)
-            elif detected_tool == "TRAVEL_PLAN":
-                result = self._execute_travel_planning(user_input, rewritten_context, chat_history)
+            # Step 3: Execute the detected tool (independent tools of a compound message run concurrently)
+            if len(intents) == 1:
+                result = await self._aexecute_tool(detected_tool, user_input, rewritten_context,
+                                                   conversation_id, chat_history, mode)
             else:
-                # Default to general conversation
-                result = self._execute_general_response(user_input, rewritten_context)
-            
-            # Step 4: Generate contextual suggestions
-            if result.get('success', False) and result.get('response'):
-                suggestions = self._generate_contextual_suggestions(
-                    user_input, result, detected_tool, rewritten_context, chat_history
-                )
-                result['suggestions'] = suggestions
+                result = await self._aexecute_intents(intents, rewritten_context, conversation_id, chat_history, mode)
+                detected_tool = result.get("primary_tool", detected_tool)
+            
+            self._emit(on_event, "response", {
+                "response": result.get("response"),
+                "tool_used": result.get("tool_used"),
+                "success": result.get("success", False)
+            })
+            
+            if mode > NORMAL:
+                result['degradation_mode'] = MODE_NAMES[mode]
+            
+            # Step 4: Generate contextual suggestions (in the background, keyed by turn id; off when degraded)
+            if result.get('success', False) and result.get('response') and mode < LEAN:
+                turn_id = self.tracer.current_turn_id()
+                job = (self._traced_suggestions if speculative else
+                       functools.partial(self._suggest_and_prefetch, conversation_id, time.monotonic()))
+                if self.background_suggestions and turn_id:
+                    queued = self.suggestion_worker.submit(
+                        turn_id, job,
+                        user_input, dict(result), detected_tool, rewritten_context, list(chat_history)
+                    )
+                    result['suggestions'] = []
+                    result['suggestions_pending'] = queued
+                else:
+                    result['suggestions'] = await to_thread(
+                        job, user_input, result, detected_tool, rewritten_context, chat_history
+                    )
             
             if self.debug_mode:
                 print(f"\n✅ [DEBUG] Execution Complete:")
                 print(f"🎯 Success: {result.get('success', False)}")
                 print(f"📄 Response length: {len(result.get('response', ''))}")
-                print(f"💡 Suggestions generated: {len(result.get('suggestions', []))}")
+                if result.get('suggestions_pending'):
+                    print(f"💡 Suggestions queued in the background")
+                else:
+                    print(f"💡 Suggestions generated: {len(result.get('suggestions', []))}")
                 print(f"{'='*60}")
             
             return result
@@ -289,51 +675,63 @@ class TravelPlannerAgent:
                 "tool_used": "ERROR"
             }
     
-    def _rewrite_conversation_context(self, user_input: str, chat_history: List) -> str:
+    @staticmethod
+    def _read_routing_hint(hint: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+        """(tool, location) of a routing hint; unknown tools are ignored"""
+        if not hint:
+            return None, None
+        try:
+            tool = ToolType(hint.get("tool")).value
+        except ValueError:
+            return None, None
+        return tool, (hint.get("location") or "").strip() or None
+    
+    def _emit(self, on_event: Optional[Callable[[str, Dict[str, Any]], None]], event: str, data: Dict[str, Any]):
+        """Report turn progress to a listener; listener errors never fail the turn"""
+        if on_event is None:
+            return
+        try:
+            on_event(event, data)
+        except Exception as e:
+            if self.debug_mode:
+                print(f"⚠️ [DEBUG] Progress listener failed on {event}: {str(e)}")
+    
+    @staticmethod
+    def _extractive_context(user_input: str, chat_history: List) -> str:
+        """LLM-free context for degraded turns: the latest user messages (locations included) and the question"""
+        recent = [content[:200] for role, content in chat_history[-6:] if role == "user" and content][-2:]
+        if not recent:
+            return f"Người dùng hỏi: {user_input}"
+        return " ".join(["Người dùng đã hỏi:"] + recent + [f"Hiện tại hỏi: {user_input}"])
+    
+    async def _arewrite_conversation_context(self, user_input: str, chat_history: List) -> str:
         """
         Rewrite conversation context with enhanced location awareness
         """
         try:
-            # Get configurable number of recent messages
-            max_messages = self.config_manager.get_max_context_messages()
-            recent_messages = chat_history[-max_messages:] if len(chat_history) > max_messages else chat_history
+            # Recent turns within the token budget; older ones folded into a summary line
+            window = build_history_window(
+                chat_history,
+                self.config_manager.get_history_token_budget(),
+                self.config_manager.get_max_context_messages()
+            )
             
-            if not recent_messages:
+            if not window:
                 return f"Người dùng hỏi: {user_input}"
             
-            # Enhanced context prompt with location focus
-            context_prompt = f"""
-            Hãy phân tích cuộc hội thoại và tóm tắt ngữ cảnh, ĐẶC BIỆT chú ý các địa điểm được đề cập:
-            
-            Lịch sử hội thoại:
-            """
-            
-            for role, content in recent_messages:
-                if role == "user":
-                    context_prompt += f"Người dùng: {content}\n"
-                else:
-                    # Only include first 100 chars of assistant response to avoid noise
-                    short_content = content[:100] + "..." if len(content) > 100 else content
-                    context_prompt += f"Trợ lý: {short_content}\n"
-            
-            context_prompt += f"""
-            Câu hỏi hiện tại: {user_input}
-            
-            QUAN TRỌNG: Nếu có địa điểm nào được đề cập trong lịch sử hội thoại, 
-            hãy ưu tiên ghi nhớ và đề cập trong tóm tắt ngữ cảnh.
-            
-            Tóm tắt ngữ cảnh (1-2 câu, bao gồm địa điểm nếu có):
-            """
+            # Location-focused instructions stay in the cached system prefix
+            template = self.prompts.get("rewrite_context")
+            context_prompt = template.messages(history=window.text(), user_input=user_input)
             
             # Get rewritten context
-            rewritten = self.llm.predict(context_prompt)
+            rewritten = await self._allm_predict(context_prompt, "rewrite_context", template.key)
             rewritten_clean = rewritten.strip()
             
             # Debug output
             if self.debug_mode:
                 print(f"\n🔍 [DEBUG] Context Rewriting:")
                 print(f"📝 User input: {user_input}")
-                print(f"📚 Chat history: {len(recent_messages)} messages")
+                print(f"📚 Chat history: {len(window.messages)} messages (+{window.summarized} summarized, ~{window.tokens} tokens)")
                 print(f"🎯 Rewritten context: {rewritten_clean}")
                 print(f"{'='*50}")
             
@@ -345,99 +743,108 @@ class TravelPlannerAgent:
                 print(f"\n❌ [ERROR] Context rewriting failed: {str(e)}")
             return error_context
     
-    def _detect_tool_intent(self, user_input: str, context: str) -> str:
+    async def _adetect_intents(self, user_input: str, context: str) -> List[Dict[str, str]]:
         """
         Smart tool detection with enhanced context awareness
+        
+        Returns:
+            One {"tool", "query"} per request in the message, in order (at least one)
         """
         try:
-            detection_prompt = f"""
-            Phân tích ý định của người dùng dựa trên câu hỏi hiện tại và ngữ cảnh cuộc hội thoại:
+            template = self.prompts.get("intent_detection")
+            detection_prompt = template.messages(context=context, user_input=user_input)
             
-            Ngữ cảnh hội thoại: {context}
-            Câu hỏi hiện tại: {user_input}
-            
-            Các công cụ có sẵn:
-            1. RAG - Tra cứu thông tin dịch vụ du lịch, danh lam thắng cảnh địa phương
-            2. WEATHER - Kiểm tra thời tiết hiện tại hoặc dự đoán thời tiết tương lai
-            3. HOTEL - Đặt phòng khách sạn
-            4. CAR - Đặt xe/vận chuyển
-            5. TRAVEL_PLAN - Lên kế hoạch du lịch chi tiết, lưu kế hoạch
-            6. GENERAL - Trò chuyện chung, không cần công cụ đặc biệt
-            
-            Quy tắc phân loại (ĐẶC BIỆT chú ý ngữ cảnh):
-            - RAG: Hỏi về địa điểm, danh lam, ẩm thực, hoạt động du lịch, "có gì", "làm gì"
-            - WEATHER: Hỏi về thời tiết, nhiệt độ, trời mưa/nắng, dự báo (CHÚ Ý: nếu ngữ cảnh có địa điểm, thời tiết sẽ của địa điểm đó)
-            - HOTEL: Yêu cầu đặt phòng, tìm khách sạn, booking accommodation
-            - CAR: Yêu cầu đặt xe, thuê xe, book transportation, di chuyển
-            - TRAVEL_PLAN: Lên kế hoạch du lịch, tạo itinerary, lưu kế hoạch, "lên kế hoạch", "tạo kế hoạch", "lưu kế hoạch"
-            - GENERAL: Chào hỏi, cảm ơn, câu hỏi chung không liên quan du lịch
-            
-            QUAN TRỌNG: Nếu câu hỏi đơn giản như "thời tiết" nhưng ngữ cảnh có địa điểm, 
-            vẫn chọn WEATHER vì người dùng muốn biết thời tiết của địa điểm đó.
-            
-            Trả lời CHÍNH XÁC một trong: RAG, WEATHER, HOTEL, CAR, TRAVEL_PLAN, GENERAL
-            """
-            
-            detected = self.llm.predict(detection_prompt).strip().upper()
+            detected = (await self._allm_predict(detection_prompt, "intent_detection", template.key)).strip()
+            intents = self._parse_intents(detected, user_input)
             
             # Debug output
             if self.debug_mode:
                 print(f"\n🤖 [DEBUG] Tool Detection:")
                 print(f"📝 User input: {user_input}")
                 print(f"🎯 Context: {context}")
-                print(f"🔧 Detected tool: {detected}")
+                print(f"🔧 Detected: {detected}")
             
-            # Validate detection result
-            valid_tools = ["RAG", "WEATHER", "HOTEL", "CAR", "TRAVEL_PLAN", "GENERAL"]
-            if detected in valid_tools:
-                if self.debug_mode:
-                    print(f"✅ Valid tool selected: {detected}")
-                return detected
-            else:
-                # Enhanced fallback with context awareness
-                user_lower = user_input.lower()
-                context_lower = context.lower()
-                
-                if self.debug_mode:
-                    print(f"⚠️ Invalid tool '{detected}', using fallback logic")
-                
-                if any(keyword in user_lower for keyword in ["thời tiết", "weather", "mưa", "nắng", "nhiệt độ", "dự báo"]):
-                    fallback = "WEATHER"
-                elif any(keyword in user_lower for keyword in ["đặt phòng", "khách sạn", "hotel", "booking", "phòng"]):
-                    fallback = "HOTEL"
-                elif any(keyword in user_lower for keyword in ["đặt xe", "thuê xe", "car", "taxi", "di chuyển", "transport"]):
-                    fallback = "CAR"
-                elif any(keyword in user_lower for keyword in ["lên kế hoạch", "tạo kế hoạch", "kế hoạch du lịch", "itinerary", "lưu kế hoạch"]):
-                    fallback = "TRAVEL_PLAN"
-                elif any(keyword in user_lower for keyword in ["địa điểm", "danh lam", "thắng cảnh", "du lịch", "gợi ý", "tham quan", "có gì"]):
-                    fallback = "RAG"
-                else:
-                    fallback = "GENERAL"
-                
+            if intents:
                 if self.debug_mode:
-                    print(f"🔄 Fallback tool: {fallback}")
-                return fallback
+                    print(f"✅ Valid tools selected: {[intent['tool'] for intent in intents]}")
+                return intents
+            
+            # Enhanced fallback with context awareness
+            fallback = self._keyword_tool(user_input)
+            if self.debug_mode:
+                print(f"⚠️ Invalid router output '{detected}', using fallback logic")
+                print(f"🔄 Fallback tool: {fallback}")
+            return [{"tool": fallback, "query": user_input}]
                     
         except Exception as e:
             if self.debug_mode:
                 print(f"\n❌ [ERROR] Tool detection failed: {str(e)}")
             # Final fallback to keyword-based detection
-            user_lower = user_input.lower()
-            if "thời tiết" in user_lower or "weather" in user_lower:
-                return "WEATHER"
-            elif "đặt phòng" in user_lower or "khách sạn" in user_lower:
-                return "HOTEL"
-            elif "đặt xe" in user_lower or "thuê xe" in user_lower:
-                return "CAR"
-            else:
-                return "RAG"  # Default to RAG for travel queries
+            return [{"tool": self._keyword_tool(user_input), "query": user_input}]
+    
+    def _parse_intents(self, detected: str, user_input: str) -> List[Dict[str, str]]:
+        """
+        Router output -> intents: a JSON list (intent_detection@v2) or a single tool label (v1)
+        Unknown tools and repeated (tool, query) pairs are dropped; the same tool may appear with
+        different queries ("thời tiết Đà Nẵng và thời tiết Hà Nội"), see _aexecute_intents
+        """
+        valid_tools = ["RAG", "WEATHER", "HOTEL", "CAR", "TRAVEL_PLAN", "GENERAL"]
+        if detected.upper() in valid_tools:
+            return [{"tool": detected.upper(), "query": user_input}]
+        
+        # The JSON may come wrapped in a code fence or a sentence
+        match = re.search(r"[\[{].*[\]}]", detected, re.DOTALL)
+        try:
+            items = json.loads(match.group(0)) if match else None
+        except ValueError:
+            return []
+        if isinstance(items, dict):
+            items = [items]
+        if not isinstance(items, list):
+            return []
+        
+        intents: List[Dict[str, str]] = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            tool = str(item.get("tool", "")).strip().upper()
+            query = str(item.get("query") or "").strip() or user_input
+            if tool not in valid_tools or any(
+                intent["tool"] == tool and intent["query"].lower() == query.lower() for intent in intents
+            ):
+                continue
+            intents.append({"tool": tool, "query": query})
+        
+        # A single request keeps the user's own words
+        if len(intents) == 1:
+            intents[0]["query"] = user_input
+        return intents
+    
+    @staticmethod
+    def _keyword_tool(user_input: str) -> str:
+        """Keyword routing when the router output cannot be used"""
+        user_lower = user_input.lower()
+        if any(keyword in user_lower for keyword in ["thời tiết", "weather", "mưa", "nắng", "nhiệt độ", "dự báo"]):
+            return "WEATHER"
+        elif any(keyword in user_lower for keyword in ["đặt phòng", "khách sạn", "hotel", "booking", "phòng"]):
+            return "HOTEL"
+        elif any(keyword in user_lower for keyword in ["đặt xe", "thuê xe", "car", "taxi", "di chuyển", "transport"]):
+            return "CAR"
+        elif any(keyword in user_lower for keyword in ["lên kế hoạch", "tạo kế hoạch", "kế hoạch du lịch", "itinerary", "lưu kế hoạch"]):
+            return "TRAVEL_PLAN"
+        elif any(keyword in user_lower for keyword in ["địa điểm", "danh lam", "thắng cảnh", "du lịch", "gợi ý", "tham quan", "có gì"]):
+            return "RAG"
+        return "GENERAL"
     
-    def _execute_rag_search(self, user_input: str, context: str) -> Dict[str, Any]:
+    async def _aexecute_rag_search(self, user_input: str, context: str, generate: bool = True) -> Dict[str, Any]:
         """
         Execute RAG search for travel information
+        generate=False answers with the retrieved passages (retrieval-only degraded mode)
         """
         try:
-            result = self.rag_system.query(user_input)
+            # The shared RAG system connects to the index on first use
+            rag_system = await to_thread(getattr, self, "rag_system")
+            result = await rag_system.aquery(user_input, generate=generate)
             
             if result.get('no_relevant_info') or result.get('answer') is None:
                 return {
@@ -468,11 +875,16 @@ class TravelPlannerAgent:
                 "tool_used": "RAG"
             }
     
-    def _execute_weather_query(self, user_input: str, context: str) -> Dict[str, Any]:
+    async def _aexecute_weather_query(self, user_input: str, context: str) -> Dict[str, Any]:
         """
         Execute weather query with context-aware city extraction
         """
         try:
+            # Several cities in one request ("thời tiết Đà Nẵng và Hà Nội"): one concurrent lookup
+            cities = self._extract_cities_from_text(user_input)
+            if len(cities) > 1:
+                return await self._aexecute_multi_city_weather(user_input, cities, context)
+            
             # Extract city from user input AND context
             city = self._extract_city_from_query_with_context(user_input, context)
             
@@ -490,9 +902,9 @@ class TravelPlannerAgent:
                 is_forecast = self._detect_forecast_intent(user_input)
             
             if is_forecast:
-                weather_info = self._get_weather_forecast(city)
+                weather_info = await self._aget_weather_forecast(city)
             else:
-                weather_info = self._get_current_weather(city)
+                weather_info = await self._aget_current_weather(city)
             
             return {
                 "success": True,
@@ -515,17 +927,39 @@ class TravelPlannerAgent:
                 "tool_used": "WEATHER"
             }
     
-    def _execute_hotel_booking(self, user_input: str, context: str) -> Dict[str, Any]:
+    async def _aexecute_multi_city_weather(self, user_input: str, cities: List[str], context: str) -> Dict[str, Any]:
+        """Weather of every city named in the request, through aget_weather_many"""
+        kind = "forecast" if self._detect_forecast_intent(user_input) else "current"
+        weather = await self.aget_weather_many(cities, kind=kind)
+        return {
+            "success": weather["success"],
+            "response": weather["response"],
+            "sources": [f"OpenWeatherMap API - {', '.join(cities)}"],
+            "rag_used": False,
+            "tool_used": "WEATHER",
+            "context": context,
+            "weather_type": kind,
+            "city": cities[0],
+            "cities": cities
+        }
+    
+    def _execute_hotel_booking(self, user_input: str, context: str, conversation_id: str = None) -> Dict[str, Any]:
         """
         Execute hotel booking with validation and confirmation
         """
         try:
-            # Extract booking details
-            booking_details = self._extract_hotel_booking_details(user_input, context)
+            # Merge this message into the hotel booking collected so far in the conversation
+            state = BookingState.load(self._booking_db(), conversation_id, "hotel")
+            state.merge(self._read_booking_slot, user_input, context)
             
             # Check if required information is complete
             required_fields = ['customer_name', 'customer_phone', 'hotel_name', 'location', 'check_in_date', 'nights']
-            missing_fields = [field for field in required_fields if not booking_details.get(field)]
+            missing_fields = [field for field in required_fields if field in state.missing_fields]
+            
+            # The questions of this reply are what the next message may answer directly
+            state.asked, state.idle_turns = missing_fields, 0
+            state.save(self._booking_db())
+            booking_details = self._booking_details_from_state(state, user_input)
             
             if missing_fields:
                 # Request missing information
@@ -562,17 +996,23 @@ class TravelPlannerAgent:
                 "tool_used": "HOTEL"
             }
     
-    def _execute_car_booking(self, user_input: str, context: str) -> Dict[str, Any]:
+    def _execute_car_booking(self, user_input: str, context: str, conversation_id: str = None) -> Dict[str, Any]:
         """
         Execute car booking with validation and confirmation
         """
         try:
-            # Extract booking details
-            booking_details = self._extract_car_booking_details(user_input, context)
+            # Merge this message into the car booking collected so far in the conversation
+            state = BookingState.load(self._booking_db(), conversation_id, "car")
+            state.merge(self._read_booking_slot, user_input, context)
             
             # Check if required information is complete
             required_fields = ['customer_name', 'customer_phone', 'pickup_location', 'destination', 'pickup_time', 'car_type']
-            missing_fields = [field for field in required_fields if not booking_details.get(field)]
+            missing_fields = [field for field in required_fields if field in state.missing_fields]
+            
+            # The questions of this reply are what the next message may answer directly
+            state.asked, state.idle_turns = missing_fields, 0
+            state.save(self._booking_db())
+            booking_details = self._booking_details_from_state(state, user_input)
             
             if missing_fields:
                 # Request missing information
@@ -609,7 +1049,7 @@ class TravelPlannerAgent:
                 "tool_used": "CAR"
             }
     
-    def _execute_travel_planning(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
+    async def _aexecute_travel_planning(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """
         Execute travel planning with interactive conversation flow
         """
@@ -647,17 +1087,34 @@ class TravelPlannerAgent:
                     "missing_required": missing_required
                 }
             
+            # Weather for every stop, fetched in parallel
+            sources = ["AI Travel Planning System"]
+            weather = None
+            stops = travel_info['destination'].get('stops') or []
+            if stops:
+                try:
+                    weather = await self.aget_weather_many(stops, kind="forecast")
+                    if weather["success"]:
+                        sources.append("OpenWeatherMap API - " + ", ".join(stops))
+                except Exception as e:
+                    if self.debug_mode:
+                        print(f"\n❌ [ERROR] Multi-city weather failed: {str(e)}")
+            
             # All required information is complete - show confirmation
-            confirmation_message = self._generate_travel_plan_confirmation(travel_info)
+            confirmation_message = self._generate_travel_plan_confirmation(
+                travel_info,
+                weather_report=weather["response"] if weather and weather["success"] else None
+            )
             
             return {
                 "success": True,
                 "response": confirmation_message,
-                "sources": ["AI Travel Planning System"],
+                "sources": sources,
                 "rag_used": False,
                 "tool_used": "TRAVEL_PLAN_CONFIRMATION",
                 "context": context,
                 "travel_info": travel_info,
+                "weather": weather,
                 "awaiting_confirmation": True
             }
             
@@ -669,7 +1126,22 @@ class TravelPlannerAgent:
                 "tool_used": "TRAVEL_PLAN"
             }
     
-    def _execute_general_response(self, user_input: str, context: str) -> Dict[str, Any]:
+    async def _adegraded_general_response(self, user_input: str, context: str) -> Dict[str, Any]:
+        """General answer without the LLM: knowledge base passages, or a short pointer to the tools"""
+        result = await self._aexecute_rag_search(user_input, context, generate=False)
+        if result.get("success") and result.get("response"):
+            return result
+        return {
+            "success": True,
+            "response": "Hệ thống đang quá tải nên mình trả lời ngắn gọn. Bạn có thể hỏi cụ thể về địa điểm, "
+                        "thời tiết, hoặc đặt khách sạn / xe, mình sẽ xử lý ngay.",
+            "sources": [],
+            "rag_used": False,
+            "tool_used": "GENERAL",
+            "context": context
+        }
+    
+    async def _aexecute_general_response(self, user_input: str, context: str) -> Dict[str, Any]:
         """
         Execute general conversation response with personalization
         """
@@ -686,22 +1158,16 @@ class TravelPlannerAgent:
                 if active_interests:
                     interest_context = f"Người dùng quan tâm đến: {', '.join(active_interests)}. "
             
-            prompt = f"""
-            Bạn là {agent_name}, trợ lý du lịch với tính cách {personality}.
-            
-            {interest_context}
-            
-            Ngữ cảnh: {context}
-            Câu hỏi: {user_input}
-            
-            Hãy trả lời một cách tự nhiên và hữu ích theo tính cách của bạn. 
-            Nếu liên quan đến du lịch, hãy gợi ý người dùng hỏi cụ thể hơn về địa điểm, thời tiết, hoặc đặt dịch vụ.
-            Nếu biết sở thích của người dùng, hãy đưa ra gợi ý phù hợp.
-            
-            Trả lời bằng tiếng Việt:
-            """
+            template = self.prompts.get("general_response")
+            prompt = template.messages(
+                agent_name=agent_name,
+                personality=personality,
+                interest_context=interest_context,
+                context=context,
+                user_input=user_input
+            )
             
-            base_response = self.llm.predict(prompt)
+            base_response = await self._allm_predict(prompt, "general_response", template.key)
             
             # Apply personalization
             personalized_response = self.config_manager.personalize_response(
@@ -729,93 +1195,36 @@ class TravelPlannerAgent:
     # Helper methods
     def _extract_city_from_query(self, query: str) -> str:
         """Extract city name from weather query - legacy method"""
-        # Simple extraction - can be enhanced with NER
-        cities = ["hà nội", "hồ chí minh", "đà nẵng", "nha trang", "huế", "hội an", "sapa", "đà lạt", "phú quốc", "cần thơ"]
-        query_lower = query.lower()
-        
-        for city in cities:
-            if city in query_lower:
-                return city.title()
+        location = self.gazetteer.find_first(query)
+        if location:
+            return location.weather_name
         
         return "Hà Nội"  # Default city
     
     def _extract_city_from_query_with_context(self, query: str, context: str) -> str:
         """Extract city name from query with context awareness - prioritizes provinces over cities"""
-        # Separate provinces and cities to prioritize properly
-        provinces = [
-            "kiên giang", "an giang", "cà mau", "bạc liêu", "sóc trăng", 
-            "đồng tháp", "tiền giang", "bến tre", "vĩnh long", "trà vinh",
-            "hà giang", "cao bằng", "lào cai", "yên bái", "tuyên quang",
-            "thái nguyên", "bắc kạn", "lang sơn", "quảng ninh", "hải phòng",
-            "nam định", "thái bình", "hưng yên", "hà nam", "ninh bình",
-            "thanh hóa", "nghệ an", "hà tĩnh", "quảng bình", "quảng trì",
-            "quảng nam", "quảng ngãi", "bình định", "phú yên", "khánh hòa",
-            "ninh thuận", "bình thuận", "kon tum", "gia lai", "đắk lắk",
-            "đắk nông", "lâm đồng", "bình phước", "tây ninh", "bình dương",
-            "đồng nai", "bà rịa vũng tầu", "long an"
-        ]
-        
-        cities = [
-            "hà nội", "hồ chí minh", "đà nẵng", "nha trang", "huế", "hội an", 
-            "sapa", "đà lạt", "phú quốc", "cần thơ", "vũng tầu", "phan thiết"
-        ]
-        
-        # Combine all locations for comprehensive search
-        all_locations = provinces + cities
-        
         if self.debug_mode:
             print(f"\n🔍 [DEBUG] Enhanced City Extraction:")
             print(f"📝 Query: {query}")
             print(f"🎯 Context: {context}")
         
-        # Strategy: Find all matching locations, then prioritize
-        found_locations = []
-        
         # Check current query first
-        query_lower = query.lower()
-        for location in all_locations:
-            if location in query_lower:
-                found_locations.append(("query", location))
-                if self.debug_mode:
-                    print(f"🎯 Found in query: {location}")
-        
-        # Then check context 
-        context_lower = context.lower()
-        for location in all_locations:
-            if location in context_lower:
-                found_locations.append(("context", location))
-                if self.debug_mode:
-                    print(f"📚 Found in context: {location}")
-        
-        if found_locations:
-            # Prioritization logic:
-            # 1. Direct query locations first
-            # 2. Among context locations, prefer provinces over cities
-            # 3. Use the most specific match
-            
-            query_locations = [loc for source, loc in found_locations if source == "query"]
-            context_locations = [loc for source, loc in found_locations if source == "context"]
-            
-            if query_locations:
-                # If found in query, use that
-                selected = query_locations[0]
-                if self.debug_mode:
-                    print(f"🏙️ Selected from query: {selected}")
-            elif context_locations:
-                # If found in context, prefer provinces
-                context_provinces = [loc for loc in context_locations if loc in provinces]
-                if context_provinces:
-                    selected = context_provinces[0]  # First province found
-                    if self.debug_mode:
-                        print(f"🏙️ Selected province from context: {selected}")
-                else:
-                    selected = context_locations[0]  # First city found
-                    if self.debug_mode:
-                        print(f"🏙️ Selected city from context: {selected}")
-            else:
-                selected = "hà nội"  # Fallback
-            
-            return selected.title()
+        query_locations = self.gazetteer.find_locations(query)
+        if query_locations:
+            selected = query_locations[0]
+            if self.debug_mode:
+                print(f"🎯 Found in query: {[loc.name for loc in query_locations]}")
+                print(f"🏙️ Selected from query: {selected.name}")
+            return selected.weather_name
+        
+        # Then check context, preferring provinces over cities over landmarks
+        context_locations = self.gazetteer.find_locations(context)
+        if context_locations:
+            selected = min(context_locations, key=lambda loc: KIND_PRIORITY[loc.kind])
+            if self.debug_mode:
+                print(f"📚 Found in context: {[loc.name for loc in context_locations]}")
+                print(f"🏙️ Selected {selected.kind} from context: {selected.name}")
+            return selected.weather_name
         
         # Default fallback
         default_city = "Hà Nội"
@@ -830,98 +1239,280 @@ class TravelPlannerAgent:
         
         return any(keyword in query_lower for keyword in forecast_keywords)
     
-    def _get_current_weather(self, city: str) -> str:
+    async def _aget_current_weather(self, city: str) -> str:
         """Get current weather"""
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.weather_api_key}&units=metric&lang=vi"
-            response = requests.get(url, timeout=10)
+            data = await self.weather_client.aget_current(city)
             
-            if response.status_code != 200:
+            if data is None:
                 return f"Không tìm thấy thông tin thời tiết hiện tại cho {city}"
             
-            data = response.json()
-            weather_info = (
-                f"🌤️ Thời tiết hiện tại tại {city}:\n"
-                f"🌡️ Nhiệt độ: {data['main']['temp']}°C\n"
-                f"☁️ Trời: {data['weather'][0]['description']}\n"
-                f"💨 Độ ẩm: {data['main']['humidity']}%\n"
-                f"🌬️ Tốc độ gió: {data['wind']['speed']} m/s"
-            )
-            return weather_info
+            return self._format_current_weather(city, data)
             
         except Exception as e:
             return f"Lỗi lấy thông tin thời tiết hiện tại: {str(e)}"
     
-    def _get_weather_forecast(self, city: str) -> str:
+    async def _aget_weather_forecast(self, city: str) -> str:
         """Get weather forecast"""
         try:
-            url = f"https://api.openweathermap.org/data/2.5/forecast?q={city}&appid={self.weather_api_key}&units=metric&lang=vi"
-            response = requests.get(url, timeout=10)
+            data = await self.weather_client.aget_forecast(city)
             
-            if response.status_code != 200:
+            if data is None:
                 return f"Không tìm thấy dự báo thời tiết cho {city}"
             
-            data = response.json()
-            # Get next 24 hours (8 forecasts * 3 hours each)
-            forecasts = data['list'][:8]
-            
-            weather_info = f"🔮 Dự báo thời tiết {city} (24h tới):\n\n"
-            
-            for i, forecast in enumerate(forecasts):
-                time = forecast['dt_txt'].split(' ')[1][:5]  # Get HH:MM
-                temp = forecast['main']['temp']
-                desc = forecast['weather'][0]['description']
-                weather_info += f"⏰ {time}: {temp}°C - {desc}\n"
-            
-            return weather_info
+            return self._format_weather_forecast(city, data)
             
         except Exception as e:
             return f"Lỗi lấy dự báo thời tiết: {str(e)}"
     
-    def _extract_hotel_booking_details(self, query: str, context: str) -> Dict:
-        """Extract hotel booking details from query with enhanced extraction"""
-        details = {
-            "customer_name": self._extract_customer_name(query, context),
-            "customer_phone": self._extract_phone_number(query, context),
-            "customer_email": self._extract_email(query, context),
-            "hotel_name": self._extract_hotel_name(query, context),
-            "location": self._extract_city_from_query(query),
-            "check_in_date": self._extract_date(query, context),
-            "check_out_date": None,  # Will be calculated from nights
-            "nights": self._extract_nights(query, context),
-            "guests": self._extract_guest_count(query, context),
-            "rooms": self._extract_room_count(query, context),
-            "room_type": self._extract_room_type(query, context),
-            "special_requests": self._extract_special_requests(query, context),
-            "query": query
-        }
+    def _format_current_weather(self, city: str, data: Dict[str, Any]) -> str:
+        """Format current weather payload"""
+        return (
+            f"🌤️ Thời tiết hiện tại tại {city}:\n"
+            f"🌡️ Nhiệt độ: {data['main']['temp']}°C\n"
+            f"☁️ Trời: {data['weather'][0]['description']}\n"
+            f"💨 Độ ẩm: {data['main']['humidity']}%\n"
+            f"🌬️ Tốc độ gió: {data['wind']['speed']} m/s"
+        )
+    
+    def _format_weather_forecast(self, city: str, data: Dict[str, Any]) -> str:
+        """Format forecast payload (next 24 hours)"""
+        # Get next 24 hours (8 forecasts * 3 hours each)
+        forecasts = data['list'][:8]
         
-        # Calculate check-out date if check-in and nights are available
-        if details["check_in_date"] and details["nights"]:
-            try:
-                from datetime import datetime, timedelta
-                check_in = datetime.strptime(details["check_in_date"], "%Y-%m-%d")
-                check_out = check_in + timedelta(days=int(details["nights"]))
-                details["check_out_date"] = check_out.strftime("%Y-%m-%d")
-            except:
-                pass
+        weather_info = f"🔮 Dự báo thời tiết {city} (24h tới):\n\n"
         
-        return details
+        for i, forecast in enumerate(forecasts):
+            time = forecast['dt_txt'].split(' ')[1][:5]  # Get HH:MM
+            temp = forecast['main']['temp']
+            desc = forecast['weather'][0]['description']
+            weather_info += f"⏰ {time}: {temp}°C - {desc}\n"
+        
+        return weather_info
     
-    def _extract_car_booking_details(self, query: str, context: str) -> Dict:
-        """Extract car booking details from query with enhanced extraction"""
+    def _summarize_weather(self, city: str, kind: str, data: Dict[str, Any]) -> str:
+        """One-line weather summary used in multi-city reports"""
+        if kind == "forecast":
+            forecasts = data['list'][:8]
+            temps = [f['main']['temp'] for f in forecasts]
+            descriptions = [f['weather'][0]['description'] for f in forecasts]
+            main_desc = max(set(descriptions), key=descriptions.count)
+            return f"🏙️ {city}: {min(temps):.0f}–{max(temps):.0f}°C, {main_desc}"
+        
+        return (
+            f"🏙️ {city}: {data['main']['temp']:.0f}°C, {data['weather'][0]['description']}, "
+            f"độ ẩm {data['main']['humidity']}%"
+        )
+    
+    def get_weather_many(self, cities: List[str], kind: str = "current",
+                         max_concurrency: int = None, timeout: float = None) -> Dict[str, Any]:
+        """
+        Fetch weather for several cities in parallel and merge the results
+        
+        Args:
+            cities: City names (duplicates are ignored, order is kept)
+            kind: "current" or "forecast"
+            max_concurrency: Maximum number of cities fetched at the same time
+            timeout: Per-city timeout in seconds
+        
+        Returns:
+            Dict with merged report, per-city results and the list of failed cities
+        """
+        unique_cities = self._unique_cities(cities, kind)
+        if not unique_cities:
+            return self._weather_report([], {}, kind)
+        
+        max_concurrency = max_concurrency or self.WEATHER_MAX_CONCURRENCY
+        timeout = timeout or self.WEATHER_CITY_TIMEOUT
+        
+        fetch = self.weather_client.get_forecast if kind == "forecast" else self.weather_client.get_current
+        results = {}
+        
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_concurrency, len(unique_cities)),
+            thread_name_prefix="weather-fanout"
+        )
+        try:
+            futures = {submit_with_context(executor, fetch, city, "vi", timeout): city for city in unique_cities}
+            
+            # Queued cities start once a worker frees up, so allow one timeout per wave
+            waves = -(-len(unique_cities) // max_concurrency)
+            done, not_done = wait(futures, timeout=timeout * waves)
+            
+            for future in done:
+                city = futures[future]
+                try:
+                    data = future.result()
+                    if data is None:
+                        results[city] = {"success": False, "error": "not_found"}
+                    else:
+                        results[city] = {"success": True, "data": data}
+                except Exception as e:
+                    results[city] = {"success": False, "error": str(e)}
+            
+            for future in not_done:
+                future.cancel()
+                results[futures[future]] = {"success": False, "error": "timeout"}
+        finally:
+            # Do not block on slow requests that already timed out
+            executor.shutdown(wait=False)
+        
+        return self._weather_report(unique_cities, results, kind)
+    
+    async def aget_weather_many(self, cities: List[str], kind: str = "current",
+                                max_concurrency: int = None, timeout: float = None) -> Dict[str, Any]:
+        """Async get_weather_many: cities are awaited concurrently, each with its own timeout"""
+        unique_cities = self._unique_cities(cities, kind)
+        if not unique_cities:
+            return self._weather_report([], {}, kind)
+        
+        max_concurrency = max_concurrency or self.WEATHER_MAX_CONCURRENCY
+        timeout = timeout or self.WEATHER_CITY_TIMEOUT
+        fetch = self.weather_client.aget_forecast if kind == "forecast" else self.weather_client.aget_current
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_city(city: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    data = await asyncio.wait_for(fetch(city, "vi", timeout), timeout)
+                except asyncio.TimeoutError:
+                    return {"success": False, "error": "timeout"}
+                except Exception as e:
+                    return {"success": False, "error": str(e)}
+            if data is None:
+                return {"success": False, "error": "not_found"}
+            return {"success": True, "data": data}
+        
+        fetched = await asyncio.gather(*(fetch_city(city) for city in unique_cities))
+        return self._weather_report(unique_cities, dict(zip(unique_cities, fetched)), kind)
+    
+    def _unique_cities(self, cities: List[str], kind: str) -> List[str]:
+        """Deduplicate city names while keeping itinerary order"""
+        if kind not in ("current", "forecast"):
+            raise ValueError(f"Unknown weather kind: {kind}")
+        
+        unique_cities = []
+        seen = set()
+        for city in cities or []:
+            key = " ".join(city.lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                unique_cities.append(city.strip())
+        return unique_cities
+    
+    def _weather_report(self, unique_cities: List[str], results: Dict[str, Dict[str, Any]], kind: str) -> Dict[str, Any]:
+        """Merge per-city results into one multi-city report"""
+        if not unique_cities:
+            return {
+                "success": False,
+                "response": "Không có thành phố nào để tra cứu thời tiết",
+                "kind": kind,
+                "cities": {},
+                "failed": []
+            }
+        
+        title = "🔮 **Dự báo thời tiết các điểm đến (24h tới):**" if kind == "forecast" else "🌤️ **Thời tiết hiện tại các điểm đến:**"
+        lines = [title]
+        failed = []
+        
+        for city in unique_cities:
+            result = results[city]
+            if result["success"]:
+                result["report"] = self._summarize_weather(city, kind, result["data"])
+            elif result["error"] == "not_found":
+                result["report"] = f"🏙️ {city}: không tìm thấy thông tin thời tiết"
+                failed.append(city)
+            else:
+                result["report"] = f"🏙️ {city}: chưa lấy được thông tin thời tiết"
+                failed.append(city)
+            lines.append(result["report"])
+        
+        if self.debug_mode:
+            print(f"\n🌤️ [DEBUG] Multi-city weather ({kind}): {len(unique_cities)} cities, failed: {failed}")
+        
         return {
-            "customer_name": self._extract_customer_name(query, context),
-            "customer_phone": self._extract_phone_number(query, context),
-            "pickup_location": self._extract_pickup_location(query, context),
-            "destination": self._extract_destination(query, context),
-            "pickup_time": self._extract_pickup_time(query, context),
-            "car_type": self._extract_car_type(query, context),
-            "seats": self._extract_seat_count(query, context),
-            "notes": self._extract_special_requests(query, context),
-            "query": query
+            "success": len(failed) < len(unique_cities),
+            "response": "\n".join(lines),
+            "kind": kind,
+            "cities": results,
+            "failed": failed
         }
     
+    def _extract_cities_from_text(self, text: str) -> List[str]:
+        """Extract all known cities/provinces from text in order of appearance"""
+        cities = []
+        for location in self.gazetteer.find_locations(text):
+            if location.weather_name not in cities:
+                cities.append(location.weather_name)
+        
+        return cities
+    
+    def _extract_hotel_booking_details(self, query: str, context: str) -> Dict:
+        """Extract hotel booking details from query with enhanced extraction"""
+        state = BookingState("hotel")
+        state.merge(self._read_booking_slot, query, context)
+        return self._booking_details_from_state(state, query)
+    
+    def _extract_car_booking_details(self, query: str, context: str) -> Dict:
+        """Extract car booking details from query with enhanced extraction"""
+        state = BookingState("car")
+        state.merge(self._read_booking_slot, query, context)
+        return self._booking_details_from_state(state, query)
+    
+    def _booking_details_from_state(self, state: BookingState, query: str) -> Dict:
+        """Build the booking_details dict used by confirmation and database saving"""
+        details = state.details
+        
+        if state.booking_type == "hotel":
+            # Calculate check-out date if check-in and nights are available
+            details["check_out_date"] = None
+            if details["check_in_date"] and details["nights"]:
+                try:
+                    from datetime import datetime, timedelta
+                    check_in = datetime.strptime(details["check_in_date"], "%Y-%m-%d")
+                    check_out = check_in + timedelta(days=int(details["nights"]))
+                    details["check_out_date"] = check_out.strftime("%Y-%m-%d")
+                except:
+                    pass
+        
+        details["query"] = query
+        return details
+    
+    def _read_booking_slot(self, field: str, query: str, context: str) -> Tuple[Any, float, bool]:
+        """Read one booking field as (value, confidence, found) for BookingState"""
+        if field == "location":
+            location = self.gazetteer.find_first(query)
+            if location:
+                return location.weather_name, 0.8, True
+            return "Hà Nội", 0.0, False  # Default city
+        
+        slot = self.extraction_engine.get("special_requests" if field == "notes" else field, query, context)
+        if field == "pickup_location" and not slot.found:
+            return self._extract_pickup_location(query, context), 0.0, False
+        
+        return slot.value, slot.confidence, slot.found
+    
+    def _locate_booking_slot(self, field: str, query: str) -> Tuple[Any, float, Optional[Tuple[int, int]]]:
+        """Find one booking field in the message itself as (value, confidence, span) for BookingState"""
+        if field == "location":
+            mentions = self.gazetteer.find_all(query)
+            if mentions:
+                return mentions[0].location.weather_name, 0.8, (mentions[0].start, mentions[0].end)
+            return None, 0.0, None
+        
+        slot = self.extraction_engine.get("special_requests" if field == "notes" else field, query)
+        return slot.value, slot.confidence, slot.span if slot.found else None
+    
+    def _booking_db(self):
+        """Database used to persist booking state"""
+        return self.config_manager.db_manager
+    
+    def update_booking_status(self, conversation_id: str, booking_type: str, status: str) -> bool:
+        """Move the booking of a conversation to a new status (confirmed, cancelled, collecting)"""
+        if not conversation_id:
+            return False
+        return self._booking_db().update_booking_session_status(conversation_id, booking_type, status)
+    
     def _mock_hotel_booking(self, details: Dict) -> str:
         """Mock hotel booking"""
         confirmation = f"HOTEL-{details['city'][:3].upper()}-{details['date'].replace('-', '')}"
@@ -961,21 +1552,12 @@ class TravelPlannerAgent:
         Get response using general LLM knowledge (no RAG)
         """
         try:
-            prompt = f"""
-            Bạn là trợ lý du lịch thông minh. Khách hàng hỏi về: "{query}"
-            
-            Tôi không tìm thấy thông tin cụ thể trong cơ sở dữ liệu của mình về câu hỏi này.
+            self._sync_config()
             
-            Hãy trả lời dựa trên kiến thức chung của bạn về du lịch Việt Nam:
-            - Đưa ra thông tin hữu ích và chính xác
-            - Giữ giọng điệu thân thiện và chuyên nghiệp
-            - Trả lời bằng tiếng Việt
-            - Nếu không chắc chắn, hãy khuyên khách tìm hiểu thêm từ nguồn chính thức
+            template = self.prompts.get("general_knowledge")
+            prompt = template.messages(query=query)
             
-            Trả lời:
-            """
-            
-            response = self.llm.predict(prompt)
+            response = self._llm_predict(prompt, "general_knowledge", template.key)
             
             return {
                 "success": True,
@@ -1013,219 +1595,45 @@ class TravelPlannerAgent:
     # Enhanced extraction helper functions
     def _extract_customer_name(self, query: str, context: str) -> str:
         """Extract customer name from query or context"""
-        import re
-        
-        # Look for name patterns like "Tên tôi là X", "Tôi tên X", "Tôi là X"
-        patterns = [
-            r'(?:tên tôi là|tôi tên|tôi là|my name is)\s+([A-Za-zÀ-ỹ\s]+)',
-            r'tên:\s*([A-Za-zÀ-ỹ\s]+)',
-            r'họ tên:\s*([A-Za-zÀ-ỹ\s]+)'
-        ]
-        
-        text = (query + " " + context).lower()
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                name = match.group(1).strip().title()
-                if len(name) > 1:
-                    return name
-        
-        return ""  # Return empty if not found
+        return self.extraction_engine.get("customer_name", query, context).value
     
     def _extract_phone_number(self, query: str, context: str) -> str:
         """Extract phone number from query or context"""
-        import re
-        
-        text = query + " " + context
-        
-        # Vietnamese phone number patterns
-        patterns = [
-            r'(?:sđt|số điện thoại|phone|điện thoại)[:=\s]*([+84|84|0]?[3-9]\d{8,9})',
-            r'([+84|84|0]?[3-9]\d{8,9})',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                # Clean up the phone number
-                phone = re.sub(r'[^\d+]', '', match)
-                if len(phone) >= 9:
-                    return phone
-        
-        return ""
+        return self.extraction_engine.get("customer_phone", query, context).value
     
     def _extract_email(self, query: str, context: str) -> str:
         """Extract email from query or context"""
-        import re
-        
-        text = query + " " + context
-        pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        match = re.search(pattern, text)
-        return match.group() if match else ""
+        return self.extraction_engine.get("customer_email", query, context).value
     
     def _extract_hotel_name(self, query: str, context: str) -> str:
         """Extract hotel name from query or context"""
-        import re
-        
-        text = (query + " " + context).lower()
-        
-        # Look for hotel name patterns
-        patterns = [
-            r'khách sạn\s+([A-Za-zÀ-ỹ\s]+)',
-            r'hotel\s+([A-Za-z\s]+)',
-            r'(?:tại|ở)\s+([A-Za-zÀ-ỹ\s]*(?:hotel|resort|inn)[A-Za-zÀ-ỹ\s]*)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                hotel = match.group(1).strip().title()
-                if len(hotel) > 2:
-                    return hotel
-        
-        return ""  # Will be requested later
+        return self.extraction_engine.get("hotel_name", query, context).value
     
     def _extract_date(self, query: str, context: str) -> str:
         """Extract check-in date from query"""
-        import re
-        from datetime import datetime, timedelta
-        
-        text = query + " " + context
-        
-        # Look for date patterns
-        patterns = [
-            r'ngày\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'ngày\s+(\d{1,2})\s+tháng\s+(\d{1,2})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    if len(match.groups()) == 3:
-                        day, month, year = match.groups()
-                        date_obj = datetime(int(year), int(month), int(day))
-                        return date_obj.strftime("%Y-%m-%d")
-                    elif len(match.groups()) == 2:
-                        day, month = match.groups()
-                        year = datetime.now().year
-                        date_obj = datetime(year, int(month), int(day))
-                        return date_obj.strftime("%Y-%m-%d")
-                except:
-                    continue
-        
-        # Look for relative dates
-        if any(word in text.lower() for word in ["hôm nay", "today"]):
-            return datetime.now().strftime("%Y-%m-%d")
-        elif any(word in text.lower() for word in ["ngày mai", "tomorrow"]):
-            return (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        return ""
+        return self.extraction_engine.get("check_in_date", query, context).value
     
     def _extract_nights(self, query: str, context: str) -> int:
         """Extract number of nights from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(\d+)\s*đêm',
-            r'(\d+)\s*nights?',
-            r'(\d+)\s*ngày.*?(\d+)\s*đêm',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except:
-                    continue
-        
-        return 1  # Default to 1 night
+        return self.extraction_engine.get("nights", query, context).value
     
     def _extract_guest_count(self, query: str, context: str) -> int:
         """Extract number of guests from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(\d+)\s*(?:người|khách|guests?)',
-            r'(?:cho|for)\s*(\d+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except:
-                    continue
-        
-        return 2  # Default to 2 guests
+        return self.extraction_engine.get("guests", query, context).value
     
     def _extract_room_count(self, query: str, context: str) -> int:
         """Extract number of rooms from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(\d+)\s*phòng',
-            r'(\d+)\s*rooms?',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except:
-                    continue
-        
-        return 1  # Default to 1 room
+        return self.extraction_engine.get("rooms", query, context).value
     
     def _extract_room_type(self, query: str, context: str) -> str:
         """Extract room type from query"""
-        text = (query + " " + context).lower()
-        
-        room_types = {
-            "standard": ["standard", "tiêu chuẩn"],
-            "deluxe": ["deluxe", "cao cấp"],
-            "suite": ["suite", "hạng sang"],
-            "family": ["family", "gia đình"],
-            "single": ["single", "đơn"],
-            "double": ["double", "đôi"],
-            "twin": ["twin", "sinh đôi"]
-        }
-        
-        for room_type, keywords in room_types.items():
-            if any(keyword in text for keyword in keywords):
-                return room_type
-        
-        return "standard"
+        return self.extraction_engine.get("room_type", query, context).value
     
     def _extract_pickup_location(self, query: str, context: str) -> str:
         """Extract pickup location from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(?:đón tại|pickup at|from)\s+([A-Za-zÀ-ỹ\s,]+)',
-            r'từ\s+([A-Za-zÀ-ỹ\s,]+)\s+(?:đến|to)',
-            r'điểm đón:\s*([A-Za-zÀ-ỹ\s,]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                location = match.group(1).strip()
-                if len(location) > 2:
-                    return location
+        slot = self.extraction_engine.get("pickup_location", query, context)
+        if slot.found:
+            return slot.value
         
         # Try to extract from context if available
         city = self._extract_city_from_query(query)
@@ -1236,110 +1644,23 @@ class TravelPlannerAgent:
     
     def _extract_destination(self, query: str, context: str) -> str:
         """Extract destination from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(?:đến|to|tới)\s+([A-Za-zÀ-ỹ\s,]+)',
-            r'điểm đến:\s*([A-Za-zÀ-ỹ\s,]+)',
-            r'(?:về|return to)\s+([A-Za-zÀ-ỹ\s,]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                destination = match.group(1).strip()
-                if len(destination) > 2:
-                    return destination
-        
-        return ""
+        return self.extraction_engine.get("destination", query, context).value
     
     def _extract_pickup_time(self, query: str, context: str) -> str:
         """Extract pickup time from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'lúc\s+(\d{1,2}):(\d{2})',
-            r'(\d{1,2}):(\d{2})',
-            r'(\d{1,2})\s*giờ\s*(\d{2})?',
-            r'(\d{1,2})h(\d{2})?',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    hour = int(match.group(1))
-                    minute = int(match.group(2)) if match.group(2) else 0
-                    if 0 <= hour <= 23 and 0 <= minute <= 59:
-                        return f"{hour:02d}:{minute:02d}"
-                except:
-                    continue
-        
-        return ""
+        return self.extraction_engine.get("pickup_time", query, context).value
     
     def _extract_car_type(self, query: str, context: str) -> str:
         """Extract car type from query"""
-        text = (query + " " + context).lower()
-        
-        car_types = {
-            "4 chỗ": ["4 chỗ", "sedan", "4 seats"],
-            "7 chỗ": ["7 chỗ", "suv", "7 seats"],
-            "16 chỗ": ["16 chỗ", "minibus", "16 seats"],
-            "taxi": ["taxi"],
-            "grab": ["grab"],
-            "luxury": ["luxury", "sang trọng"],
-        }
-        
-        for car_type, keywords in car_types.items():
-            if any(keyword in text for keyword in keywords):
-                return car_type
-        
-        return "4 chỗ"  # Default
+        return self.extraction_engine.get("car_type", query, context).value
     
     def _extract_seat_count(self, query: str, context: str) -> int:
         """Extract seat count from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(\d+)\s*chỗ',
-            r'(\d+)\s*seats?',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except:
-                    continue
-        
-        return 4  # Default to 4 seats
+        return self.extraction_engine.get("seats", query, context).value
     
     def _extract_special_requests(self, query: str, context: str) -> str:
         """Extract special requests from query"""
-        import re
-        
-        text = query + " " + context
-        
-        patterns = [
-            r'(?:yêu cầu|requests?|notes?|ghi chú)[:=\s]*(.+)',
-            r'(?:đặc biệt|special)[:=\s]*(.+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                request = match.group(1).strip()
-                if len(request) > 5:
-                    return request
-        
-        return ""
+        return self.extraction_engine.get("special_requests", query, context).value
     
     # Validation helper functions
     def _request_missing_hotel_info(self, missing_fields: list, current_details: dict) -> str:
@@ -1502,185 +1823,69 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
     
     def _extract_travel_destination(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract destination information"""
-        import re
-        
-        text = user_input + " " + context
-        
-        # Look for destination patterns
-        patterns = [
-            r'(?:đến|tới|du lịch|ghé)\s+([A-Za-zÀ-ỹ\s,]+)',
-            r'điểm đến:\s*([A-Za-zÀ-ỹ\s,]+)',
-            r'(?:ở|tại)\s+([A-Za-zÀ-ỹ\s,]+)'
-        ]
+        slot = self.extraction_engine.get("travel_destination", user_input, context)
         
         destination_info = {}
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                location = match.group(1).strip()
-                if len(location) > 2:
-                    destination_info['primary'] = location
-                    destination_info['country'] = self._determine_country(location)
-                    destination_info['region'] = self._determine_region(location)
-                    break
+        if slot.found:
+            location = slot.value
+            destination_info['primary'] = location
+            destination_info['country'] = self._determine_country(location)
+            destination_info['region'] = self._determine_region(location)
+        
+        # Multi-destination itineraries (e.g. Hà Nội → Sapa → Hạ Long)
+        if destination_info:
+            stops = self._extract_cities_from_text(user_input)
+            if len(stops) < 2:
+                stops = self._extract_cities_from_text(destination_info['primary'])
+            if stops:
+                destination_info['stops'] = stops
         
         return destination_info if destination_info else None
     
     def _extract_travel_dates(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract travel dates"""
-        import re
-        from datetime import datetime, timedelta
-        
-        text = user_input + " " + context
-        dates_info = {}
-        
-        # Look for date patterns
-        patterns = [
-            r'ngày\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'ngày\s+(\d{1,2})\s+tháng\s+(\d{1,2})\s+năm\s+(\d{4})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    if len(match.groups()) == 3:
-                        day, month, year = match.groups()
-                        start_date = datetime(int(year), int(month), int(day))
-                        dates_info['start_date'] = start_date.strftime("%Y-%m-%d")
-                        dates_info['flexible'] = False
-                        break
-                    elif len(match.groups()) == 2:
-                        day, month = match.groups()
-                        year = datetime.now().year
-                        date_obj = datetime(year, int(month), int(day))
-                        dates_info['start_date'] = date_obj.strftime("%Y-%m-%d")
-                        break
-                except:
-                    continue
-        
-        # Look for relative dates
-        if not dates_info and any(word in text.lower() for word in ["tuần sau", "tháng sau", "sắp tới"]):
-            dates_info['flexible'] = True
-            dates_info['timeframe'] = "tương lai gần"
-        
-        return dates_info if dates_info else None
+        slot = self.extraction_engine.get("travel_dates", user_input, context)
+        return dict(slot.value) if slot.found else None
     
     def _extract_travel_duration(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract travel duration"""
-        import re
-        
-        text = user_input + " " + context
-        duration_info = {}
-        
-        patterns = [
-            r'(\d+)\s*ngày',
-            r'(\d+)\s*tuần',
-            r'(\d+)\s*tháng',
-            r'(\d+)\s*days?',
-            r'(\d+)\s*weeks?',
-            r'(\d+)\s*months?'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    number = int(match.group(1))
-                    if 'ngày' in match.group() or 'days' in match.group():
-                        duration_info['total_days'] = number
-                        duration_info['unit'] = 'days'
-                    elif 'tuần' in match.group() or 'weeks' in match.group():
-                        duration_info['total_days'] = number * 7
-                        duration_info['unit'] = 'weeks'
-                    elif 'tháng' in match.group() or 'months' in match.group():
-                        duration_info['total_days'] = number * 30
-                        duration_info['unit'] = 'months'
-                    break
-                except:
-                    continue
-        
-        return duration_info if duration_info else None
+        slot = self.extraction_engine.get("travel_duration", user_input, context)
+        return dict(slot.value) if slot.found else None
     
     def _extract_travel_participants(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract travel participants information"""
-        import re
-        
-        text = user_input + " " + context
+        slot = self.extraction_engine.get("travel_participants", user_input, context)
         participants_info = {
             'adults': 1,  # Default
             'children': 0,
             'total': 1
         }
         
-        # Look for participant patterns
-        patterns = [
-            r'(\d+)\s*(?:người|khách|people)',
-            r'(?:gia đình|family)\s*(\d+)\s*(?:người|members)',
-            r'(\d+)\s*(?:adults?|người lớn)',
-            r'(\d+)\s*(?:children|trẻ em)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    number = int(match.group(1))
-                    if 'adults' in match.group() or 'người lớn' in match.group():
-                        participants_info['adults'] = number
-                    elif 'children' in match.group() or 'trẻ em' in match.group():
-                        participants_info['children'] = number
-                    elif 'gia đình' in match.group() or 'family' in match.group():
-                        participants_info['total'] = number
-                        participants_info['type'] = 'family'
-                    else:
-                        participants_info['total'] = number
-                    break
-                except:
-                    continue
+        if slot.found:
+            kind, number = slot.value['kind'], slot.value['count']
+            if kind == 'adults':
+                participants_info['adults'] = number
+            elif kind == 'children':
+                participants_info['children'] = number
+            elif kind == 'family':
+                participants_info['total'] = number
+                participants_info['type'] = 'family'
+            else:
+                participants_info['total'] = number
         
         participants_info['total'] = participants_info['adults'] + participants_info['children']
         return participants_info
     
     def _extract_travel_budget(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract budget information"""
-        import re
-        
-        text = user_input + " " + context
+        slot = self.extraction_engine.get("travel_budget", user_input, context)
         budget_info = {}
         
-        # Look for budget patterns
-        patterns = [
-            r'(?:ngân sách|budget)\s*[:=]\s*([0-9,]+)\s*(?:đồng|vnd|usd|\$)',
-            r'([0-9,]+)\s*(?:triệu|million)',
-            r'([0-9,]+)\s*(?:nghìn|thousand)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    amount_str = match.group(1).replace(',', '')
-                    amount = int(amount_str)
-                    
-                    if 'triệu' in match.group() or 'million' in match.group():
-                        amount *= 1000000
-                        budget_info['currency'] = 'VND'
-                    elif 'nghìn' in match.group() or 'thousand' in match.group():
-                        amount *= 1000
-                        budget_info['currency'] = 'VND'
-                    elif 'usd' in match.group() or '$' in match.group():
-                        budget_info['currency'] = 'USD'
-                    else:
-                        budget_info['currency'] = 'VND'
-                    
-                    budget_info['total_amount'] = amount
-                    budget_info['per_person'] = amount // max(1, self._get_participant_count(user_input, context))
-                    break
-                except:
-                    continue
+        if slot.found:
+            budget_info['currency'] = slot.value['currency']
+            budget_info['total_amount'] = slot.value['amount']
+            budget_info['per_person'] = slot.value['amount'] // max(1, self._get_participant_count(user_input, context))
         
         # Check budget level from user config
         if not budget_info:
@@ -1693,58 +1898,19 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
     
     def _extract_visa_requirements(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract visa requirements"""
-        text = (user_input + " " + context).lower()
-        
-        visa_info = {}
-        
-        if any(word in text for word in ['visa', 'thị thực', 'hộ chiếu', 'passport']):
-            visa_info['needs_visa'] = True
-            
-            if any(word in text for word in ['có sẵn', 'đã có', 'ready']):
-                visa_info['status'] = 'ready'
-            elif any(word in text for word in ['cần xin', 'chưa có', 'need to apply']):
-                visa_info['status'] = 'need_to_apply'
-            else:
-                visa_info['status'] = 'unknown'
-        
-        return visa_info if visa_info else None
+        slot = self.extraction_engine.get("visa_requirements", user_input, context)
+        return dict(slot.value) if slot.found else None
     
     def _extract_health_requirements(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract health requirements"""
-        text = (user_input + " " + context).lower()
-        
-        health_info = {}
-        
-        if any(word in text for word in ['vaccine', 'vắc xin', 'tiêm chủng', 'y tế', 'health']):
-            health_info['needs_vaccination'] = True
-            
-            if any(word in text for word in ['đã tiêm', 'completed', 'done']):
-                health_info['vaccination_status'] = 'completed'
-            else:
-                health_info['vaccination_status'] = 'needed'
-        
-        # Check for special health needs
-        if any(word in text for word in ['dị ứng', 'allergy', 'bệnh', 'illness']):
-            health_info['special_needs'] = True
-        
-        return health_info if health_info else None
+        slot = self.extraction_engine.get("health_requirements", user_input, context)
+        return dict(slot.value) if slot.found else None
     
     def _extract_travel_style(self, user_input: str, context: str, chat_history: List) -> str:
         """Extract travel style from user input or config"""
-        text = (user_input + " " + context).lower()
-        
-        style_keywords = {
-            'budget': ['tiết kiệm', 'rẻ', 'budget', 'cheap'],
-            'luxury': ['sang trọng', 'cao cấp', 'luxury', 'premium'],
-            'adventure': ['phiêu lưu', 'adventure', 'thám hiểm'],
-            'cultural': ['văn hóa', 'culture', 'lịch sử'],
-            'relaxation': ['thư giãn', 'nghỉ dưỡng', 'relaxation'],
-            'family': ['gia đình', 'family']
-        }
-        
-        for style, keywords in style_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                return style
+        slot = self.extraction_engine.get("travel_style", user_input, context)
+        if slot.found:
+            return slot.value
         
         # Get from user config
         user_interests = self.config_manager.get_user_interests()
@@ -1760,23 +1926,7 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
     
     def _extract_preferred_activities(self, user_input: str, context: str, chat_history: List) -> List[str]:
         """Extract preferred activities"""
-        text = (user_input + " " + context).lower()
-        activities = []
-        
-        activity_keywords = {
-            'sightseeing': ['tham quan', 'ngắm cảnh', 'sightseeing'],
-            'food_tour': ['ẩm thực', 'food', 'đặc sản'],
-            'shopping': ['mua sắm', 'shopping'],
-            'photography': ['chụp ảnh', 'photography'],
-            'outdoor': ['ngoài trời', 'outdoor', 'trekking'],
-            'beach': ['biển', 'beach', 'bơi lội'],
-            'cultural': ['văn hóa', 'cultural', 'bảo tàng', 'museum'],
-            'nightlife': ['đêm', 'nightlife', 'bar']
-        }
-        
-        for activity, keywords in activity_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                activities.append(activity)
+        activities = list(self.extraction_engine.get("activities", user_input, context).value)
         
         # Get from user config
         user_interests = self.config_manager.get_user_interests()
@@ -1789,17 +1939,11 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
     
     def _extract_accommodation_preferences(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract accommodation preferences"""
-        text = (user_input + " " + context).lower()
+        slot = self.extraction_engine.get("accommodation_type", user_input, context)
         accommodation_info = {}
         
-        if any(word in text for word in ['khách sạn', 'hotel']):
-            accommodation_info['type'] = 'hotel'
-        elif any(word in text for word in ['resort']):
-            accommodation_info['type'] = 'resort'
-        elif any(word in text for word in ['homestay']):
-            accommodation_info['type'] = 'homestay'
-        elif any(word in text for word in ['hostel']):
-            accommodation_info['type'] = 'hostel'
+        if slot.found:
+            accommodation_info['type'] = slot.value
         
         # Get budget level from user config
         budget_level = self.config_manager.get_user_budget_range('accommodation')
@@ -1810,19 +1954,8 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
     
     def _extract_transportation_preferences(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract transportation preferences"""
-        text = (user_input + " " + context).lower()
-        transport_info = {}
-        
-        if any(word in text for word in ['máy bay', 'flight', 'fly']):
-            transport_info['primary'] = 'flight'
-        elif any(word in text for word in ['tàu', 'train']):
-            transport_info['primary'] = 'train'
-        elif any(word in text for word in ['xe buýt', 'bus']):
-            transport_info['primary'] = 'bus'
-        elif any(word in text for word in ['xe hơi', 'car', 'ô tô']):
-            transport_info['primary'] = 'car'
-        
-        return transport_info if transport_info else None
+        slot = self.extraction_engine.get("transportation", user_input, context)
+        return {'primary': slot.value} if slot.found else None
     
     def _extract_meal_preferences(self, user_input: str, context: str, chat_history: List) -> Dict[str, Any]:
         """Extract meal preferences"""
@@ -1833,12 +1966,9 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
         if dietary:
             meal_info.update(dietary)
         
-        text = (user_input + " " + context).lower()
-        
-        if any(word in text for word in ['ăn chay', 'vegetarian']):
-            meal_info['vegetarian'] = True
-        elif any(word in text for word in ['halal']):
-            meal_info['halal'] = True
+        slot = self.extraction_engine.get("meals", user_input, context)
+        if slot.found:
+            meal_info.update(slot.value)
         
         return meal_info if meal_info else None
     
@@ -1852,44 +1982,24 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
     # Helper methods for travel planning
     def _determine_country(self, location: str) -> str:
         """Determine country from location"""
-        vietnam_locations = [
-            'hà nội', 'hồ chí minh', 'đà nẵng', 'nha trang', 'huế', 
-            'hội an', 'sapa', 'đà lạt', 'phú quốc', 'cần thơ',
-            'hạ long', 'ninh bình', 'mù cang chải'
-        ]
-        
-        if any(vn_loc in location.lower() for vn_loc in vietnam_locations):
-            return 'Việt Nam'
+        match = self.gazetteer.resolve(location)
+        if match:
+            return match.country
         
         # Add more country detection logic here
         return 'Unknown'
     
     def _determine_region(self, location: str) -> str:
         """Determine region from location"""
-        north_locations = ['hà nội', 'sapa', 'hạ long', 'ninh bình']
-        central_locations = ['huế', 'đà nẵng', 'hội an']
-        south_locations = ['hồ chí minh', 'đà lạt', 'nha trang', 'phú quốc']
-        
-        location_lower = location.lower()
-        
-        if any(loc in location_lower for loc in north_locations):
-            return 'Miền Bắc'
-        elif any(loc in location_lower for loc in central_locations):
-            return 'Miền Trung'
-        elif any(loc in location_lower for loc in south_locations):
-            return 'Miền Nam'
+        match = self.gazetteer.resolve(location)
+        if match:
+            return match.region
         
         return 'Unknown'
     
     def _get_participant_count(self, user_input: str, context: str) -> int:
         """Get participant count from text"""
-        import re
-        text = user_input + " " + context
-        
-        match = re.search(r'(\d+)\s*(?:người|khách)', text)
-        if match:
-            return int(match.group(1))
-        return 1
+        return self.extraction_engine.get("participant_count", user_input, context).value
     
     def _request_missing_travel_info(self, missing_fields: list, current_info: dict) -> str:
         """Generate message requesting missing travel information"""
@@ -1933,7 +2043,7 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
         
         return message
     
-    def _generate_travel_plan_confirmation(self, travel_info: dict) -> str:
+    def _generate_travel_plan_confirmation(self, travel_info: dict, weather_report: str = None) -> str:
         """Generate travel plan confirmation message"""
         
         message = f"""🧳 **XÁC NHẬN KẾ HOẠCH DU LỊCH**
@@ -1970,6 +2080,9 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin."""
             health_status = travel_info['health_requirements'].get('vaccination_status', 'unknown')
             message += f"🏥 **Y tế:** {health_status}\n"
         
+        if weather_report:
+            message += f"\n{weather_report}\n"
+        
         message += f"""
 ❓ **Thông tin kế hoạch trên có chính xác không?**
 
@@ -1979,6 +2092,42 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin.
         
         return message
     
+    def _traced_suggestions(self, *args) -> List[Dict[str, str]]:
+        with self.tracer.span("suggestions") as span:
+            suggestions = self._generate_contextual_suggestions(*args)
+            span["count"] = len(suggestions)
+        return suggestions
+    
+    def _suggest_and_prefetch(self, conversation_id: str, issued_at: float, user_input: str, result: Dict[str, Any],
+                              detected_tool: str, context: str, chat_history: List) -> List[Dict[str, str]]:
+        """Suggestions of a turn, then prefetch the top ones against the history that follows it"""
+        suggestions = self._traced_suggestions(user_input, result, detected_tool, context, chat_history)
+        if self.prefetcher.enabled and suggestions:
+            history = list(chat_history) + [("user", user_input), ("assistant", result.get('response') or "")]
+            self.prefetcher.schedule(
+                conversation_id, suggestions,
+                lambda suggestion, full_answer: self._aprefetch_suggestion(
+                    suggestion, full_answer, history, context, conversation_id
+                ),
+                issued_at
+            )
+        return suggestions
+    
+    def get_suggestions(self, turn_id: str, timeout: float = None) -> Optional[List[Dict[str, str]]]:
+        """
+        Suggestions of a turn that returned suggestions_pending
+        
+        Args:
+            turn_id: result["turn_id"] of the turn
+            timeout: Seconds to wait for them (None = do not wait)
+        
+        Returns:
+            The suggestions, or None while they are still being generated
+        """
+        if timeout:
+            return self.suggestion_worker.wait(turn_id, timeout)
+        return self.suggestion_worker.get(turn_id)
+    
     def _generate_contextual_suggestions(self, user_input: str, result: Dict[str, Any], 
                                        detected_tool: str, context: str, 
                                        chat_history: List) -> List[Dict[str, str]]:
@@ -2032,6 +2181,7 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin.
                     'text': suggestion.text,
                     'category': suggestion.category,
                     'tool_target': suggestion.tool_target.value,
+                    'location': suggestion.location,
                     'score': suggestion.total_score()
                 })
             
@@ -2048,20 +2198,9 @@ Trả lời "**Không**" hoặc "**Sửa**" để điều chỉnh thông tin.
             return []
     
     def _extract_location_from_text(self, text: str) -> str:
-        """Extract location from text using simple pattern matching - consistent with suggestion engine"""
+        """Extract location from text using the shared gazetteer - consistent with suggestion engine"""
         if not text:
             return None
-            
-        # Vietnamese location patterns
-        vietnam_locations = [
-            "hà nội", "hồ chí minh", "đà nẵng", "nha trang", "huế", "hội an",
-            "sapa", "đà lạt", "phú quốc", "cần thơ", "vũng tầu", "phan thiết",
-            "hạ long", "ninh bình", "mù cang chải", "tam cốc", "bái đính"
-        ]
-        
-        text_lower = text.lower()
-        for location in vietnam_locations:
-            if location in text_lower:
-                return location.title()
         
-        return None
\ No newline at end of file
+        location = self.gazetteer.find_first(text)
+        return location.name if location else None
@@ -0,0 +1,201 @@
+"""
+Usage Tracker - Token and cost accounting for LLM and embedding calls
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+import logging
+
+from .tracing import current_turn
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+# Share of the input price charged for prompt tokens served from the provider's prompt cache
+CACHED_INPUT_PRICE_RATIO = 0.5
+
+
+def estimate_cost(model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+                  embedding_tokens: int = 0, cached_tokens: int = 0) -> float:
+    """Estimated USD cost of a call (0 for unknown models); cached_tokens are part of prompt_tokens"""
+    input_price, output_price = MODEL_PRICES.get((model or "").lower(), (0.0, 0.0))
+    input_tokens = prompt_tokens + embedding_tokens - cached_tokens * (1 - CACHED_INPUT_PRICE_RATIO)
+    return (input_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def _detail(details: Any, key: str) -> int:
+    """Token count from a usage details object or dict (0 when missing)"""
+    if details is None:
+        return 0
+    value = details.get(key) if isinstance(details, dict) else getattr(details, key, None)
+    return int(value or 0)
+
+
+def usage_from_response(response: Any) -> Dict[str, int]:
+    """
+    Token counts from a LangChain message or an OpenAI SDK response
+    Returns {"prompt_tokens", "completion_tokens", "cached_tokens"} (zeros when the provider reports nothing);
+    cached_tokens are the prompt tokens served from the provider's prompt prefix cache
+    """
+    # LangChain AIMessage
+    usage_metadata = getattr(response, "usage_metadata", None)
+    if usage_metadata:
+        return {
+            "prompt_tokens": int(usage_metadata.get("input_tokens", 0) or 0),
+            "completion_tokens": int(usage_metadata.get("output_tokens", 0) or 0),
+            "cached_tokens": _detail(usage_metadata.get("input_token_details"), "cache_read")
+        }
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        return {
+            "prompt_tokens": int(token_usage.get("prompt_tokens", 0) or 0),
+            "completion_tokens": int(token_usage.get("completion_tokens", 0) or 0),
+            "cached_tokens": _detail(token_usage.get("prompt_tokens_details"), "cached_tokens")
+        }
+    
+    # OpenAI SDK (chat completions and embeddings)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return {
+            "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+            "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+            "cached_tokens": _detail(getattr(usage, "prompt_tokens_details", None), "cached_tokens")
+        }
+    
+    return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+
+class _Call:
+    """Holder for the response of a tracked call"""
+    
+    __slots__ = ("response",)
+    
+    def __init__(self):
+        self.response = None
+
+
+class UsageTracker:
+    """
+    Records prompt, completion and embedding tokens of every model call
+    - Calls are attributed to stage, tool, conversation and turn (from the active trace turn)
+    - Records are buffered and written to SQLite (llm_usage) in one transaction per turn
+    """
+    
+    def __init__(self, db_manager, flush_every: int = 20):
+        self.db_manager = db_manager
+        self.flush_every = flush_every
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def track(self, stage: str, model: str, embedding: bool = False, tool: str = None,
+              conversation_id: str = None):
+        """
+        Time a model call and record its usage
+        
+        Usage:
+            with tracker.track("rag.generation", "GPT-4o-mini") as call:
+                call.response = client.chat.completions.create(...)
+        """
+        call = _Call()
+        start = time.perf_counter()
+        yield call
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        if call.response is None:
+            return
+        try:
+            tokens = usage_from_response(call.response)
+            self.record(
+                stage, model,
+                prompt_tokens=0 if embedding else tokens["prompt_tokens"],
+                completion_tokens=tokens["completion_tokens"],
+                embedding_tokens=tokens["prompt_tokens"] if embedding else 0,
+                cached_tokens=0 if embedding else tokens["cached_tokens"],
+                latency_ms=latency_ms,
+                tool=tool,
+                conversation_id=conversation_id
+            )
+        except Exception as e:
+            logger.warning(f"Could not record usage for {stage}: {e}")
+    
+    def record(self, stage: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               embedding_tokens: int = 0, latency_ms: float = 0.0, tool: str = None,
+               conversation_id: str = None, turn_id: str = None, cached_tokens: int = 0):
+        """Buffer one usage record"""
+        turn = current_turn()
+        if turn is not None:
+            turn_id = turn_id or turn.turn_id
+            conversation_id = conversation_id or turn.conversation_id
+            tool = tool or turn.attrs.get("tool")
+        
+        record = {
+            "conversation_id": conversation_id,
+            "turn_id": turn_id,
+            "stage": stage,
+            "tool": tool,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "embedding_tokens": embedding_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens, embedding_tokens, cached_tokens),
+            "latency_ms": round(latency_ms, 3)
+        }
+        
+        with self._lock:
+            self._pending.append(record)
+            flush_now = turn is None and len(self._pending) >= self.flush_every
+        if flush_now:
+            self.flush()
+    
+    def flush(self) -> bool:
+        """Write buffered records to SQLite"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return True
+        return self.db_manager.save_llm_usage(pending)
+    
+    def summary(self, group_by: str = "stage", conversation_id: str = None,
+                since: str = None) -> List[Dict[str, Any]]:
+        """
+        Aggregated usage
+        
+        Args:
+            group_by: stage, tool, model, conversation_id, turn_id or None for one total row
+            conversation_id: Restrict to one conversation
+            since: Only records created at or after this timestamp ("YYYY-MM-DD HH:MM:SS")
+        """
+        self.flush()
+        return self.db_manager.get_llm_usage_summary(group_by, conversation_id, since)
+    
+    def totals(self, conversation_id: str = None, since: str = None) -> Dict[str, Any]:
+        """Totals over all stages"""
+        rows = self.summary(None, conversation_id, since)
+        return rows[0] if rows else {}
+
+
+_shared_tracker: Optional[UsageTracker] = None
+_shared_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the process-wide usage tracker (created on first use, stores into the app database)"""
+    global _shared_tracker
+    
+    if _shared_tracker is None:
+        with _shared_lock:
+            if _shared_tracker is None:
+                from .resource_registry import get_resource_registry
+                _shared_tracker = UsageTracker(get_resource_registry().config_manager.db_manager)
+    return _shared_tracker
@@ -3,7 +3,6 @@ Text-to-Speech utilities
 """
 
 import io
-from gtts import gTTS
 import streamlit as st
 
 
@@ -16,6 +15,7 @@ def speak(text: str, lang: str = 'vi') -> None:
         lang: Language code (default: 'vi' for Vietnamese)
     """
     try:
+        from gtts import gTTS  # Imported on first use to keep app startup fast
         tts = gTTS(text=text, lang=lang)
         mp3_fp = io.BytesIO()
         tts.write_to_fp(mp3_fp)
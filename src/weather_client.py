@@ -0,0 +1,270 @@
+"""
+Weather Client - Shared OpenWeatherMap client with pooled HTTP session and TTL cache
+Sync (requests) and async (httpx) callers share the same cache
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from .tracing import get_tracer
+from .providers import create_weather_session, create_async_weather_session
+from .resilience import RETRYABLE_STATUS_CODES, resilient_call, aresilient_call
+from .async_runtime import loop_local
+
+# Marks a cache miss (None is a cached "unknown city")
+_MISS = object()
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherAPIError(Exception):
+    """Transient OpenWeatherMap error status (rate limit, 5xx); retried by the resilience layer"""
+    
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        super().__init__(f"Weather API returned {status_code}")
+
+
+class WeatherClient:
+    """
+    OpenWeatherMap client shared by every agent in the process:
+    - Pooled requests.Session so connections are reused between turns
+    - City-keyed cache with separate TTLs for current weather and forecast
+    - Stale-while-revalidate: expired entries are served while a background refresh runs
+    """
+    
+    BASE_URL = "https://api.openweathermap.org/data/2.5"
+    ENDPOINTS = {
+        "current": "weather",
+        "forecast": "forecast"
+    }
+    
+    def __init__(self, api_key: str = None, current_ttl: float = 600, forecast_ttl: float = 1800,
+                 stale_ttl: float = 1800, not_found_ttl: float = 60, timeout: float = 10,
+                 pool_size: int = 20, max_entries: int = 500, session: requests.Session = None):
+        self.api_key = api_key or os.getenv("WEATHER_API_KEY")
+        self.ttls = {
+            "current": current_ttl,
+            "forecast": forecast_ttl
+        }
+        self.stale_ttl = stale_ttl
+        self.not_found_ttl = not_found_ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        
+        # Pooled HTTP session (keep-alive connections shared by all threads)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        
+        # (kind, city, lang) -> (fetched_at, data); data is None for unknown cities
+        self._cache: "OrderedDict[Tuple[str, str, str], Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather-refresh")
+        
+        # Simple counters for debugging cache efficiency
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0}
+    
+    def get_current(self, city: str, lang: str = "vi", timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Get current weather payload for a city (None if the city is unknown)"""
+        return self.get("current", city, lang, timeout)
+    
+    def get_forecast(self, city: str, lang: str = "vi", timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Get 5 day / 3 hour forecast payload for a city (None if the city is unknown)"""
+        return self.get("forecast", city, lang, timeout)
+    
+    def get(self, kind: str, city: str, lang: str = "vi", timeout: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Get weather data from cache or OpenWeatherMap
+        
+        Args:
+            kind: "current" or "forecast"
+            city: City name as typed by the user
+            lang: Language for weather descriptions
+            timeout: HTTP timeout for this call (defaults to the client timeout)
+        
+        Returns:
+            Raw OpenWeatherMap JSON, or None if the API does not know the city
+        """
+        if kind not in self.ENDPOINTS:
+            raise ValueError(f"Unknown weather kind: {kind}")
+        
+        key = (kind, self._normalize_city(city), lang or "")
+        data = self._cached(key, city)
+        if data is not _MISS:
+            return data
+        return self._fetch_and_store(key, city, timeout)
+    
+    async def aget_current(self, city: str, lang: str = "vi", timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Async get_current"""
+        return await self.aget("current", city, lang, timeout)
+    
+    async def aget_forecast(self, city: str, lang: str = "vi", timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Async get_forecast"""
+        return await self.aget("forecast", city, lang, timeout)
+    
+    async def aget(self, kind: str, city: str, lang: str = "vi", timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Async get(): cache hits return immediately, misses use the async HTTP session of the running loop"""
+        if kind not in self.ENDPOINTS:
+            raise ValueError(f"Unknown weather kind: {kind}")
+        
+        key = (kind, self._normalize_city(city), lang or "")
+        data = self._cached(key, city)
+        if data is not _MISS:
+            return data
+        
+        session = loop_local("weather_session", create_async_weather_session)
+        params = self._params(city, key[2])
+        
+        async def request():
+            response = await session.get(
+                f"{self.BASE_URL}/{self.ENDPOINTS[kind]}",
+                params=params,
+                timeout=timeout or self.timeout
+            )
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise WeatherAPIError(response.status_code)
+            return response
+        
+        with get_tracer().span("weather.http", kind=kind, city=city) as span:
+            response = await aresilient_call("weather", request)
+            span["status_code"] = response.status_code
+        
+        return self._store(key, city, response)
+    
+    def _cached(self, key: Tuple[str, str, str], city: str) -> Any:
+        """Cached payload (fresh or stale), or _MISS; stale hits schedule a background refresh"""
+        kind = key[0]
+        now = time.time()
+        
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                fetched_at, data = entry
+                age = now - fetched_at
+                ttl = self.ttls[kind] if data is not None else self.not_found_ttl
+                
+                if age <= ttl:
+                    self._cache.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return data
+                
+                if data is not None and age <= ttl + self.stale_ttl:
+                    # Serve stale data and refresh in the background
+                    self._cache.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._refresher.submit(self._refresh, key, city)
+                    return data
+            
+            self.stats["misses"] += 1
+        return _MISS
+    
+    def invalidate(self, city: str = None):
+        """Drop cached entries for a city, or the whole cache"""
+        with self._lock:
+            if city is None:
+                self._cache.clear()
+                return
+            normalized = self._normalize_city(city)
+            for key in [k for k in self._cache if k[1] == normalized]:
+                del self._cache[key]
+    
+    def _refresh(self, key: Tuple[str, str, str], city: str):
+        """Background revalidation of a stale entry"""
+        try:
+            self._fetch_and_store(key, city)
+        except Exception as e:
+            logger.warning(f"Background weather refresh failed for {city}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def _fetch_and_store(self, key: Tuple[str, str, str], city: str,
+                         timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Fetch from OpenWeatherMap and update the cache"""
+        kind, _, lang = key
+        params = self._params(city, lang)
+        
+        def request():
+            response = self.session.get(
+                f"{self.BASE_URL}/{self.ENDPOINTS[kind]}",
+                params=params,
+                timeout=timeout or self.timeout
+            )
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise WeatherAPIError(response.status_code)
+            return response
+        
+        with get_tracer().span("weather.http", kind=kind, city=city) as span:
+            response = resilient_call("weather", request)
+            span["status_code"] = response.status_code
+        
+        return self._store(key, city, response)
+    
+    def _params(self, city: str, lang: str) -> Dict[str, Any]:
+        """OpenWeatherMap query parameters"""
+        params = {
+            "q": city,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        if lang:
+            params["lang"] = lang
+        return params
+    
+    def _store(self, key: Tuple[str, str, str], city: str, response: Any) -> Optional[Dict[str, Any]]:
+        """Cache a response payload (200) or an unknown city (404)"""
+        if response.status_code == 200:
+            data = response.json()
+        elif response.status_code == 404:
+            data = None
+        else:
+            # Do not cache other errors (bad key, bad request)
+            logger.warning(f"Weather API returned {response.status_code} for {city}")
+            return None
+        
+        with self._lock:
+            self._cache[key] = (time.time(), data)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        
+        return data
+    
+    @staticmethod
+    def _normalize_city(city: str) -> str:
+        """Normalize city name for cache keys"""
+        return " ".join((city or "").lower().split())
+
+
+_shared_client: Optional[WeatherClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_weather_client() -> WeatherClient:
+    """Get the process-wide weather client (created on first use)"""
+    global _shared_client
+    
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = WeatherClient(
+                    current_ttl=float(os.getenv("WEATHER_CACHE_TTL_CURRENT", "600")),
+                    forecast_ttl=float(os.getenv("WEATHER_CACHE_TTL_FORECAST", "1800")),
+                    stale_ttl=float(os.getenv("WEATHER_CACHE_STALE_TTL", "1800")),
+                    session=create_weather_session()
+                )
+    return _shared_client
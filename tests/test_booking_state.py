@@ -0,0 +1,152 @@
+"""
+Booking state: merge override rules, bare-answer detection and session expiry
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking_state import (
+    AWAITING_CONFIRMATION, COLLECTING, EXPIRED, REQUIRED_FIELDS, BookingState
+)
+from src.extraction_engine import ExtractionEngine
+from src.gazetteer import get_gazetteer
+from src.travel_planner_agent import TravelPlannerAgent
+
+
+def reader(query_values, context_values=None):
+    """SlotReader over fixed values: {field: (value, confidence)} for the query and the context"""
+    context_values = context_values or {}
+    
+    def read_slot(field, query, context):
+        if field in query_values:
+            return query_values[field][0], query_values[field][1], True
+        if context and field in context_values:
+            return context_values[field][0], context_values[field][1], True
+        return "", 0.0, False
+    return read_slot
+
+
+@pytest.fixture
+def locate_slot():
+    agent = TravelPlannerAgent.__new__(TravelPlannerAgent)
+    agent.gazetteer = get_gazetteer()
+    agent.extraction_engine = ExtractionEngine()
+    return agent._locate_booking_slot
+
+
+def test_merge_fills_from_query_and_context():
+    state = BookingState("hotel")
+    changed = state.merge(reader({"customer_name": ("An", 0.9)}, {"nights": (3, 0.9)}), "q", "ctx")
+    
+    assert "customer_name" in changed and "nights" in changed
+    assert state.details["customer_name"] == "An"
+    assert state.details["nights"] == 3
+    assert state.filled_fields == ["customer_name", "nights"]
+    assert state.status == COLLECTING
+
+
+def test_filled_slot_ignores_context():
+    state = BookingState("hotel")
+    state.merge(reader({"customer_name": ("An", 0.9)}), "q", "")
+    
+    changed = state.merge(reader({}, {"customer_name": ("Bình", 0.9)}), "q", "ctx")
+    assert "customer_name" not in changed
+    assert state.details["customer_name"] == "An"
+
+
+def test_filled_slot_needs_confident_override():
+    state = BookingState("hotel")
+    state.merge(reader({"nights": (3, 0.9)}), "q", "")
+    
+    state.merge(reader({"nights": (5, 0.5)}), "q", "")
+    assert state.details["nights"] == 3
+    
+    changed = state.merge(reader({"nights": (5, 0.9)}), "q", "")
+    assert changed == ["nights"]
+    assert state.details["nights"] == 5
+
+
+def test_merge_moves_to_confirmation_when_complete():
+    values = {field: ("x", 0.9) for field in REQUIRED_FIELDS["car"]}
+    state = BookingState("car")
+    state.merge(reader(values), "q", "")
+    
+    assert state.missing_fields == []
+    assert state.status == AWAITING_CONFIRMATION
+
+
+def test_unknown_booking_type():
+    with pytest.raises(ValueError):
+        BookingState("flight")
+
+
+@pytest.mark.parametrize("query,asked", [
+    ("0901234567", ["customer_phone"]),
+    ("ngày 25/12/2024, 3 đêm", ["check_in_date"]),
+    ("ngày 25/12/2024 nhé", ["check_in_date", "nights"]),
+])
+def test_bare_answers_continue_the_booking(locate_slot, query, asked):
+    state = BookingState("hotel", asked=asked)
+    assert state.answers_asked(locate_slot, query)
+
+
+@pytest.mark.parametrize("query,asked", [
+    ("Thời tiết Đà Lạt ngày 25/12/2024 thế nào?", ["check_in_date"]),
+    ("tôi là sinh viên, nên đi đâu chơi", ["customer_name"]),
+    ("ở Đà Lạt 3 đêm thì nên đi đâu", ["nights"]),
+    ("3 đêm", ["customer_phone"]),  # only fields nobody asked for
+    ("0901234567", []),
+])
+def test_other_messages_are_not_answers(locate_slot, query, asked):
+    state = BookingState("hotel", asked=asked)
+    assert not state.answers_asked(locate_slot, query)
+
+
+def test_expires_after_idle_turns(monkeypatch):
+    monkeypatch.delenv("BOOKING_MAX_IDLE_TURNS", raising=False)
+    state = BookingState("hotel", idle_turns=2)
+    assert not state.is_expired()
+    
+    state.record_idle_turn(None)
+    assert state.is_expired()
+    
+    monkeypatch.setenv("BOOKING_MAX_IDLE_TURNS", "5")
+    assert not state.is_expired()
+
+
+def test_expires_after_ttl(monkeypatch):
+    monkeypatch.delenv("BOOKING_SESSION_TTL_MINUTES", raising=False)
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    fresh = (now - timedelta(minutes=10)).strftime("%Y-%m-%d %H:%M:%S")
+    stale = (now - timedelta(minutes=31)).strftime("%Y-%m-%d %H:%M:%S")
+    
+    assert not BookingState("car", updated_at=fresh).is_expired(now)
+    assert BookingState("car", updated_at=stale).is_expired(now)
+    # Awaiting confirmation never expires on its own
+    assert not BookingState("car", status=AWAITING_CONFIRMATION, updated_at=stale, idle_turns=9).is_expired(now)
+
+
+class FakeDB:
+    def __init__(self, session):
+        self.session = session
+        self.statuses = []
+    
+    def get_booking_session(self, conversation_id, booking_type=None):
+        return self.session
+    
+    def update_booking_session_status(self, conversation_id, booking_type, status):
+        self.statuses.append((booking_type, status))
+        return True
+
+
+def test_load_closes_expired_session():
+    db = FakeDB({"conversation_id": "c1", "booking_type": "hotel", "status": COLLECTING,
+                 "slots": {"nights": {"value": 3, "filled": True}}, "asked": ["customer_name"],
+                 "idle_turns": 3, "updated_at": None})
+    
+    assert BookingState.load_open(db, "c1") is None
+    assert db.statuses == [("hotel", EXPIRED)]
+    
+    fresh = BookingState.load(db, "c1", "hotel")
+    assert fresh.slots == {} and fresh.status == COLLECTING
@@ -0,0 +1,108 @@
+"""
+Degradation controller: escalation on SLO breaches, hold times and recovery
+"""
+
+import time
+
+from src.degradation import (
+    DEFAULT_SLOS_MS, KEYWORD_ROUTING, LEAN, NORMAL, RETRIEVAL_ONLY, DegradationController, _slos_from_env
+)
+
+
+def controller(**overrides):
+    settings = dict(slos_ms={"intent_detection": 1000.0, "turn": 5000.0}, min_samples=3, escalate_after=0.0,
+                    recover_after=60.0)
+    settings.update(overrides)
+    return DegradationController(**settings)
+
+
+def breach(degradation, stage="intent_detection", duration_ms=2000.0, count=3):
+    for _ in range(count):
+        degradation.observe(stage, duration_ms)
+
+
+def test_breach_steps_down_one_mode():
+    degradation = controller()
+    breach(degradation, count=2)
+    assert degradation.mode == NORMAL  # below min_samples
+    
+    breach(degradation, count=1)
+    assert degradation.mode == LEAN
+    assert "intent_detection p90 2000ms > SLO 1000ms" in degradation.state()["reason"]
+
+
+def test_windows_are_cleared_on_every_change():
+    degradation = controller()
+    breach(degradation)
+    breach(degradation, count=2)
+    assert degradation.mode == LEAN
+    assert degradation.state()["p90_ms"] == {"intent_detection": 2000.0}
+    
+    breach(degradation, count=1)
+    assert degradation.mode == KEYWORD_ROUTING
+
+
+def test_escalation_stops_at_retrieval_only():
+    degradation = controller()
+    for _ in range(6):
+        breach(degradation, stage="turn", duration_ms=9000.0)
+    assert degradation.mode == RETRIEVAL_ONLY
+    assert degradation.mode_name == "retrieval_only"
+
+
+def test_escalate_after_holds_the_mode():
+    degradation = controller(escalate_after=60.0)
+    breach(degradation)
+    assert degradation.mode == NORMAL  # just started, still within the hold time
+
+
+def test_fast_stages_and_unknown_stages_do_not_escalate():
+    degradation = controller()
+    breach(degradation, duration_ms=500.0, count=10)
+    breach(degradation, stage="suggestions", duration_ms=99999.0, count=10)
+    assert degradation.mode == NORMAL
+    assert "suggestions" not in degradation.state()["p90_ms"]
+
+
+def test_recovers_one_step_at_a_time():
+    degradation = controller(recover_after=0.05)
+    breach(degradation)
+    breach(degradation)
+    assert degradation._mode == KEYWORD_ROUTING
+    
+    time.sleep(0.06)
+    assert degradation.mode == LEAN
+    time.sleep(0.06)
+    assert degradation.mode == NORMAL
+
+
+def test_slow_latency_blocks_recovery():
+    degradation = controller(recover_after=0.05)
+    breach(degradation)
+    assert degradation.mode == LEAN
+    
+    time.sleep(0.06)
+    # Under the SLO but above recovery_ratio * SLO: stays degraded
+    degradation.observe("intent_detection", 900.0)
+    assert degradation.mode == LEAN
+    
+    degradation._samples["intent_detection"].clear()
+    degradation.observe("intent_detection", 300.0)
+    assert degradation.mode == NORMAL
+
+
+def test_disabled_controller_stays_normal():
+    degradation = controller(enabled=False)
+    breach(degradation, count=10)
+    assert degradation.mode == NORMAL
+    assert degradation.state()["p90_ms"] == {}
+
+
+def test_slos_from_env(monkeypatch):
+    monkeypatch.setenv("LATENCY_SLO_MS", "intent_detection=2000, turn=15000,bad,rag=x")
+    slos = _slos_from_env()
+    
+    assert slos["intent_detection"] == 2000.0
+    assert slos["turn"] == 15000.0
+    assert slos["rag"] == DEFAULT_SLOS_MS["rag"]
+    assert "bad" not in slos
@@ -0,0 +1,81 @@
+"""
+Extraction engine: same values as the per-field helpers it replaced, one pass per (query, context)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.extraction_engine import ExtractionEngine
+
+# Values returned by the former _extract_* helpers of TravelPlannerAgent for these messages
+PARITY_CASES = [
+    ("Tên tôi là Nguyễn Văn An, số điện thoại 0901234567, email an.nguyen@example.com", {
+        "customer_name": "Nguyễn Văn An", "customer_phone": "0901234567",
+        "customer_email": "an.nguyen@example.com", "hotel_name": "", "check_in_date": "",
+        "nights": 1, "guests": 2, "rooms": 1, "room_type": "standard"
+    }),
+    ("Đặt khách sạn Sunrise ở Đà Nẵng ngày 12/8/2025 3 đêm cho 2 người, sđt 0912345678", {
+        "customer_name": "", "customer_phone": "0912345678", "hotel_name": "Sunrise Ở Đà Nẵng Ngày",
+        "check_in_date": "2025-08-12", "nights": 3, "guests": 2, "rooms": 1
+    }),
+    ("Tôi muốn đặt 2 phòng đôi, 4 người, ngày 25 tháng 12, ở 2 đêm", {
+        "check_in_date": f"{datetime.now().year}-12-25", "nights": 2, "guests": 4, "rooms": 2,
+        "room_type": "double"
+    }),
+    ("Đặt xe 7 chỗ đón ở sân bay Nội Bài lúc 8:30 đi Hạ Long", {
+        "pickup_time": "08:30", "car_type": "7 chỗ", "seats": 7, "destination": ""
+    }),
+    ("Thuê xe 16 chỗ từ khách sạn Melia đến Ninh Bình lúc 14h, ghi chú: có trẻ em", {
+        "pickup_location": "khách sạn Melia", "destination": "Ninh Bình lúc", "pickup_time": "14:00",
+        "car_type": "16 chỗ", "seats": 16, "special_requests": "có trẻ em"
+    }),
+    ("phòng suite cho 3 khách, yêu cầu: tầng cao, view biển", {
+        "guests": 3, "room_type": "suite", "special_requests": "tầng cao, view biển", "car_type": "4 chỗ"
+    }),
+]
+
+
+@pytest.fixture
+def engine():
+    return ExtractionEngine()
+
+
+@pytest.mark.parametrize("query,expected", PARITY_CASES)
+def test_parity_with_former_helpers(engine, query, expected):
+    slots = engine.extract(query, "", expected.keys())
+    assert {name: slot.value for name, slot in slots.items()} == expected
+
+
+def test_source_and_found(engine):
+    from_query = engine.get("customer_phone", "sđt 0912345678", "")
+    from_context = engine.get("customer_phone", "đặt phòng", "sđt 0912345678")
+    default = engine.get("customer_phone", "đặt phòng", "")
+    
+    assert (from_query.source, from_query.found) == ("query", True)
+    assert (from_context.source, from_context.found) == ("context", True)
+    assert (default.source, default.found, default.value) == ("default", False, "")
+
+
+def test_span_points_into_the_query(engine):
+    query = "ở Đà Lạt 3 đêm thì nên đi đâu"
+    slot = engine.get("nights", query)
+    assert query[slot.span[0]:slot.span[1]] == "3 đêm"
+
+
+def test_units_are_case_insensitive(engine):
+    query = "Lên kế hoạch du lịch Đà Lạt 2 Tuần cho 4 người, ngân sách: 500 USD"
+    assert engine.get("travel_duration", query).value == {"total_days": 14, "unit": "weeks"}
+    assert engine.get("travel_budget", query).value == {"amount": 500, "currency": "USD"}
+    assert engine.get("participant_count", query).value == 4
+
+
+def test_each_field_is_computed_once_per_text(engine):
+    first = engine.get("nights", "3 đêm", "ctx")
+    assert engine.get("nights", "3 đêm", "ctx") is first
+    assert engine.extract("3 đêm", "ctx", ["nights"])["nights"] is first
+
+
+def test_unknown_field(engine):
+    with pytest.raises(KeyError):
+        engine.get("no_such_field", "x")
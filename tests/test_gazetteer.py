@@ -0,0 +1,72 @@
+"""
+Gazetteer: diacritic-insensitive Aho-Corasick matching, aliases and mention spans
+"""
+
+import pytest
+
+from src.gazetteer import fold, get_gazetteer
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return get_gazetteer()
+
+
+def test_fold():
+    assert fold("Đà Nẵng") == "da nang"
+    assert fold("ĐÀ LẠT") == "da lat"
+    assert fold("") == ""
+
+
+@pytest.mark.parametrize("text", ["Đà Nẵng", "đà nẵng", "ĐÀ NẴNG", "Da Nang", "da nang", "danang"])
+def test_accent_insensitive_matching(gazetteer, text):
+    assert gazetteer.find_first(f"Thời tiết {text} hôm nay").name == "Đà Nẵng"
+
+
+def test_wrong_accents_do_not_match(gazetteer):
+    # "huệ" is a different word, only "Huế" or the accent-less "Hue" mean the city
+    assert gazetteer.find_first("hoa huệ trắng") is None
+    assert gazetteer.find_first("đi Hue chơi").name == "Huế"
+
+
+def test_whole_words_only(gazetteer):
+    assert gazetteer.find_first("hoàn thuế VAT") is None  # "thue" contains "hue"
+
+
+@pytest.mark.parametrize("alias", ["Sài Gòn", "saigon", "TP HCM", "tp.hcm", "thành phố Hồ Chí Minh"])
+def test_aliases(gazetteer, alias):
+    assert gazetteer.find_first(f"Bay vào {alias} tối nay").name == "Hồ Chí Minh"
+    assert gazetteer.lookup(alias).name == "Hồ Chí Minh"
+
+
+def test_mention_spans_use_original_text(gazetteer):
+    text = "Từ Ha Noi đi Đà Lạt rồi ghé Bà Nà"
+    mentions = gazetteer.find_all(text)
+    
+    assert [m.location.name for m in mentions] == ["Hà Nội", "Đà Lạt", "Bà Nà Hills"]
+    for mention in mentions:
+        assert text[mention.start:mention.end] == mention.text
+    assert mentions[0].text == "Ha Noi"
+
+
+def test_landmarks_use_parent_for_weather(gazetteer):
+    landmark = gazetteer.find_first("ghé Bà Nà")
+    assert landmark.kind == "landmark"
+    assert landmark.weather_name == "Đà Nẵng"
+
+
+def test_leftmost_longest(gazetteer):
+    mentions = gazetteer.find_all("Du lịch Bà Rịa - Vũng Tàu")
+    assert [m.location.name for m in mentions] == ["Bà Rịa - Vũng Tàu"]
+
+
+def test_find_locations_is_distinct_and_filtered(gazetteer):
+    text = "Đà Nẵng, Hội An rồi lại Đà Nẵng"
+    assert [l.name for l in gazetteer.find_locations(text)] == ["Đà Nẵng", "Hội An"]
+    assert [l.name for l in gazetteer.find_locations(text, kinds=["city"])] == ["Hội An"]
+
+
+def test_lookup_and_resolve(gazetteer):
+    assert gazetteer.lookup("khong co") is None
+    assert gazetteer.lookup("  da lat ").name == "Đà Lạt"
+    assert gazetteer.resolve("Lịch trình 3 ngày ở Nha Trang").name == "Nha Trang"
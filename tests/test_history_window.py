@@ -0,0 +1,88 @@
+"""
+History window: token budget, summary of older turns and the message limit
+"""
+
+import pytest
+
+from src.history_window import (
+    ASSISTANT_TURN_TOKENS, SUMMARY_TOKENS, USER_TURN_TOKENS, build_history_window, count_tokens,
+    history_fetch_limit
+)
+
+
+def conversation(turns, user_chars=200, assistant_chars=600):
+    history = []
+    for i in range(turns):
+        history.append(("user", f"câu hỏi {i} " + "u" * user_chars))
+        history.append(("assistant", f"trả lời {i} " + "a" * assistant_chars))
+    return history
+
+
+def test_short_history_is_kept_verbatim():
+    history = [("user", "Thời tiết Đà Lạt?"), ("assistant", "Đà Lạt 18°C")]
+    window = build_history_window(history)
+    
+    assert window.messages == history
+    assert window.summary == "" and window.summarized == 0
+    assert window.text() == "Người dùng: Thời tiết Đà Lạt?\nTrợ lý: Đà Lạt 18°C"
+
+
+def test_empty_history():
+    window = build_history_window([])
+    assert not window and window.text() == ""
+
+
+@pytest.mark.parametrize("budget", [200, 400, 800, 1500])
+def test_budget_is_respected(budget):
+    window = build_history_window(conversation(30), token_budget=budget)
+    
+    assert window.tokens <= budget
+    assert window.messages[-1][1].startswith("trả lời 29")
+    assert window.summarized == len(conversation(30)[-history_fetch_limit():]) - len(window.messages)
+
+
+def test_prompt_size_does_not_grow_with_the_conversation():
+    sizes = {build_history_window(conversation(turns)).tokens for turns in (40, 60, 90)}
+    assert len(sizes) == 1
+
+
+def test_turns_are_clipped_by_role():
+    window = build_history_window(conversation(1, user_chars=5000, assistant_chars=5000), token_budget=5000)
+    user, assistant = window.messages
+    
+    assert count_tokens(user[1]) <= USER_TURN_TOKENS + 1
+    assert count_tokens(assistant[1]) <= ASSISTANT_TURN_TOKENS + 1
+    assert assistant[1].endswith("...")
+
+
+def test_older_user_turns_are_summarized():
+    window = build_history_window(conversation(10, user_chars=20), token_budget=300)
+    
+    assert window.summarized > 0
+    assert window.summary.startswith("người dùng đã hỏi: ")
+    assert "trả lời" not in window.summary
+    assert count_tokens(window.summary) <= SUMMARY_TOKENS + 10
+    # Summary items are in conversation order and end right before the verbatim window
+    history = conversation(10, user_chars=20)
+    older_user = [content for role, content in history[:window.summarized] if role == "user"]
+    assert window.summary.endswith(older_user[-1])
+    assert window.summary.index("câu hỏi 0") < window.summary.index("câu hỏi 1")
+    assert window.lines()[0].startswith("Tóm tắt trước đó: ")
+
+
+def test_max_messages():
+    window = build_history_window(conversation(10, user_chars=10, assistant_chars=10), max_messages=4)
+    
+    assert len(window.messages) == 4
+    assert window.messages[-1][1].startswith("trả lời 9")
+    assert history_fetch_limit(4) == 4 + history_fetch_limit() // 2
+
+
+def test_newest_message_is_kept_even_over_budget():
+    window = build_history_window([("user", "x" * 4000)], token_budget=10)
+    assert len(window.messages) == 1
+
+
+def test_other_roles_and_empty_messages_are_skipped():
+    history = [("system", "prompt"), ("user", ""), ("user", "xin chào"), ("tool", "{}")]
+    assert build_history_window(history).messages == [("user", "xin chào")]
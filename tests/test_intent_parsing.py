@@ -0,0 +1,112 @@
+"""
+Intent routing: router output parsing, keyword fallback and compound-message execution
+"""
+
+import asyncio
+
+import pytest
+
+from src.travel_planner_agent import TravelPlannerAgent
+
+
+@pytest.fixture
+def agent():
+    # Parsing and composition need no provider, database or index
+    return TravelPlannerAgent.__new__(TravelPlannerAgent)
+
+
+def test_single_label(agent):
+    assert agent._parse_intents("weather", "Trời Huế sao?") == [{"tool": "WEATHER", "query": "Trời Huế sao?"}]
+
+
+def test_json_list(agent):
+    detected = '[{"tool": "WEATHER", "query": "thời tiết Đà Nẵng"}, {"tool": "hotel", "query": "đặt phòng"}]'
+    assert agent._parse_intents(detected, "msg") == [
+        {"tool": "WEATHER", "query": "thời tiết Đà Nẵng"},
+        {"tool": "HOTEL", "query": "đặt phòng"},
+    ]
+
+
+def test_code_fence_and_single_object(agent):
+    detected = 'Kết quả:\n```json\n{"tool": "RAG", "query": "Hội An có gì"}\n```'
+    # A single request keeps the user's own words
+    assert agent._parse_intents(detected, "Hội An có gì hay?") == [{"tool": "RAG", "query": "Hội An có gì hay?"}]
+
+
+def test_same_tool_with_different_queries_is_kept(agent):
+    detected = ('[{"tool": "WEATHER", "query": "thời tiết Đà Nẵng"}, {"tool": "WEATHER", "query": "thời tiết Hà Nội"},'
+                ' {"tool": "WEATHER", "query": "Thời tiết Đà Nẵng"}]')
+    assert [intent["query"] for intent in agent._parse_intents(detected, "msg")] == [
+        "thời tiết Đà Nẵng", "thời tiết Hà Nội"
+    ]
+
+
+def test_nothing_is_truncated(agent):
+    tools = ["WEATHER", "RAG", "HOTEL", "CAR", "TRAVEL_PLAN"]
+    detected = "[" + ", ".join(f'{{"tool": "{tool}", "query": "q {tool}"}}' for tool in tools) + "]"
+    assert [intent["tool"] for intent in agent._parse_intents(detected, "msg")] == tools
+
+
+@pytest.mark.parametrize("detected", ["", "không rõ", "[{broken json", '[{"tool": "FLIGHT"}]', "[1, 2]"])
+def test_unusable_output(agent, detected):
+    assert agent._parse_intents(detected, "msg") == []
+
+
+def test_missing_query_uses_user_input(agent):
+    detected = '[{"tool": "RAG"}, {"tool": "WEATHER", "query": ""}]'
+    assert agent._parse_intents(detected, "Đà Lạt") == [
+        {"tool": "RAG", "query": "Đà Lạt"}, {"tool": "WEATHER", "query": "Đà Lạt"}
+    ]
+
+
+@pytest.mark.parametrize("message,tool", [
+    ("Thời tiết Sa Pa ngày mai", "WEATHER"),
+    ("Tôi muốn đặt phòng khách sạn", "HOTEL"),
+    ("Thuê xe ra sân bay", "CAR"),
+    ("Lên kế hoạch du lịch Phú Quốc", "TRAVEL_PLAN"),
+    ("Gợi ý địa điểm tham quan", "RAG"),
+    ("Xin chào", "GENERAL"),
+])
+def test_keyword_tool(message, tool):
+    assert TravelPlannerAgent._keyword_tool(message) == tool
+
+
+def run_intents(agent, intents):
+    calls = []
+    
+    async def fake_tool(tool, query, *args):
+        calls.append((tool, query))
+        return {"success": True, "response": f"{tool}: {query}", "tool_used": tool}
+    
+    agent._aexecute_tool = fake_tool
+    result = asyncio.run(agent._aexecute_intents(intents, "", "c1", []))
+    return calls, result
+
+
+def test_weather_intents_are_merged(agent):
+    calls, result = run_intents(agent, [
+        {"tool": "WEATHER", "query": "Đà Nẵng"}, {"tool": "RAG", "query": "Hội An"},
+        {"tool": "WEATHER", "query": "Hà Nội"},
+    ])
+    assert calls == [("WEATHER", "Đà Nẵng và Hà Nội"), ("RAG", "Hội An")]
+    assert "📌" not in result["response"]
+
+
+def test_extra_and_stateful_intents_are_deferred_with_a_note(agent):
+    calls, result = run_intents(agent, [
+        {"tool": "HOTEL", "query": "đặt phòng"}, {"tool": "CAR", "query": "thuê xe"},
+        {"tool": "RAG", "query": "Hội An"}, {"tool": "GENERAL", "query": "chào"},
+        {"tool": "WEATHER", "query": "Huế"},
+    ])
+    assert calls == [("HOTEL", "đặt phòng"), ("RAG", "Hội An"), ("GENERAL", "chào")]
+    for query in ("thuê xe", "Huế"):
+        assert f"📌 Mình sẽ xử lý \"{query}\"" in result["response"]
+    assert result["primary_tool"] == "HOTEL"
+    assert result["tools_used"] == ["HOTEL", "RAG", "GENERAL"]
+
+
+def test_identical_weather_intents_are_merged_once(agent):
+    calls, _ = run_intents(agent, [
+        {"tool": "WEATHER", "query": "Huế"}, {"tool": "WEATHER", "query": "Huế"}, {"tool": "RAG", "query": "Huế"},
+    ])
+    assert calls == [("WEATHER", "Huế và Huế"), ("RAG", "Huế")]
@@ -0,0 +1,158 @@
+"""
+LLM scheduler: priority order, backpressure and the 429 dispatch pause
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.llm_scheduler import (
+    INTERACTIVE, ROUTING, SUGGESTIONS, TITLING, LLMScheduler, SchedulerRejectedError, background_priority,
+    stage_priority
+)
+from src.resilience import CallPolicy, ResilientCaller
+
+
+def wait_for_waiters(scheduler, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.state()["waiting"] < count:
+        assert time.monotonic() < deadline, "waiters did not queue"
+        time.sleep(0.005)
+
+
+def test_waiters_are_served_by_priority():
+    scheduler = LLMScheduler(max_concurrency=1)
+    held = scheduler.acquire(INTERACTIVE, 10)
+    order = []
+    
+    def worker(priority):
+        slot = scheduler.acquire(priority, 10)
+        order.append(priority)
+        scheduler.release(slot)
+    
+    threads = []
+    for count, priority in enumerate([TITLING, SUGGESTIONS, INTERACTIVE, ROUTING, INTERACTIVE], start=1):
+        thread = threading.Thread(target=worker, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        wait_for_waiters(scheduler, count)
+    
+    scheduler.release(held)
+    for thread in threads:
+        thread.join(2.0)
+    
+    assert order == [INTERACTIVE, INTERACTIVE, ROUTING, SUGGESTIONS, TITLING]
+    assert scheduler.state()["in_flight"] == 0
+
+
+def test_full_queue_rejects():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1, max_wait={SUGGESTIONS: 0.5})
+    held = scheduler.acquire(INTERACTIVE, 10)
+    errors = []
+    
+    def waiter_fn():
+        try:
+            scheduler.acquire(SUGGESTIONS, 10)
+        except SchedulerRejectedError as e:
+            errors.append(e)
+    
+    waiter = threading.Thread(target=waiter_fn)
+    waiter.start()
+    wait_for_waiters(scheduler, 1)
+    
+    with pytest.raises(SchedulerRejectedError, match="queue full"):
+        scheduler.acquire(INTERACTIVE, 10)
+    
+    waiter.join(2.0)
+    scheduler.release(held)
+    assert len(errors) == 1  # the queued suggestion gave up after its max wait
+    assert scheduler.state()["classes"]["interactive"]["rejected"] == 1
+
+
+def test_waiting_too_long_rejects():
+    scheduler = LLMScheduler(max_concurrency=1, max_wait={TITLING: 0.05})
+    scheduler.acquire(INTERACTIVE, 10)
+    
+    started = time.monotonic()
+    with pytest.raises(SchedulerRejectedError):
+        scheduler.acquire(TITLING, 10)
+    assert time.monotonic() - started < 1.0
+    assert scheduler.state()["classes"]["titling"]["rejected"] == 1
+    assert scheduler.state()["waiting"] == 0
+
+
+def test_request_budget():
+    scheduler = LLMScheduler(rpm=2, max_wait={INTERACTIVE: 0.05})
+    scheduler.release(scheduler.acquire(INTERACTIVE, 10))
+    scheduler.release(scheduler.acquire(INTERACTIVE, 10))
+    
+    with pytest.raises(SchedulerRejectedError):
+        scheduler.acquire(INTERACTIVE, 10)
+    assert scheduler.state()["requests_last_minute"] == 2
+
+
+def test_token_budget_charges_real_usage():
+    class Response:
+        usage_metadata = {"input_tokens": 30, "output_tokens": 10}
+    
+    scheduler = LLMScheduler(tpm=1000)
+    slot = scheduler.acquire(INTERACTIVE, 500)
+    assert scheduler.state()["tokens_last_minute"] == 500
+    
+    slot.response = Response()
+    scheduler.release(slot)
+    assert scheduler.state()["tokens_last_minute"] == 40
+
+
+def test_rate_limit_pauses_dispatch():
+    scheduler = LLMScheduler(max_wait={INTERACTIVE: 2.0})
+    assert scheduler.note_rate_limited(0.1) == pytest.approx(0.1, abs=0.02)
+    # A shorter retry-after does not shorten the pause
+    assert scheduler.note_rate_limited(0.0) > 0.05
+    
+    started = time.monotonic()
+    scheduler.release(scheduler.acquire(INTERACTIVE, 10))
+    assert time.monotonic() - started >= 0.08
+
+
+def test_rate_limited_call_waits_for_the_pause():
+    class RateLimitError(Exception):
+        pass
+    
+    scheduler = LLMScheduler()
+    caller = ResilientCaller("test", CallPolicy(retries=1, backoff_base=0.0, backoff_max=0.0))
+    attempts = []
+    
+    def fn():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            scheduler.note_rate_limited(0.1)  # another worker's 429 already paused dispatch
+            raise RateLimitError()
+        return "ok"
+    
+    with scheduler.slot("intent_detection", 10):
+        assert caller.call(fn, hedge=False) == "ok"
+    assert attempts[1] - attempts[0] >= 0.08
+
+
+def test_async_slot():
+    scheduler = LLMScheduler(max_concurrency=1)
+    
+    async def run():
+        async with scheduler.aslot("suggestions", 10):
+            assert scheduler.state()["in_flight"] == 1
+    
+    asyncio.run(run())
+    assert scheduler.state()["in_flight"] == 0
+    assert scheduler.state()["classes"]["suggestions"]["admitted"] == 1
+
+
+def test_stage_priority():
+    assert stage_priority("general_response") == INTERACTIVE
+    assert stage_priority("intent_detection") == ROUTING
+    assert stage_priority("conversation_title") == TITLING
+    with background_priority():
+        assert stage_priority("general_response") == SUGGESTIONS
+        assert stage_priority("conversation_title") == TITLING
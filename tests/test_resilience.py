@@ -0,0 +1,179 @@
+"""
+Resilience: circuit breaker transitions, retries, and 429 handling
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.resilience import (
+    CallPolicy, CircuitBreaker, DependencyUnavailableError, ResilientCaller, is_rate_limited,
+    is_retryable, rate_limit_handler, retry_after_seconds
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code, headers)
+
+
+class RateLimitError(Exception):
+    """Named like the OpenAI SDK error, which is matched by class name"""
+
+
+def policy(**overrides):
+    settings = dict(timeout=1.0, retries=2, backoff_base=0.0, backoff_max=0.0, failure_threshold=2,
+                    reset_timeout=0.05)
+    settings.update(overrides)
+    return CallPolicy(**settings)
+
+
+def flaky(errors, result="ok"):
+    """Function raising the given errors in turn, then returning result"""
+    errors = list(errors)
+    calls = []
+    
+    def fn():
+        calls.append(time.monotonic())
+        if errors:
+            raise errors.pop(0)
+        return result
+    fn.calls = calls
+    return fn
+
+
+def test_breaker_closed_open_half_open_closed():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    
+    time.sleep(0.06)
+    assert breaker.allow()  # the one trial call
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_retries_then_succeeds():
+    caller = ResilientCaller("test", policy())
+    fn = flaky([ConnectionError("reset")])
+    
+    assert caller.call(fn, hedge=False) == "ok"
+    assert len(fn.calls) == 2
+    assert caller.state()["retries"] == 1
+    assert caller.state()["state"] == CircuitBreaker.CLOSED
+
+
+def test_exhausted_retries_open_the_circuit():
+    caller = ResilientCaller("test", policy(retries=1))
+    with pytest.raises(DependencyUnavailableError):
+        caller.call(flaky([FakeAPIError(503)] * 2), hedge=False)
+    assert caller.state()["state"] == CircuitBreaker.OPEN
+    
+    with pytest.raises(DependencyUnavailableError, match="circuit open"):
+        caller.call(flaky([]), hedge=False)
+    assert caller.state()["rejected"] == 1
+
+
+def test_bad_request_is_not_retried():
+    caller = ResilientCaller("test", policy())
+    fn = flaky([ValueError("bad request")])
+    
+    with pytest.raises(ValueError):
+        caller.call(fn, hedge=False)
+    assert len(fn.calls) == 1
+    assert caller.state()["consecutive_failures"] == 0
+
+
+def test_rate_limits_do_not_open_the_circuit():
+    caller = ResilientCaller("test", policy(retries=3, failure_threshold=1))
+    fn = flaky([FakeAPIError(429), RateLimitError("slow down"), FakeAPIError(429)])
+    
+    assert caller.call(fn, hedge=False) == "ok"
+    state = caller.state()
+    assert state["state"] == CircuitBreaker.CLOSED
+    assert state["rate_limited"] == 3
+    assert state["failures"] == 0
+
+
+def test_rate_limit_waits_for_retry_after():
+    caller = ResilientCaller("test", policy())
+    fn = flaky([FakeAPIError(429, {"retry-after-ms": "80"})])
+    
+    assert caller.call(fn, hedge=False) == "ok"
+    assert fn.calls[1] - fn.calls[0] >= 0.07
+
+
+def test_rate_limit_handler_sees_every_429():
+    reported = []
+    
+    def handler(retry_after):
+        reported.append(retry_after)
+        return 0.0
+    
+    caller = ResilientCaller("test", policy(retries=1))
+    fn = flaky([FakeAPIError(429, {"retry-after": "7"}), FakeAPIError(429)])
+    with rate_limit_handler(handler):
+        with pytest.raises(DependencyUnavailableError):
+            caller.call(fn, hedge=False)
+    
+    # The last 429 is reported too, although it is not retried
+    assert reported == [7.0, None]
+    assert caller.state()["state"] == CircuitBreaker.CLOSED
+
+
+def test_async_call_retries():
+    caller = ResilientCaller("test", policy())
+    attempts = []
+    
+    async def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise TimeoutError()
+        return "ok"
+    
+    assert asyncio.run(caller.acall(fn, hedge=False)) == "ok"
+    assert len(attempts) == 2
+
+
+@pytest.mark.parametrize("headers,expected", [
+    ({"retry-after-ms": "1500"}, 1.5),
+    ({"retry-after": "2"}, 2.0),
+    ({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, None),
+    ({}, None),
+])
+def test_retry_after_seconds(headers, expected):
+    assert retry_after_seconds(FakeAPIError(429, headers)) == expected
+
+
+def test_error_classification():
+    assert is_rate_limited(FakeAPIError(429)) and is_rate_limited(RateLimitError())
+    assert not is_rate_limited(FakeAPIError(503))
+    assert is_retryable(FakeAPIError(503)) and is_retryable(TimeoutError())
+    assert not is_retryable(FakeAPIError(400)) and not is_retryable(KeyError("x"))
@@ -0,0 +1,89 @@
+"""
+Stage models: resolving stored overrides and storing only what differs from the defaults
+"""
+
+from src.stage_models import STAGE_MODEL_DEFAULTS, resolve_stage_model, stage_overrides
+
+
+def panel_values(model):
+    """What the sidebar panel submits for a stage shown with these settings (max_tokens 0 = default)"""
+    return {"deployment": model.deployment, "temperature": model.temperature,
+            "max_tokens": model.max_tokens or 0, "timeout": model.timeout}
+
+
+def save_unchanged(stored, creativity=0.7):
+    """Stage overrides after saving the panel without editing anything"""
+    saved = {}
+    for stage in STAGE_MODEL_DEFAULTS:
+        current = resolve_stage_model(stage, stored, creativity)
+        overrides = stage_overrides(stage, panel_values(current), stored.get(stage), creativity)
+        if overrides:
+            saved[stage] = overrides
+    return saved
+
+
+def test_defaults():
+    router = resolve_stage_model("intent_detection")
+    assert router.stage == "router"
+    assert router.max_tokens == STAGE_MODEL_DEFAULTS["router"]["max_tokens"]
+    assert router.temperature == STAGE_MODEL_DEFAULTS["router"]["temperature"]
+    
+    general = resolve_stage_model("general_response", {}, 0.4)
+    assert general.temperature == 0.4  # follows the creativity setting
+    assert general.max_tokens is None and general.completion_budget == 500
+
+
+def test_overrides_are_applied():
+    stored = {"router": {"deployment": "gpt-x", "timeout": 5}, "general_answer": {"temperature": 0.2}}
+    assert resolve_stage_model("router", stored).deployment == "gpt-x"
+    assert resolve_stage_model("router", stored).timeout == 5.0
+    assert resolve_stage_model("general_answer", stored, 0.9).temperature == 0.2
+
+
+def test_empty_values_fall_back_to_defaults():
+    stored = {"rewrite": {"deployment": "", "max_tokens": None}}
+    rewrite = resolve_stage_model("rewrite", stored)
+    assert rewrite.deployment == STAGE_MODEL_DEFAULTS["rewrite"]["deployment"]
+    assert rewrite.max_tokens == STAGE_MODEL_DEFAULTS["rewrite"]["max_tokens"]
+
+
+def test_unchanged_save_stores_nothing():
+    assert save_unchanged({}) == {}
+
+
+def test_unchanged_save_keeps_stored_overrides():
+    stored = {
+        "general_answer": {"temperature": 0.2},
+        "router": {"deployment": "gpt-x", "max_tokens": 40},
+        "titling": {"timeout": 3.0},
+    }
+    assert save_unchanged(stored) == stored
+
+
+def test_stored_temperature_equal_to_creativity_is_kept():
+    stored = {"general_answer": {"temperature": 0.7}}
+    assert save_unchanged(stored, creativity=0.7) == stored
+
+
+def test_new_temperature_for_a_creativity_stage():
+    current = resolve_stage_model("general_answer", {}, 0.7)
+    values = dict(panel_values(current), temperature=0.3)
+    assert stage_overrides("general_answer", values, None, 0.7) == {"temperature": 0.3}
+
+
+def test_values_equal_to_the_default_are_dropped():
+    defaults = STAGE_MODEL_DEFAULTS["rag_answer"]
+    stored = {"deployment": "gpt-x", "temperature": 0.1, "timeout": 60.0}
+    values = {"deployment": defaults["deployment"], "temperature": defaults["temperature"],
+              "max_tokens": defaults["max_tokens"], "timeout": defaults["timeout"]}
+    assert stage_overrides("rag_answer", values, stored) == {}
+
+
+def test_zero_max_tokens_means_the_stage_default():
+    values = {"deployment": "", "temperature": STAGE_MODEL_DEFAULTS["rewrite"]["temperature"], "max_tokens": 0,
+              "timeout": STAGE_MODEL_DEFAULTS["rewrite"]["timeout"]}
+    assert stage_overrides("rewrite", values, {"max_tokens": 80}) == {}
+    
+    stored = {"rewrite": {"max_tokens": 0}}
+    assert resolve_stage_model("rewrite", stored).max_tokens == STAGE_MODEL_DEFAULTS["rewrite"]["max_tokens"]
+    assert resolve_stage_model("general_answer", {"general_answer": {"max_tokens": 0}}).max_tokens is None